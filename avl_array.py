@@ -1,33 +1,506 @@
 
 from array import array
+from bisect import bisect_left
+from itertools import islice
 import graphviz
+import numpy as np
+import tree_columns
+import tree_file
+import tree_frozen
+import tree_parallel
 
 class AVLTreeArray:
-    def __init__(self, capacity=100000):
+    MIN_CAPACITY = 16
+
+    # key_dtype: int32 (default), int64, uint64, float64, ... or 'S<width>'
+    # value_dtype: None for a plain set, a numeric dtype or object for a map
+    def __init__(self, capacity=MIN_CAPACITY, order_stats=False, key_dtype=np.intc, value_dtype=None):
         self.capacity = capacity
 
-        self.keys = array('i', [0] * capacity)
+        self.key_dtype = tree_columns.key_dtype(key_dtype)
+        self.cast = tree_columns.scalar_type(self.key_dtype)
+        self.keys = tree_columns.new_column(self.key_dtype, capacity)
         self.left = array('i', [-1] * capacity)
         self.right = array('i', [-1] * capacity)
         self.height = array('i', [0] * capacity)
+        # subtree sizes, only with order_stats
+        self.order_stats = order_stats
+        self.count = array('i', [0] * capacity) if order_stats else None
+        self.value_dtype = tree_columns.value_dtype(value_dtype)
+        if self.value_dtype is None:
+            self.values = None
+        else:
+            self.values = tree_columns.new_column(self.value_dtype, capacity)
+            self.default = tree_columns.default_value(self.value_dtype)
         
         self.root = -1      
         self.free_idx = 0  
+        # deleted slots, chained through self.left
+        self.free_head = -1
+        self.size = 0
+        # writes that bypass insert_node / delete_node: batches, split /
+        # join, set operations, compact (checked by tree_cache)
+        self.bulk_writes = 0
+        # set by load(mmap=True), the columns are read-only views of the file
+        self.read_only = False
+        # path (root first) of the last finger_search
+        self.finger = []
+
+    # BULK LOAD
+
+    @classmethod
+    def from_iterable(cls, keys, order_stats=False, key_dtype=np.intc, value_dtype=None):
+        keys = cls.unique_sorted(keys, tree_columns.key_dtype(key_dtype))
+        return cls.from_sorted(keys, order_stats, key_dtype, value_dtype)
+
+    @staticmethod
+    def unique_sorted(keys, dtype, drop=False):
+        return np.unique(tree_columns.key_array(keys, dtype, drop))
+
+    @classmethod
+    def from_sorted(cls, keys, order_stats=False, key_dtype=np.intc, value_dtype=None, values=None):
+        # keys must be strictly increasing; slot j holds the j-th smallest
+        # key and the balanced shape is built one level per step.
+        # values, if given, are the payloads in the same order as keys
+        keys = tree_columns.key_array(keys, tree_columns.key_dtype(key_dtype))
+        n = len(keys)
+        left = np.full(n, -1, dtype=np.intc)
+        right = np.full(n, -1, dtype=np.intc)
+        height = np.zeros(n, dtype=np.intc)
+        count = np.zeros(n, dtype=np.intc)
+
+        lo = np.zeros(1 if n else 0, dtype=np.int64)
+        hi = np.full(len(lo), n, dtype=np.int64)
+        while len(lo):
+            mid = (lo + hi) // 2
+            # frexp exponent == bit_length of the subtree size
+            height[mid] = np.frexp(hi - lo)[1]
+            count[mid] = hi - lo
+            has_l = lo < mid
+            has_r = mid + 1 < hi
+            left[mid[has_l]] = (lo[has_l] + mid[has_l]) // 2
+            right[mid[has_r]] = (mid[has_r] + 1 + hi[has_r]) // 2
+            lo, hi = (np.concatenate((lo[has_l], mid[has_r] + 1)),
+                      np.concatenate((mid[has_l], hi[has_r])))
+
+        tree = cls(0, order_stats, key_dtype, value_dtype)
+        if order_stats:
+            tree.count = array('i', count.tobytes())
+        tree.keys = tree_columns.column_from_numpy(keys, tree.key_dtype)
+        if tree.values is not None:
+            if values is None:
+                tree.values = tree_columns.new_column(tree.value_dtype, n)
+            else:
+                tree.values = tree_columns.column_from_numpy(values, tree.value_dtype)
+        tree.left = array('i', left.tobytes())
+        tree.right = array('i', right.tobytes())
+        tree.height = array('i', height.tobytes())
+        tree.capacity = n
+        tree.free_idx = n
+        tree.size = n
+        tree.root = n // 2 if n else -1
+        return tree
+
+    # SAVE / LOAD
+
+    def save(self, path):
+        columns = {'keys': self.keys, 'left': self.left, 'right': self.right, 'height': self.height}
+        if self.order_stats:
+            columns['count'] = self.count
+        if self.values is not None:
+            if self.value_dtype.kind == 'O':
+                raise TypeError("Object values cannot be saved, use a numeric value_dtype")
+            columns['values'] = self.values
+        meta = {'capacity': self.capacity, 'root': self.root, 'free_idx': self.free_idx,
+                'free_head': self.free_head, 'size': self.size}
+        tree_file.save_columns(path, b'pool', meta, columns)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        # mmap=True maps the columns read-only without parsing or copying,
+        # pages are read lazily; such a tree supports search and iteration
+        meta, columns = tree_file.read_header(path, b'pool')
+        values = columns.get('values')
+        tree = cls(0, 'count' in columns, columns['keys'][0], values[0] if values else None)
+        if mmap:
+            buf = memoryview(tree_file.map_file(path))
+        else:
+            with open(path, 'rb') as f:
+                buf = f.read()
+        for name, (dtype, length, offset) in columns.items():
+            if name not in ('keys', 'values') and dtype.itemsize != tree.left.itemsize:
+                raise ValueError(f"Column {name} has {dtype.itemsize}-byte items")
+            data = buf[offset:offset + length * dtype.itemsize]
+            setattr(tree, name, tree_columns.column_from_buffer(data, dtype))
+        for name in ('capacity', 'root', 'free_idx', 'free_head', 'size'):
+            setattr(tree, name, meta[name])
+        tree.read_only = mmap
+        return tree
+
+    def require_writable(self):
+        # every writer checks first, a failed write must not leave the
+        # counters ahead of the mapped columns
+        if self.read_only:
+            raise RuntimeError("Tree is memory-mapped read-only, load it with mmap=False to modify it")
+
+    # FREEZE
+
+    def freeze(self):
+        # immutable Eytzinger snapshot (tree_frozen.FrozenTree), O(n)
+        idx = np.array(self.live_nodes('inorder'), dtype=np.int64)
+        keys = np.asarray(self.keys)[idx]
+        values = None
+        if self.values is not None:
+            values = tree_columns.column_to_numpy(self.values, self.value_dtype)[idx]
+        return tree_frozen.FrozenTree(keys, values)
+
+    # BATCH INSERT / DELETE
+    # The sorted batch is split around each node and both halves go down
+    # at once, touched nodes are re-joined (and rebalanced) on the way up
+
+    def insert_many(self, keys):
+        self.require_writable()
+        keys = self.unique_sorted(keys, self.key_dtype).tolist()
+        self.root = self.insert_range(self.root, keys, 0, len(keys))
+        self.bulk_writes += 1
+
+    def delete_many(self, keys):
+        self.require_writable()
+        keys = self.unique_sorted(keys, self.key_dtype, drop=True).tolist()
+        self.root = self.delete_range(self.root, keys, 0, len(keys))
+        self.bulk_writes += 1
+
+    def insert_range(self, node, keys, lo, hi):
+        if lo >= hi:
+            return node
+        if node == -1:
+            return self.build(keys, lo, hi)
+        k = self.keys[node]
+        i = bisect_left(keys, k, lo, hi)
+        j = i + 1 if i < hi and keys[i] == k else i
+        l = self.insert_range(self.left[node], keys, lo, i)
+        r = self.insert_range(self.right[node], keys, j, hi)
+        return self.join_nodes(l, node, r)
+
+    def delete_range(self, node, keys, lo, hi):
+        if node == -1 or lo >= hi:
+            return node
+        k = self.keys[node]
+        i = bisect_left(keys, k, lo, hi)
+        found = i < hi and keys[i] == k
+        l = self.delete_range(self.left[node], keys, lo, i)
+        r = self.delete_range(self.right[node], keys, i + 1 if found else i, hi)
+        if found:
+            self.free_node(node)
+            return self.join2(l, r)
+        return self.join_nodes(l, node, r)
+
+    def build(self, keys, lo, hi):
+        if lo >= hi:
+            return -1
+        mid = (lo + hi) // 2
+        node = self.new_node(keys[mid])
+        self.left[node] = self.build(keys, lo, mid)
+        self.right[node] = self.build(keys, mid + 1, hi)
+        self.height[node] = (hi - lo).bit_length()
+        if self.order_stats:
+            self.count[node] = hi - lo
+        return node
+
+    # JOIN
+    # every key in l < keys[node] < every key in r, heights may differ by any amount
+
+    def join_nodes(self, l, node, r):
+        hl = self.get_height(l)
+        hr = self.get_height(r)
+        if hl > hr + 1:
+            return self.join_right(l, node, r)
+        if hr > hl + 1:
+            return self.join_left(l, node, r)
+        self.left[node] = l
+        self.right[node] = r
+        self.height[node] = 1 + max(hl, hr)
+        if self.order_stats:
+            self.update_count(node)
+        return node
+
+    def join_right(self, l, node, r):
+        # walk down the right spine of the taller l
+        c = self.right[l]
+        ll = self.left[l]
+        if self.get_height(c) <= self.get_height(r) + 1:
+            self.left[node] = c
+            self.right[node] = r
+            self.height[node] = 1 + max(self.get_height(c), self.get_height(r))
+            if self.order_stats:
+                self.update_count(node)
+            if self.height[node] <= self.get_height(ll) + 1:
+                self.right[l] = node
+                self.height[l] = 1 + max(self.get_height(ll), self.height[node])
+                if self.order_stats:
+                    self.update_count(l)
+                return l
+            self.right[l] = self.r_rotate(node)
+            return self.l_rotate(l)
+
+        t = self.join_right(c, node, r)
+        self.right[l] = t
+        if self.height[t] <= self.get_height(ll) + 1:
+            self.height[l] = 1 + max(self.get_height(ll), self.height[t])
+            if self.order_stats:
+                self.update_count(l)
+            return l
+        return self.l_rotate(l)
+
+    def join_left(self, l, node, r):
+        # mirror of join_right
+        c = self.left[r]
+        rr = self.right[r]
+        if self.get_height(c) <= self.get_height(l) + 1:
+            self.left[node] = l
+            self.right[node] = c
+            self.height[node] = 1 + max(self.get_height(l), self.get_height(c))
+            if self.order_stats:
+                self.update_count(node)
+            if self.height[node] <= self.get_height(rr) + 1:
+                self.left[r] = node
+                self.height[r] = 1 + max(self.height[node], self.get_height(rr))
+                if self.order_stats:
+                    self.update_count(r)
+                return r
+            self.left[r] = self.l_rotate(node)
+            return self.r_rotate(r)
+
+        t = self.join_left(l, node, c)
+        self.left[r] = t
+        if self.height[t] <= self.get_height(rr) + 1:
+            self.height[r] = 1 + max(self.height[t], self.get_height(rr))
+            if self.order_stats:
+                self.update_count(r)
+            return r
+        return self.r_rotate(r)
+
+    def join2(self, l, r):
+        # join without a middle key: the maximum of l takes its place
+        if l == -1:
+            return r
+        l, last = self.split_last(l)
+        return self.join_nodes(l, last, r)
+
+    def split_last(self, node):
+        if self.right[node] == -1:
+            return self.left[node], node
+        r, last = self.split_last(self.right[node])
+        return self.join_nodes(self.left[node], node, r), last
+
+    # SPLIT / JOIN TREES
+    # Two trees never share a pool, so the whole-tree versions copy the
+    # smaller side across: O(log n + size of the smaller tree)
+
+    @classmethod
+    def join(cls, left, key, right):
+        # all keys of left < key < all keys of right, key=None just
+        # concatenates; the taller tree hosts the result, both are consumed
+        left.require_writable()
+        right.require_writable()
+        if left.get_height(left.root) >= right.get_height(right.root):
+            host, guest = left, right
+        else:
+            host, guest = right, left
+        g = host.copy_subtree(guest, guest.root)
+        l, r = (host.root, g) if host is left else (g, host.root)
+        if key is None:
+            host.root = host.join2(l, r)
+        else:
+            host.root = host.join_nodes(l, host.new_node(key), r)
+        left.bulk_writes += 1
+        right.bulk_writes += 1
+        return host
+
+    def split(self, key):
+        # -> (tree of keys < key, key was present, tree of keys > key),
+        # the taller half stays in this tree, the other one is copied out
+        self.require_writable()
+        l, found, r = self.split_node(self.root, key)
+        if found != -1:
+            self.free_node(found)
+        keep_left = self.get_height(l) >= self.get_height(r)
+        small = r if keep_left else l
+        out = self.empty_like()
+        out.root = out.copy_subtree(self, small)
+        self.free_subtree(small)
+        self.root = l if keep_left else r
+        self.bulk_writes += 1
+        if keep_left:
+            return self, found != -1, out
+        return out, found != -1, self
+
+    def split_node(self, node, key):
+        # -> (subtree < key, node holding key or -1, subtree > key)
+        if node == -1:
+            return -1, -1, -1
+        k = self.keys[node]
+        if key == k:
+            return self.left[node], node, self.right[node]
+        if key < k:
+            l, found, r = self.split_node(self.left[node], key)
+            return l, found, self.join_nodes(r, node, self.right[node])
+        l, found, r = self.split_node(self.right[node], key)
+        return self.join_nodes(self.left[node], node, l), found, r
+
+    def empty_like(self):
+        return self.__class__(order_stats=self.order_stats, key_dtype=self.key_dtype,
+                              value_dtype=self.value_dtype)
+
+    def take_over(self, other):
+        self.require_writable()
+        bulk_writes = self.bulk_writes
+        self.__dict__.update(other.__dict__)
+        self.bulk_writes = bulk_writes + 1
+
+    def copy_subtree(self, other, b):
+        # copy subtree b of another tree into this pool
+        if b == -1:
+            return -1
+        node = self.copy_node(other, b)
+        self.left[node] = self.copy_subtree(other, other.left[b])
+        self.right[node] = self.copy_subtree(other, other.right[b])
+        self.height[node] = other.height[b]
+        if self.order_stats:
+            self.update_count(node)
+        return node
+
+    def copy_node(self, other, b):
+        node = self.new_node(other.keys[b])
+        if self.values is not None:
+            self.values[node] = other.values[b]
+        return node
+
+    def free_subtree(self, node):
+        stack = [node] if node != -1 else []
+        while stack:
+            node = stack.pop()
+            if self.left[node] != -1:
+                stack.append(self.left[node])
+            if self.right[node] != -1:
+                stack.append(self.right[node])
+            self.free_node(node)
+
+    # SET ALGEBRA
+    # This tree becomes the result and other is left untouched, only the
+    # keys of other that end up in the result are copied into this pool.
+    # The recursion follows other (m keys) and splits this tree (n keys)
+    # at each of its keys: O(m log(n/m + 1)).
+    # workers > 1 runs independent key ranges in a process pool.
+
+    def union(self, other, workers=None):
+        self.require_writable()
+        if workers and workers > 1:
+            return tree_parallel.parallel_set_op(self, other, 'union', workers)
+        self.root = self.union_nodes(self.root, other, other.root)
+        self.bulk_writes += 1
+        return self
+
+    def intersection(self, other, workers=None):
+        self.require_writable()
+        if workers and workers > 1:
+            return tree_parallel.parallel_set_op(self, other, 'intersection', workers)
+        self.root = self.intersection_nodes(self.root, other, other.root)
+        self.bulk_writes += 1
+        return self
+
+    def difference(self, other, workers=None):
+        self.require_writable()
+        if workers and workers > 1:
+            return tree_parallel.parallel_set_op(self, other, 'difference', workers)
+        self.root = self.difference_nodes(self.root, other, other.root)
+        self.bulk_writes += 1
+        return self
+
+    def union_nodes(self, a, other, b):
+        if b == -1:
+            return a
+        if a == -1:
+            return self.copy_subtree(other, b)
+        k = other.keys[b]
+        l, found, r = self.split_node(a, k)
+        mid = found if found != -1 else self.copy_node(other, b)
+        l = self.union_nodes(l, other, other.left[b])
+        r = self.union_nodes(r, other, other.right[b])
+        return self.join_nodes(l, mid, r)
+
+    def intersection_nodes(self, a, other, b):
+        if a == -1:
+            return -1
+        if b == -1:
+            self.free_subtree(a)
+            return -1
+        l, found, r = self.split_node(a, other.keys[b])
+        l = self.intersection_nodes(l, other, other.left[b])
+        r = self.intersection_nodes(r, other, other.right[b])
+        if found != -1:
+            return self.join_nodes(l, found, r)
+        return self.join2(l, r)
+
+    def difference_nodes(self, a, other, b):
+        if a == -1 or b == -1:
+            return a
+        l, found, r = self.split_node(a, other.keys[b])
+        if found != -1:
+            self.free_node(found)
+        l = self.difference_nodes(l, other, other.left[b])
+        r = self.difference_nodes(r, other, other.right[b])
+        return self.join2(l, r)
 
     def new_node(self, key):
-        if self.free_idx >= self.capacity:
-            raise MemoryError("Memoty error")
-        
-        idx = self.free_idx
-        self.free_idx += 1
-        
-        self.keys[idx] = int(key)
+        if self.free_head != -1:
+            idx = self.free_head
+        else:
+            if self.free_idx >= self.capacity:
+                self.grow()
+            idx = self.free_idx
+        # the key first: one that does not fit the column raises before
+        # the free list and the counters change
+        self.keys[idx] = self.cast(key)
+        if idx == self.free_head:
+            self.free_head = self.left[idx]
+        else:
+            self.free_idx += 1
+        self.size += 1
+        if self.values is not None:
+            self.values[idx] = self.default
         self.left[idx] = -1
         self.right[idx] = -1
         self.height[idx] = 1
+        if self.order_stats:
+            self.count[idx] = 1
         return idx
 
+    def grow(self):
+        # double the columns, amortized O(1) per new node
+        extra = max(self.capacity, self.MIN_CAPACITY)
+        self.keys.extend(tree_columns.new_column(self.key_dtype, extra))
+        self.left.extend(array('i', [-1]) * extra)
+        self.right.extend(array('i', [-1]) * extra)
+        self.height.extend(array('i', [0]) * extra)
+        if self.order_stats:
+            self.count.extend(array('i', [0]) * extra)
+        if self.values is not None:
+            self.values.extend(tree_columns.new_column(self.value_dtype, extra))
+        self.capacity += extra
+
+    def free_node(self, idx):
+        self.left[idx] = self.free_head
+        self.right[idx] = -1
+        self.height[idx] = 0
+        if self.values is not None:
+            # drop the reference held by an object payload
+            self.values[idx] = self.default
+        self.free_head = idx
+        self.size -= 1
+
     def insert_node(self, key):
+        self.require_writable()
         self.root = self.insert(self.root, key)
 
     def insert(self, node, key):
@@ -45,6 +518,8 @@ class AVLTreeArray:
         
    
         self.height[node] = 1 + max(self.get_height(self.left[node]), self.get_height(self.right[node]))
+        if self.order_stats:
+            self.update_count(node)
 
         balance = self.check_balance(node)
 
@@ -73,6 +548,7 @@ class AVLTreeArray:
         return node
 
     def delete_node(self, key):
+        self.require_writable()
         self.root = self.delete(self.root, key)
 
     def delete(self, node, key):
@@ -92,8 +568,10 @@ class AVLTreeArray:
 
           
             if left_child == -1:
+                self.free_node(node)
                 return right_child
             elif right_child == -1:
+                self.free_node(node)
                 return left_child
             
          
@@ -103,6 +581,8 @@ class AVLTreeArray:
            
             temp = self.get_max_value_node(left_child) 
             self.keys[node] = self.keys[temp]
+            if self.values is not None:
+                self.values[node] = self.values[temp]
            
             self.left[node] = self.delete(left_child, self.keys[temp])
 
@@ -117,6 +597,8 @@ class AVLTreeArray:
 
    
         self.height[node] = 1 + max(self.get_height(self.left[node]), self.get_height(self.right[node]))
+        if self.order_stats:
+            self.update_count(node)
 
         # Balansowanie
         balance = self.check_balance(node)
@@ -160,6 +642,18 @@ class AVLTreeArray:
      
         return self.search(self.root, key)
 
+    def path_length(self, key):
+        # nodes a search for key visits
+        n = 0
+        node = self.root
+        while node != -1:
+            n += 1
+            k = self.keys[node]
+            if key == k:
+                break
+            node = self.left[node] if key < k else self.right[node]
+        return n
+
     def search(self, node, key):
         
         current_idx = node
@@ -175,7 +669,172 @@ class AVLTreeArray:
         
         return -1  
 
+    # BATCH SEARCH
+    # All queries descend together, one level per step: gather the keys of
+    # the current nodes, compare, pick left or right. Queries that hit or
+    # fall off are dropped, so it runs at most height[root] steps.
+
+    def search_many(self, queries):
+        # -> index of each query's node, -1 if missing
+        queries = np.asarray(queries)
+        out = np.full(len(queries), -1, dtype=np.int64)
+        if self.root == -1:
+            return out
+        # views over the columns, released again on return
+        keys = np.asarray(self.keys)
+        left = np.frombuffer(self.left, dtype=np.intc)
+        right = np.frombuffer(self.right, dtype=np.intc)
+
+        pending = np.arange(len(queries))
+        node = np.full(len(queries), self.root, dtype=np.intc)
+        while len(pending):
+            k = keys[node]
+            q = queries[pending]
+            hit = q == k
+            out[pending[hit]] = node[hit]
+            node = np.where(q < k, left[node], right[node])
+            keep = ~hit & (node != -1)
+            pending, node = pending[keep], node[keep]
+        return out
+
+    # FINGER SEARCH
+    # finger_search resumes from the node the previous one ended on: it
+    # climbs the saved path only until that subtree must hold the key, then
+    # descends, O(log d) for a key d ranks away. Every step up re-checks the
+    # parent link, so a path made stale by writes just falls back to root.
+
+    def finger_search(self, key):
+        stack = self.finger
+        node = self.finger_start(stack, key) if stack else -1
+        if node == -1:
+            stack.clear()
+            node = self.root
+        keys, left, right = self.keys, self.left, self.right
+        while node != -1:
+            stack.append(node)
+            k = keys[node]
+            if key == k:
+                return node
+            node = left[node] if key < k else right[node]
+        return -1
+
+    def finger_start(self, stack, key):
+        # -> node whose subtree holds key (popped off the path) or -1
+        keys, left, height = self.keys, self.left, self.height
+        c = stack.pop()
+        if c >= len(height) or height[c] == 0:
+            return -1
+        k = keys[c]
+        if key == k:
+            return c
+        going_right = key > k
+        while stack:
+            p = stack[-1]
+            if height[p] == 0:
+                return -1
+            if left[p] == c:
+                # c's keys lie between the finger and p
+                if going_right and key < keys[p]:
+                    return c
+            elif self.right[p] == c:
+                if not going_right and key > keys[p]:
+                    return c
+            else:
+                return -1
+            c = stack.pop()
+            if key == keys[c]:
+                return c
+        return c if c == self.root else -1
+
+
+    # MAP (needs value_dtype)
+
+    def get(self, key, default=None):
+        self.require_values()
+        node = self.search_node(key)
+        return default if node == -1 else self.values[node]
+
+    def put(self, key, value):
+        self.require_values()
+        self.require_writable()
+        node = self.search_node(key)
+        if node == -1:
+            self.insert_node(key)
+            node = self.search_node(key)
+        self.values[node] = value
+
+    def pop(self, key, *default):
+        self.require_values()
+        self.require_writable()
+        node = self.search_node(key)
+        if node == -1:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        value = self.values[node]
+        self.delete_node(key)
+        return value
+
+    def items(self, lo=None, hi=None):
+        # (key, value) pairs with lo <= key < hi in key order
+        self.require_values()
+        for node in self.range_nodes(lo, hi):
+            yield self.keys[node], self.values[node]
+
+    def require_values(self):
+        if self.values is None:
+            raise RuntimeError("Tree was created without value_dtype")
+
 
+    # TRAVERSAL
+    # Generators with an explicit stack: only the pending part of one
+    # root-to-leaf path is held, range() seeks to lo in O(log n)
+
+    def __iter__(self):
+        return self.range()
+
+    def __reversed__(self):
+        stack = []
+        node = self.root
+        while stack or node != -1:
+            while node != -1:
+                stack.append(node)
+                node = self.right[node]
+            node = stack.pop()
+            yield self.keys[node]
+            node = self.left[node]
+
+    def range(self, lo=None, hi=None):
+        # keys with lo <= key < hi in order, None means unbounded
+        return map(self.keys.__getitem__, self.range_nodes(lo, hi))
+
+    def range_nodes(self, lo=None, hi=None):
+        stack = []
+        node = self.root
+        while node != -1:
+            if lo is None or self.keys[node] >= lo:
+                stack.append(node)
+                node = self.left[node]
+            else:
+                node = self.right[node]
+        while stack:
+            node = stack.pop()
+            if hi is not None and self.keys[node] >= hi:
+                return
+            yield node
+            node = self.right[node]
+            while node != -1:
+                stack.append(node)
+                node = self.left[node]
+
+    def iter_chunks(self, chunk_size=4096, lo=None, hi=None):
+        # same keys as range(), as NumPy arrays of up to chunk_size keys
+        keys = self.range(lo, hi)
+        while True:
+            chunk = np.fromiter(islice(keys, chunk_size), dtype=self.key_dtype)
+            if not len(chunk):
+                return
+            yield chunk
 
     def r_rotate(self, x):
         y = self.left[x]
@@ -187,6 +846,9 @@ class AVLTreeArray:
         self.height[x] = 1 + max(self.get_height(self.left[x]), self.get_height(self.right[x]))
 
         self.height[y] = 1 + max(self.get_height(self.left[y]), self.get_height(self.right[y]))
+        if self.order_stats:
+            self.update_count(x)
+            self.update_count(y)
         return y
 
     def l_rotate(self, x):
@@ -198,13 +860,147 @@ class AVLTreeArray:
 
         self.height[x] = 1 + max(self.get_height(self.left[x]), self.get_height(self.right[x]))
         self.height[y] = 1 + max(self.get_height(self.left[y]), self.get_height(self.right[y]))
+        if self.order_stats:
+            self.update_count(x)
+            self.update_count(y)
         return y
 
+    # MEMORY
+
+    def memory_footprint(self):
+        # exact bytes of the columns; a node is one row across all of them,
+        # free slots and the unused tail are slack (compact(shrink=True)
+        # gives it back)
+        columns = (self.keys, self.left, self.right, self.height, self.count, self.values)
+        row = (tree_columns.item_bytes(self.key_dtype) + tree_columns.item_bytes(self.value_dtype)
+               + sum(c.itemsize for c in (self.left, self.right, self.height, self.count) if c is not None))
+        objects = tree_columns.object_bytes(self.values, self.value_dtype)
+        total = sum(tree_columns.column_bytes(c) for c in columns) + objects
+        payload = self.size * (tree_columns.item_bytes(self.key_dtype)
+                               + tree_columns.item_bytes(self.value_dtype)) + objects
+        return tree_columns.footprint(self.size, total, self.size * row + objects, payload)
+
+    # COMPACTION
+
+    def compact(self, order='inorder', shrink=False):
+        # Renumber live nodes into the dense prefix [0, size) in in-order
+        # or BFS order, drop the free list and optionally shrink the arrays
+        self.require_writable()
+        live = self.live_nodes(order)
+        n = len(live)
+        capacity = n if shrink else self.capacity
+
+        remap = array('i', [-1] * (self.capacity + 1))
+        for new, old in enumerate(live):
+            remap[old] = new
+        # remap[-1] stays -1, so empty children map onto themselves
+
+        keys = tree_columns.new_column(self.key_dtype, capacity)
+        left = array('i', [-1] * capacity)
+        right = array('i', [-1] * capacity)
+        height = array('i', [0] * capacity)
+        for new, old in enumerate(live):
+            keys[new] = self.keys[old]
+            left[new] = remap[self.left[old]]
+            right[new] = remap[self.right[old]]
+            height[new] = self.height[old]
+        if self.order_stats:
+            count = array('i', [0] * capacity)
+            for new, old in enumerate(live):
+                count[new] = self.count[old]
+            self.count = count
+        if self.values is not None:
+            values = tree_columns.new_column(self.value_dtype, capacity)
+            for new, old in enumerate(live):
+                values[new] = self.values[old]
+            self.values = values
+
+        self.root = remap[self.root]
+        self.keys, self.left, self.right, self.height = keys, left, right, height
+        self.capacity = capacity
+        self.free_idx = n
+        self.free_head = -1
+        self.bulk_writes += 1
+
+    def live_nodes(self, order='inorder'):
+        out = []
+        if self.root == -1:
+            return out
+        if order == 'inorder':
+            stack = []
+            node = self.root
+            while stack or node != -1:
+                while node != -1:
+                    stack.append(node)
+                    node = self.left[node]
+                node = stack.pop()
+                out.append(node)
+                node = self.right[node]
+        elif order == 'bfs':
+            out.append(self.root)
+            for node in out:
+                if self.left[node] != -1:
+                    out.append(self.left[node])
+                if self.right[node] != -1:
+                    out.append(self.right[node])
+        else:
+            raise ValueError(f"Unknown order: {order}")
+        return out
+
     def get_height(self, node):
         if node == -1:
             return 0
         return self.height[node]
 
+    # ORDER STATISTICS (needs order_stats=True)
+
+    def get_count(self, node):
+        if node == -1:
+            return 0
+        return self.count[node]
+
+    def update_count(self, node):
+        self.count[node] = 1 + self.get_count(self.left[node]) + self.get_count(self.right[node])
+
+    def rank(self, key):
+        # number of keys < key
+        self.require_order_stats()
+        node = self.root
+        r = 0
+        while node != -1:
+            if key <= self.keys[node]:
+                node = self.left[node]
+            else:
+                r += self.get_count(self.left[node]) + 1
+                node = self.right[node]
+        return r
+
+    def select(self, k):
+        # k-th smallest key, 0-based
+        self.require_order_stats()
+        if k < 0 or k >= self.get_count(self.root):
+            raise IndexError("select index out of range")
+        node = self.root
+        while True:
+            lc = self.get_count(self.left[node])
+            if k < lc:
+                node = self.left[node]
+            elif k == lc:
+                return self.keys[node]
+            else:
+                k -= lc + 1
+                node = self.right[node]
+
+    def count_range(self, lo, hi):
+        # number of keys with lo <= key < hi
+        if hi <= lo:
+            return 0
+        return self.rank(hi) - self.rank(lo)
+
+    def require_order_stats(self):
+        if not self.order_stats:
+            raise RuntimeError("Tree was created without order_stats")
+
     def check_balance(self, node):
         if node == -1:
             return 0
@@ -1,19 +1,253 @@
 
+from itertools import islice
 import numpy as np
 import graphviz
 import io               
 from PIL import Image
+import tree_columns
+import tree_file
+import tree_frozen
+import tree_pages
 
 class AVLTreeArray:
-    NIL = -1
-
-    def __init__(self, capacity=100000):
+    # batches at least live/REBUILD_FACTOR keys long rebuild the whole heap
+    REBUILD_FACTOR = 128
+
+    # capacity grows one full level at a time, 2**k - 1 slots;
+    # a slot is empty when its height is 0, so every key value is usable
+    # key_dtype: int32 (default), int64, uint64, float64, ... or 'S<width>'
+    # value_dtype: None for a plain set, a numeric dtype or object for a map
+    # page_size: None for dense NumPy columns, a power of two for paged
+    # columns (tree_pages.py) that only hold the pages with live slots
+    def __init__(self, capacity=63, order_stats=False, key_dtype=np.int32, value_dtype=None,
+                 page_size=None):
         self.capacity = capacity
 
-        self.tree = np.full(capacity, self.NIL, dtype=np.int32)
-        self.height = np.zeros(capacity, dtype=np.int16)
+        self.key_dtype = tree_columns.key_dtype(key_dtype)
+        self.cast = tree_columns.scalar_type(self.key_dtype)
+        self.order_stats = order_stats
+        self.value_dtype = tree_columns.value_dtype(value_dtype)
+        if self.value_dtype is not None:
+            self.default = tree_columns.default_value(self.value_dtype)
+        self.page_size = page_size
+        self.store = None
+        if page_size is None:
+            self.tree = np.zeros(capacity, dtype=self.key_dtype)
+            self.height = np.zeros(capacity, dtype=np.int16)
+            # subtree sizes, only with order_stats
+            self.count = np.zeros(capacity, dtype=np.int32) if order_stats else None
+            if self.value_dtype is not None:
+                self.values = np.full(capacity, self.default, dtype=self.value_dtype)
+        else:
+            self.store = tree_pages.PagedStore(capacity, page_size)
+            self.height = self.store.column(np.int16, owner=True)
+            self.tree = self.store.column(self.key_dtype)
+            self.count = self.store.column(np.int32) if order_stats else None
+            if self.value_dtype is not None:
+                self.values = self.store.column(self.value_dtype, self.default)
+        if self.value_dtype is None:
+            self.values = None
 
         self.root = 0
+        # live keys, so batches can pick key-by-key or rebuild in O(1)
+        self.size = 0
+        # rebuilds and shrinks, the writes tree_cache cannot follow key by key
+        self.bulk_writes = 0
+        # load(mmap=True): read-only columns mapped from the file
+        self.read_only = False
+        # slot the last finger_search ended on
+        self.finger = 0
+
+    # BULK LOAD
+
+    @classmethod
+    def from_iterable(cls, keys, order_stats=False, key_dtype=np.int32, value_dtype=None,
+                      page_size=None):
+        keys = cls.unique_sorted(keys, tree_columns.key_dtype(key_dtype))
+        return cls.from_sorted(keys, order_stats, key_dtype, value_dtype, page_size=page_size)
+
+    @staticmethod
+    def unique_sorted(keys, dtype, drop=False):
+        return np.unique(tree_columns.key_array(keys, dtype, drop))
+
+    @classmethod
+    def from_sorted(cls, keys, order_stats=False, key_dtype=np.int32, value_dtype=None, values=None,
+                    page_size=None):
+        # keys must be strictly increasing; the middle key of every range
+        # goes straight to its heap slot, one level per step.
+        # values, if given, are the payloads in the same order as keys
+        keys = tree_columns.key_array(keys, tree_columns.key_dtype(key_dtype))
+        n = len(keys)
+        if n == 0:
+            return cls(order_stats=order_stats, key_dtype=key_dtype, value_dtype=value_dtype,
+                       page_size=page_size)
+        tree = cls((1 << n.bit_length()) - 1, order_stats, key_dtype, value_dtype, page_size)
+        tree.size = n
+        if values is not None:
+            values = np.asarray(values, dtype=tree.value_dtype)
+
+        idx = np.zeros(1, dtype=np.int64)
+        lo = np.zeros(1, dtype=np.int64)
+        hi = np.full(1, n, dtype=np.int64)
+        while len(idx):
+            mid = (lo + hi) // 2
+            # frexp exponent == bit_length of the subtree size
+            tree.height[idx] = np.frexp(hi - lo)[1]
+            tree.tree[idx] = keys[mid]
+            if values is not None:
+                tree.values[idx] = values[mid]
+            if order_stats:
+                tree.count[idx] = hi - lo
+            has_l = lo < mid
+            has_r = mid + 1 < hi
+            idx = np.concatenate((2 * idx[has_l] + 1, 2 * idx[has_r] + 2))
+            lo, hi = (np.concatenate((lo[has_l], mid[has_r] + 1)),
+                      np.concatenate((mid[has_l], hi[has_r])))
+        return tree
+
+    # SAVE / LOAD
+
+    def save(self, path):
+        # paged columns are written dense, load() gives a dense tree
+        columns = {'tree': self.tree, 'height': self.height}
+        if self.order_stats:
+            columns['count'] = self.count
+        if self.values is not None:
+            if self.value_dtype.kind == 'O':
+                raise TypeError("Object values cannot be saved, use a numeric value_dtype")
+            columns['values'] = self.values
+        meta = {'capacity': self.capacity, 'root': self.root, 'size': self.size}
+        tree_file.save_columns(path, b'heap', meta, columns)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        # mmap=True maps the columns read-only without parsing or copying,
+        # pages are read lazily; such a tree supports search and iteration
+        meta, columns = tree_file.read_header(path, b'heap')
+        values = columns.get('values')
+        tree = cls(0, 'count' in columns, columns['tree'][0], values[0] if values else None)
+        buf = tree_file.map_file(path) if mmap else None
+        for name, (dtype, length, offset) in columns.items():
+            if mmap:
+                col = np.frombuffer(buf, dtype=dtype, count=length, offset=offset)
+            else:
+                col = np.fromfile(path, dtype=dtype, count=length, offset=offset)
+            setattr(tree, name, col)
+        tree.capacity = meta['capacity']
+        tree.root = meta['root']
+        tree.size = meta['size'] if 'size' in meta else int(np.count_nonzero(tree.height))
+        tree.read_only = mmap
+        return tree
+
+    def require_writable(self):
+        # checked before anything changes (a mapped column only fails on
+        # the first write, after the heap may have grown)
+        if self.read_only:
+            raise RuntimeError("Tree is memory-mapped read-only, load it with mmap=False to modify it")
+
+    # FREEZE
+
+    def freeze(self):
+        # immutable Eytzinger snapshot (tree_frozen.FrozenTree) without the
+        # holes, O(n) in-order walk
+        idx = np.fromiter(self.range_nodes(), dtype=np.int64)
+        return tree_frozen.FrozenTree(self.tree[idx], None if self.values is None else self.values[idx])
+
+    # BATCH INSERT / DELETE
+    # Subtrees cannot be re-hung without moving them, so a large batch is
+    # merged with the live keys and the heap is rebuilt in one pass,
+    # a small one goes key by key in sorted order
+
+    def insert_many(self, keys):
+        self.require_writable()
+        keys = self.unique_sorted(keys, self.key_dtype)
+        if len(keys) * self.REBUILD_FACTOR >= self.size:
+            live, values = self.sorted_items()
+            merged = np.union1d(live, keys)
+            if values is not None:
+                # new keys get the default value, live ones keep theirs
+                merged_values = np.full(len(merged), self.default, dtype=self.value_dtype)
+                merged_values[np.searchsorted(merged, live)] = values
+                values = merged_values
+            self.rebuild(merged, values)
+            return
+        for key in keys.tolist():
+            self.insert_node(key)
+
+    def delete_many(self, keys):
+        self.require_writable()
+        keys = self.unique_sorted(keys, self.key_dtype, drop=True)
+        if len(keys) * self.REBUILD_FACTOR >= self.size:
+            live, values = self.sorted_items()
+            keep = ~np.isin(live, keys, assume_unique=True)
+            self.rebuild(live[keep], None if values is None else values[keep])
+            return
+        for key in keys.tolist():
+            self.delete_node(key)
+
+    def sorted_keys(self):
+        return np.sort(self.tree[tree_pages.flatnonzero(self.height)])
+
+    def sorted_items(self):
+        # -> (sorted keys, their values or None)
+        used = tree_pages.flatnonzero(self.height)
+        order = np.argsort(self.tree[used], kind='stable')
+        keys = self.tree[used][order]
+        if self.values is None:
+            return keys, None
+        return keys, self.values[used][order]
+
+    def rebuild(self, keys, values=None):
+        fresh = self.from_sorted(keys, self.order_stats, self.key_dtype, self.value_dtype, values,
+                                 self.page_size)
+        self.tree, self.height, self.capacity = fresh.tree, fresh.height, fresh.capacity
+        self.store = fresh.store
+        self.size = fresh.size
+        self.count = fresh.count
+        self.values = fresh.values
+        self.bulk_writes += 1
+
+    def grow(self, i):
+        # add the levels needed to hold index i
+        capacity = (1 << (i + 1).bit_length()) - 1
+        if self.store is not None:
+            # only the page table grows, new pages come with their first write
+            self.store.resize(capacity)
+            self.capacity = capacity
+            return
+        tree = np.zeros(capacity, dtype=self.key_dtype)
+        height = np.zeros(capacity, dtype=np.int16)
+        tree[:self.capacity] = self.tree
+        height[:self.capacity] = self.height
+        if self.values is not None:
+            values = np.full(capacity, self.default, dtype=self.value_dtype)
+            values[:self.capacity] = self.values
+            self.values = values
+        if self.order_stats:
+            count = np.zeros(capacity, dtype=np.int32)
+            count[:self.capacity] = self.count
+            self.count = count
+        self.tree, self.height, self.capacity = tree, height, capacity
+
+    def shrink(self):
+        # drop trailing levels that hold no nodes
+        self.require_writable()
+        used = tree_pages.flatnonzero(self.height)
+        last = int(used[-1]) if len(used) else 0
+        capacity = (1 << (last + 1).bit_length()) - 1
+        if capacity < self.capacity and self.store is not None:
+            self.store.resize(capacity)
+            self.capacity = capacity
+        elif capacity < self.capacity:
+            self.tree = self.tree[:capacity].copy()
+            self.height = self.height[:capacity].copy()
+            if self.order_stats:
+                self.count = self.count[:capacity].copy()
+            if self.values is not None:
+                self.values = self.values[:capacity].copy()
+            self.capacity = capacity
+        self.bulk_writes += 1
+
     def left(self, i):
         return 2 * i + 1
 
@@ -23,14 +257,15 @@ class AVLTreeArray:
     def val(self, i):
         if i >= self.capacity:
             return None
-        v = self.tree[i]
-        return None if v == self.NIL else v
+        if self.height[i] == 0:
+            return None
+        return self.tree[i]
 
     
     # BALANS
     
     def get_height(self, i):
-        if i >= self.capacity or self.tree[i] == self.NIL:
+        if i >= self.capacity:
             return 0
         return self.height[i]
 
@@ -39,23 +274,76 @@ class AVLTreeArray:
             self.get_height(self.left(i)),
             self.get_height(self.right(i))
         )
+        if self.order_stats:
+            self.count[i] = 1 + self.get_count(self.left(i)) + self.get_count(self.right(i))
 
     def balance(self, i):
         return self.get_height(self.left(i)) - self.get_height(self.right(i))
 
 
+    # ORDER STATISTICS (needs order_stats=True)
+
+    def get_count(self, i):
+        if i >= self.capacity or self.height[i] == 0:
+            return 0
+        return int(self.count[i])
+
+    def rank(self, key):
+        # number of keys < key
+        self.require_order_stats()
+        i = self.root
+        r = 0
+        while self.val(i) is not None:
+            if key <= self.tree[i]:
+                i = self.left(i)
+            else:
+                r += self.get_count(self.left(i)) + 1
+                i = self.right(i)
+        return r
+
+    def select(self, k):
+        # k-th smallest key, 0-based
+        self.require_order_stats()
+        if k < 0 or k >= self.get_count(self.root):
+            raise IndexError("select index out of range")
+        i = self.root
+        while True:
+            lc = self.get_count(self.left(i))
+            if k < lc:
+                i = self.left(i)
+            elif k == lc:
+                return self.tree.item(i)
+            else:
+                k -= lc + 1
+                i = self.right(i)
+
+    def count_range(self, lo, hi):
+        # number of keys with lo <= key < hi
+        if hi <= lo:
+            return 0
+        return self.rank(hi) - self.rank(lo)
+
+    def require_order_stats(self):
+        if not self.order_stats:
+            raise RuntimeError("Tree was created without order_stats")
+
+
     # INSERT
 
     def insert_node(self, key):
-        self.insert(self.root, int(key))
+        self.require_writable()
+        self.insert(self.root, self.cast(key))
 
     def insert(self, i, key):
         if i >= self.capacity:
-            raise RuntimeError("Tree capacity exceeded")
+            self.grow(i)
 
-        if self.tree[i] == self.NIL:
+        if self.height[i] == 0:
             self.tree[i] = key
             self.height[i] = 1
+            if self.order_stats:
+                self.count[i] = 1
+            self.size += 1
             return i
         
         # going left
@@ -96,6 +384,7 @@ class AVLTreeArray:
     # DELETE
    
     def delete_node(self, key):
+        self.require_writable()
         self.delete(self.root, key)
 
     def delete(self, i, key):
@@ -115,31 +404,35 @@ class AVLTreeArray:
             
             if self.val(l) is None and self.val(r) is None:
                 # no children
-                self.tree[i] = self.NIL
                 self.height[i] = 0
+                if self.order_stats:
+                    self.count[i] = 0
+                if self.values is not None:
+                    self.values[i] = self.default
+                self.size -= 1
                 return i
 
             elif self.val(l) is None:
                 # only right children
                 succ = self.min_node(r)
-                self.tree[i] = self.tree[succ]
+                self.move_item(succ, i)
                 self.delete(r, self.tree[succ])
 
             elif self.val(r) is None:
 
                 #only left children
                 pred = self.max_node(l)
-                self.tree[i] = self.tree[pred]
+                self.move_item(pred, i)
                 self.delete(l, self.tree[pred])
 
             else:
                 # node with 2 childrens
                 # PREDECESSOR
                 temp = self.max_node(l)           
-                self.tree[i] = self.tree[temp]    
+                self.move_item(temp, i)
                 self.delete(l, self.tree[temp])   
 
-        if self.tree[i] == self.NIL:
+        if self.height[i] == 0:
             return i
 
         # Update height
@@ -168,6 +461,11 @@ class AVLTreeArray:
 
         return i
 
+    def move_item(self, src, dst):
+        self.tree[dst] = self.tree[src]
+        if self.values is not None:
+            self.values[dst] = self.values[src]
+
     def min_node(self, i):
 
         while self.val(self.left(i)) is not None:
@@ -186,84 +484,118 @@ class AVLTreeArray:
 
 
     # Rotate 
+    # Subtrees A, B, C keep their shape and are relocated level by level,
+    # only the two pivot nodes get new heights (and counts)
 
     def rotate_left(self, i):
-
-        subtree = self.extract(i)
-
-        rotated = self.logic_rotate_left(subtree)
-
-        self.clear(i)
-
-        self.write(rotated, i)
-
+        #    x              y
+        #   / \            / \
+        #  A   y    ->    x   C
+        #     / \        / \
+        #    B   C      A   B
+        l = self.left(i)
+        r = self.right(i)
+
+        x_key = self.tree[i]
+        y_key = self.tree[r]
+        if self.values is not None:
+            x_val = self.values[i]
+            y_val = self.values[r]
+
+        a = self.take_subtree(l)
+        b = self.take_subtree(self.left(r))
+        c = self.take_subtree(self.right(r))
+        self.height[r] = 0
+
+        self.put_subtree(a, self.left(l))
+        self.put_subtree(b, self.right(l))
+        self.put_subtree(c, r)
+
+        self.tree[l] = x_key
+        self.update_height(l)
+        self.tree[i] = y_key
+        self.update_height(i)
+        if self.values is not None:
+            self.values[l] = x_val
+            self.values[i] = y_val
         return i
 
     def rotate_right(self, i):
-
-        subtree = self.extract(i) # tuple
-
-
-        rotated = self.logic_rotate_right(subtree) #new tuple
-
-
-        self.clear(i)
-
-
-        self.write(rotated, i)
-        return i
-
-
-    # EXTRACT / CLEAR / WRITE
-
-    def extract(self, i):
-        # Recursively extract the subtree rooted at index i
-        if self.val(i) is None:
-            return None
-        # start - where balance is incorected
-        # (Parent, LeftChild, RightChild)
-        return (
-            self.tree[i],
-            self.extract(self.left(i)),
-            self.extract(self.right(i))
-        )
-
-    def clear(self, i):
-         # Recursively clear the subtree rooted at index i
-        if self.val(i) is None:
-            return
-        self.tree[i] = self.NIL
-        self.height[i] = 0
-        self.clear(self.left(i))
-        self.clear(self.right(i))
-
-    def write(self, node, i):
-        # Recursively write a subtree 
-        # back into the array using complete binary tree indexing
-        if node is None:
-            return
-        if i >= self.capacity:
-            raise RuntimeError("Rotation overflow")
-
-        self.tree[i] = node[0]
-        self.write(node[1], self.left(i))
-        self.write(node[2], self.right(i))
+        #      x            y
+        #     / \          / \
+        #    y   C   ->   A   x
+        #   / \              / \
+        #  A   B            B   C
+        l = self.left(i)
+        r = self.right(i)
+        if r >= self.capacity:
+            self.grow(r)
+
+        x_key = self.tree[i]
+        y_key = self.tree[l]
+        if self.values is not None:
+            x_val = self.values[i]
+            y_val = self.values[l]
+
+        a = self.take_subtree(self.left(l))
+        b = self.take_subtree(self.right(l))
+        c = self.take_subtree(r)
+        self.height[l] = 0
+
+        self.put_subtree(c, self.right(r))
+        self.put_subtree(b, self.left(r))
+        self.put_subtree(a, l)
+
+        self.tree[r] = x_key
+        self.update_height(r)
+        self.tree[i] = y_key
         self.update_height(i)
+        if self.values is not None:
+            self.values[r] = x_val
+            self.values[i] = y_val
+        return i
 
 
-
-    # LOGIC ROTATIONS 
-    # y = (VAL, LEFT, RIGHT)
-    def logic_rotate_right(self, y):
-        x = y[1]
-        z = x[2]
-        return (x[0], x[1], (y[0], z, y[2]))
-
-    def logic_rotate_left(self, x):
-        y = x[2]
-        z = y[1]
-        return (y[0], (x[0], x[1], z), y[2])
-            #new root  new left child   #new right child
+    # SUBTREE RELOCATION
+
+    def level_slice(self, i, d):
+        # nodes d levels below i are one contiguous run of 2**d slots
+        lo = ((i + 1) << d) - 1
+        return lo, lo + (1 << d)
+
+    def take_subtree(self, i):
+        # Copy out the subtree rooted at index i (one slice per level)
+        # and clear its slots
+        levels = []
+        for d in range(int(self.get_height(i))):
+            lo, hi = self.level_slice(i, d)
+            counts = self.count[lo:hi].copy() if self.order_stats else None
+            values = self.values[lo:hi].copy() if self.values is not None else None
+            levels.append((self.tree[lo:hi].copy(), self.height[lo:hi].copy(), counts, values))
+            self.height[lo:hi] = 0
+            if self.order_stats:
+                self.count[lo:hi] = 0
+            if self.values is not None:
+                self.values[lo:hi] = self.default
+        return levels
+
+    def put_subtree(self, levels, i):
+        # Write levels taken by take_subtree back with their root at index i,
+        # stored heights stay valid because the shape does not change
+        for d, (keys, heights, counts, values) in enumerate(levels):
+            lo, _ = self.level_slice(i, d)
+            n = min(len(keys), max(self.capacity - lo, 0))
+            if n < len(keys):
+                used = np.flatnonzero(heights[n:])
+                if len(used):
+                    self.grow(lo + n + int(used[-1]))
+                    n = len(keys)
+            self.height[lo:lo + n] = heights[:n]
+            self.tree[lo:lo + n] = keys[:n]
+            if self.order_stats:
+                self.count[lo:lo + n] = counts[:n]
+            if self.values is not None:
+                self.values[lo:lo + n] = values[:n]
 
 
 
@@ -272,16 +604,193 @@ class AVLTreeArray:
     def search_node(self, key):
         return self.search(self.root, key)
 
+    def path_length(self, key):
+        # nodes a search for key visits
+        n = 0
+        i = self.root
+        while self.val(i) is not None:
+            n += 1
+            if key == self.tree[i]:
+                break
+            i = self.left(i) if key < self.tree[i] else self.right(i)
+        return n
+
     def search(self, i, key):
-        if i >= self.capacity or self.tree[i] == self.NIL:
+        if i >= self.capacity or self.height[i] == 0:
             return -1
-        if self.tree[i] == key:
+        if key == self.tree[i]:
             return i
         if key < self.tree[i]:
             return self.search(self.left(i), key)
         return self.search(self.right(i), key)
 
+    # BATCH SEARCH
+    # All queries descend together, one level per step: gather the keys of
+    # the current slots, compare, go to 2i + 1 or 2i + 2. Queries that hit
+    # or reach an empty slot are dropped, at most height[root] steps.
+
+    def search_many(self, queries):
+        # -> slot of each query's node, -1 if missing
+        queries = np.asarray(queries)
+        out = np.full(len(queries), -1, dtype=np.int64)
+        pending = np.arange(len(queries))
+        i = np.full(len(queries), self.root, dtype=np.int64)
+        while len(pending):
+            live = i < self.capacity
+            live[live] = self.height[i[live]] != 0
+            pending, i = pending[live], i[live]
+            k = self.tree[i]
+            q = queries[pending]
+            hit = q == k
+            out[pending[hit]] = i[hit]
+            i = 2 * i + 1 + (q > k)
+            pending, i = pending[~hit], i[~hit]
+        return out
+
+    # FINGER SEARCH
+    # Resumes from the slot the previous finger_search ended on; the parent
+    # of i is (i - 1) // 2, so climbing needs no saved path. It climbs only
+    # until that subtree must hold the key, O(log d) for a key d ranks away.
+    # Any live slot is a valid start, writes in between need no care.
+
+    def finger_search(self, key):
+        i = self.finger_start(key)
+        tree, height, capacity = self.tree, self.height, self.capacity
+        while i < capacity and height[i] != 0:
+            self.finger = i
+            k = tree[i]
+            if key == k:
+                return i
+            i = 2 * i + 1 if key < k else 2 * i + 2
+        return -1
+
+    def finger_start(self, key):
+        tree = self.tree
+        c = self.finger
+        if c >= self.capacity or self.height[c] == 0:
+            return self.root
+        k = tree[c]
+        if key == k:
+            return c
+        going_right = key > k
+        while c != self.root:
+            p = (c - 1) // 2
+            if c % 2:
+                # left child: c's keys lie between the finger and p
+                if going_right and key < tree[p]:
+                    return c
+            elif not going_right and key > tree[p]:
+                return c
+            c = p
+            if key == tree[c]:
+                return c
+        return c
+
+
+    # MAP (needs value_dtype)
+
+    def get(self, key, default=None):
+        self.require_values()
+        i = self.search_node(key)
+        return default if i == -1 else self.values.item(i)
+
+    def put(self, key, value):
+        self.require_values()
+        self.require_writable()
+        i = self.search_node(key)
+        if i == -1:
+            self.insert_node(key)
+            i = self.search_node(key)
+        self.values[i] = value
+
+    def pop(self, key, *default):
+        self.require_values()
+        self.require_writable()
+        i = self.search_node(key)
+        if i == -1:
+            if default:
+                return default[0]
+            raise KeyError(key)
+        value = self.values.item(i)
+        self.delete_node(key)
+        return value
+
+    def items(self, lo=None, hi=None):
+        # (key, value) pairs with lo <= key < hi in key order
+        self.require_values()
+        for i in self.range_nodes(lo, hi):
+            yield self.tree.item(i), self.values.item(i)
+
+    def require_values(self):
+        if self.values is None:
+            raise RuntimeError("Tree was created without value_dtype")
+
     
+    # TRAVERSAL
+    # Generators with an explicit stack: only the pending part of one
+    # root-to-leaf path is held, range() seeks to lo in O(log n)
+
+    def __iter__(self):
+        return self.range()
+
+    def __reversed__(self):
+        stack = []
+        i = self.root
+        while stack or self.val(i) is not None:
+            while self.val(i) is not None:
+                stack.append(i)
+                i = self.right(i)
+            i = stack.pop()
+            yield self.tree.item(i)
+            i = self.left(i)
+
+    def range(self, lo=None, hi=None):
+        # keys with lo <= key < hi in order, None means unbounded
+        return map(self.tree.item, self.range_nodes(lo, hi))
+
+    def range_nodes(self, lo=None, hi=None):
+        stack = []
+        i = self.root
+        while self.val(i) is not None:
+            if lo is None or self.tree[i] >= lo:
+                stack.append(i)
+                i = self.left(i)
+            else:
+                i = self.right(i)
+        while stack:
+            i = stack.pop()
+            if hi is not None and self.tree[i] >= hi:
+                return
+            yield i
+            i = self.right(i)
+            while self.val(i) is not None:
+                stack.append(i)
+                i = self.left(i)
+
+    def iter_chunks(self, chunk_size=4096, lo=None, hi=None):
+        # same keys as range(), as NumPy arrays of up to chunk_size keys
+        keys = self.range(lo, hi)
+        while True:
+            chunk = np.fromiter(islice(keys, chunk_size), dtype=self.tree.dtype)
+            if not len(chunk):
+                return
+            yield chunk
+
+    # MEMORY
+
+    def memory_footprint(self):
+        # exact bytes of the columns; empty slots inside the heap (holes
+        # under short subtrees) and in unused levels are slack
+        size = self.size
+        columns = (self.tree, self.height, self.count, self.values)
+        row = (tree_columns.item_bytes(self.key_dtype) + tree_columns.item_bytes(self.value_dtype)
+               + sum(c.itemsize for c in (self.height, self.count) if c is not None))
+        objects = tree_columns.object_bytes(self.values, self.value_dtype)
+        total = sum(tree_columns.column_bytes(c) for c in columns) + objects
+        payload = size * (tree_columns.item_bytes(self.key_dtype)
+                          + tree_columns.item_bytes(self.value_dtype)) + objects
+        return tree_columns.footprint(size, total, size * row + objects, payload)
+
     # VISUALIZATION
    
     def visualize(self, filename=None):
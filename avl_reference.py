@@ -1,7 +1,13 @@
 
+from bisect import bisect_left
 import graphviz
 import io               
+import sys
+import numpy as np
 from PIL import Image
+import tree_columns
+import tree_frozen
+import tree_parallel
 
 class Node:
     def __init__(self, key):
@@ -10,20 +16,440 @@ class Node:
         self.right = None
         self.height = 1
 
+class SlotNode:
+    # same fields as Node, no per-instance __dict__
+    __slots__ = ('key', 'left', 'right', 'height')
+
+    def __init__(self, key):
+        self.key = key
+        self.left = None
+        self.right = None
+        self.height = 1
+
+# node types with the subtree size, only used with order_stats
+
+class CountedNode(Node):
+    def __init__(self, key):
+        self.key = key
+        self.left = None
+        self.right = None
+        self.height = 1
+        self.count = 1
+
+class CountedSlotNode(SlotNode):
+    __slots__ = ('count',)
+
+    def __init__(self, key):
+        self.key = key
+        self.left = None
+        self.right = None
+        self.height = 1
+        self.count = 1
+
+# (compact, order_stats) -> node type
+NODE_TYPES = {
+    (False, False): Node,
+    (True, False): SlotNode,
+    (False, True): CountedNode,
+    (True, True): CountedSlotNode,
+}
+
 class AVLTree:
-    def __init__(self):
+    # batches at least size/JOIN_FACTOR keys long go through insert_range /
+    # delete_range, shorter ones key by key
+    JOIN_FACTOR = 12
+
+    def __init__(self, compact=False, order_stats=False, persistent=False):
         self.root = None
+        self.compact = compact
+        self.node_type = NODE_TYPES[bool(compact), bool(order_stats)]
+        self.order_stats = order_stats
+        self.persistent = persistent
+        # batch, split / join and set operations (tree_cache clears on a change)
+        self.bulk_writes = 0
         print("init tree")
 
+    def node_size(self):
+        # bytes of one node object, including its __dict__ if it has one
+        node = self.node_type(0)
+        size = sys.getsizeof(node)
+        if hasattr(node, '__dict__'):
+            size += sys.getsizeof(node.__dict__)
+        return size
+
+    # BULK LOAD
+
+    @classmethod
+    def from_iterable(cls, keys, compact=False, order_stats=False, persistent=False):
+        return cls.from_sorted(cls.unique_sorted(keys), compact, order_stats, persistent)
+
+    @staticmethod
+    def unique_sorted(keys):
+        if isinstance(keys, np.ndarray):
+            return np.unique(keys).tolist()
+        return sorted(set(keys))
+
+    @classmethod
+    def from_sorted(cls, keys, compact=False, order_stats=False, persistent=False):
+        # keys must be strictly increasing, O(n) perfectly balanced build
+        if isinstance(keys, np.ndarray):
+            keys = keys.tolist()
+        else:
+            keys = list(keys)
+        tree = cls(compact, order_stats, persistent)
+        tree.root = tree.build(keys, 0, len(keys))
+        return tree
+
+    def build(self, keys, lo, hi):
+        if lo >= hi:
+            return None
+        mid = (lo + hi) // 2
+        node = self.node_type(keys[mid])
+        node.left = self.build(keys, lo, mid)
+        node.right = self.build(keys, mid + 1, hi)
+        # midpoint split: a subtree of n keys is n.bit_length() high
+        node.height = (hi - lo).bit_length()
+        if self.order_stats:
+            node.count = hi - lo
+        return node
+
+
+    # FREEZE
+
+    def freeze(self, key_dtype=np.int64):
+        # immutable Eytzinger snapshot (tree_frozen.FrozenTree), the keys
+        # are stored as key_dtype
+        return tree_frozen.FrozenTree(np.fromiter(self, dtype=key_dtype))
+
+    # BATCH INSERT / DELETE
+    # The sorted batch is split around each node and both halves go down
+    # at once, touched nodes are re-joined (and rebalanced) on the way up
+
+    def insert_many(self, keys):
+        keys = self.unique_sorted(keys)
+        if self.persistent or not self.joins_pay_off(len(keys)):
+            # persistent: joins relink nodes in place, go key by key instead
+            for key in keys:
+                self.insert_node(key)
+            return
+        self.root = self.insert_range(self.root, keys, 0, len(keys))
+        self.bulk_writes += 1
+
+    def delete_many(self, keys):
+        keys = self.unique_sorted(keys)
+        if self.persistent or not self.joins_pay_off(len(keys)):
+            for key in keys:
+                self.delete_node(key)
+            return
+        self.root = self.delete_range(self.root, keys, 0, len(keys))
+        self.bulk_writes += 1
+
+    def joins_pay_off(self, n):
+        # the join path recomputes every node it visits, for a short batch
+        # that costs more than the per-key walks. There is no size counter:
+        # the levels down to the shallowest leaf are full and none exist
+        # below the height, the middle of 2**shallow and 2**height is within
+        # about 2x of the size
+        shallow = 0
+        node = self.root
+        while node is not None:
+            shallow += 1
+            node = node.left if self.get_height(node.left) <= self.get_height(node.right) else node.right
+        return n * self.JOIN_FACTOR >= 1 << ((shallow + self.get_height(self.root)) // 2)
+
+    def insert_range(self, node, keys, lo, hi):
+        if lo >= hi:
+            return node
+        if node is None:
+            return self.build(keys, lo, hi)
+        i = bisect_left(keys, node.key, lo, hi)
+        j = i + 1 if i < hi and keys[i] == node.key else i
+        # a side without keys is left as it is, no call
+        l = self.insert_range(node.left, keys, lo, i) if i > lo else node.left
+        r = self.insert_range(node.right, keys, j, hi) if j < hi else node.right
+        return self.join_nodes(l, node, r)
+
+    def delete_range(self, node, keys, lo, hi):
+        if node is None or lo >= hi:
+            return node
+        i = bisect_left(keys, node.key, lo, hi)
+        found = i < hi and keys[i] == node.key
+        j = i + 1 if found else i
+        l = self.delete_range(node.left, keys, lo, i) if i > lo else node.left
+        r = self.delete_range(node.right, keys, j, hi) if j < hi else node.right
+        if found:
+            return self.join2(l, r)
+        return self.join_nodes(l, node, r)
+
+    # JOIN
+    # every key in l < node.key < every key in r, heights may differ by any amount
+
+    def join_nodes(self, l, node, r):
+        hl = self.get_height(l)
+        hr = self.get_height(r)
+        if hl > hr + 1:
+            return self.join_right(l, node, r)
+        if hr > hl + 1:
+            return self.join_left(l, node, r)
+        node.left = l
+        node.right = r
+        node.height = 1 + max(hl, hr)
+        if self.order_stats:
+            self.update_count(node)
+        return node
+
+    def join_right(self, l, node, r):
+        # walk down the right spine of the taller l
+        c = l.right
+        if self.get_height(c) <= self.get_height(r) + 1:
+            node.left = c
+            node.right = r
+            node.height = 1 + max(self.get_height(c), self.get_height(r))
+            if self.order_stats:
+                self.update_count(node)
+            if node.height <= self.get_height(l.left) + 1:
+                l.right = node
+                l.height = 1 + max(self.get_height(l.left), node.height)
+                if self.order_stats:
+                    self.update_count(l)
+                return l
+            l.right = self.r_rotate(node)
+            return self.l_rotate(l)
+
+        t = self.join_right(c, node, r)
+        l.right = t
+        if t.height <= self.get_height(l.left) + 1:
+            l.height = 1 + max(self.get_height(l.left), t.height)
+            if self.order_stats:
+                self.update_count(l)
+            return l
+        return self.l_rotate(l)
+
+    def join_left(self, l, node, r):
+        # mirror of join_right
+        c = r.left
+        if self.get_height(c) <= self.get_height(l) + 1:
+            node.left = l
+            node.right = c
+            node.height = 1 + max(self.get_height(l), self.get_height(c))
+            if self.order_stats:
+                self.update_count(node)
+            if node.height <= self.get_height(r.right) + 1:
+                r.left = node
+                r.height = 1 + max(node.height, self.get_height(r.right))
+                if self.order_stats:
+                    self.update_count(r)
+                return r
+            r.left = self.l_rotate(node)
+            return self.r_rotate(r)
+
+        t = self.join_left(l, node, c)
+        r.left = t
+        if t.height <= self.get_height(r.right) + 1:
+            r.height = 1 + max(t.height, self.get_height(r.right))
+            if self.order_stats:
+                self.update_count(r)
+            return r
+        return self.r_rotate(r)
+
+    def join2(self, l, r):
+        # join without a middle key: the maximum of l takes its place
+        if l is None:
+            return r
+        l, last = self.split_last(l)
+        return self.join_nodes(l, last, r)
+
+    def split_last(self, node):
+        if node.right is None:
+            return node.left, node
+        r, last = self.split_last(node.right)
+        return self.join_nodes(node.left, node, r), last
+
+    # SPLIT / JOIN TREES
+    # Whole-tree versions of the node joins above, both run in O(log n)
+
+    @classmethod
+    def join(cls, left, key, right):
+        # all keys of left < key < all keys of right, key=None just
+        # concatenates; left and right are consumed
+        left.require_mutable()
+        right.require_mutable()
+        if key is None:
+            left.root = left.join2(left.root, right.root)
+        else:
+            left.root = left.join_nodes(left.root, left.node_type(key), right.root)
+        right.root = None
+        left.bulk_writes += 1
+        right.bulk_writes += 1
+        return left
+
+    def split(self, key):
+        # -> (tree of keys < key, key was present, tree of keys > key),
+        # this tree is left empty
+        self.require_mutable()
+        l, found, r = self.split_node(self.root, key)
+        self.root = None
+        self.bulk_writes += 1
+        return self.empty_like(l), found is not None, self.empty_like(r)
+
+    def split_node(self, node, key):
+        # -> (subtree < key, node holding key or None, subtree > key)
+        if node is None:
+            return None, None, None
+        if key == node.key:
+            return node.left, node, node.right
+        if key < node.key:
+            l, found, r = self.split_node(node.left, key)
+            return l, found, self.join_nodes(r, node, node.right)
+        l, found, r = self.split_node(node.right, key)
+        return self.join_nodes(node.left, node, l), found, r
+
+    def empty_like(self, root=None):
+        tree = self.__class__(self.compact, self.order_stats)
+        tree.root = root
+        return tree
+
+    def take_over(self, other):
+        self.root = other.root
+        other.root = None
+        self.bulk_writes += 1
+        other.bulk_writes += 1
+
+    def require_mutable(self):
+        if self.persistent:
+            raise RuntimeError("split/join and set operations relink nodes in place, "
+                               "not supported on persistent trees")
+
+    # SET ALGEBRA
+    # This tree becomes the result and other is left untouched, only the
+    # nodes of other that end up in the result are copied.
+    # The recursion follows other (m keys) and splits this tree (n keys)
+    # at each of its keys: O(m log(n/m + 1)).
+    # workers > 1 runs independent key ranges in a process pool.
+
+    def union(self, other, workers=None):
+        self.require_mutable()
+        if workers and workers > 1:
+            return tree_parallel.parallel_set_op(self, other, 'union', workers)
+        self.root = self.union_nodes(self.root, other.root)
+        self.bulk_writes += 1
+        return self
+
+    def intersection(self, other, workers=None):
+        self.require_mutable()
+        if workers and workers > 1:
+            return tree_parallel.parallel_set_op(self, other, 'intersection', workers)
+        self.root = self.intersection_nodes(self.root, other.root)
+        self.bulk_writes += 1
+        return self
+
+    def difference(self, other, workers=None):
+        self.require_mutable()
+        if workers and workers > 1:
+            return tree_parallel.parallel_set_op(self, other, 'difference', workers)
+        self.root = self.difference_nodes(self.root, other.root)
+        self.bulk_writes += 1
+        return self
+
+    def union_nodes(self, a, b):
+        if b is None:
+            return a
+        if a is None:
+            return self.copy_subtree(b)
+        l, found, r = self.split_node(a, b.key)
+        mid = found if found is not None else self.node_type(b.key)
+        return self.join_nodes(self.union_nodes(l, b.left), mid, self.union_nodes(r, b.right))
+
+    def intersection_nodes(self, a, b):
+        if a is None or b is None:
+            return None
+        l, found, r = self.split_node(a, b.key)
+        l = self.intersection_nodes(l, b.left)
+        r = self.intersection_nodes(r, b.right)
+        if found is not None:
+            return self.join_nodes(l, found, r)
+        return self.join2(l, r)
+
+    def difference_nodes(self, a, b):
+        if a is None or b is None:
+            return a
+        l, found, r = self.split_node(a, b.key)
+        return self.join2(self.difference_nodes(l, b.left), self.difference_nodes(r, b.right))
+
+    def copy_subtree(self, b):
+        if b is None:
+            return None
+        node = self.node_type(b.key)
+        node.left = self.copy_subtree(b.left)
+        node.right = self.copy_subtree(b.right)
+        node.height = b.height
+        if self.order_stats:
+            self.update_count(node)
+        return node
+
+    # Iterative entry points: walk down with an explicit path stack and
+    # retrace only while the subtree height keeps changing
 
     def insert_node(self,key):
-        self.root = self.insert(self.root, key)
+        if self.persistent:
+            if self.search_node(key) is not None:
+                print(f"Duplicate: {key} already exists")
+                return
+            self.root = self.p_insert(self.root, key)
+            return
+
+        node = self.root
+        if node is None:
+            self.root = self.node_type(key)
+            return
+
+        path = []
+        while node is not None:
+            path.append(node)
+            if key < node.key:
+                node = node.left
+            elif key > node.key:
+                node = node.right
+            else:
+                print(f"Duplicate: {key} already exists at node {node.key}")
+                return
+
+        parent = path[-1]
+        if key < parent.key:
+            parent.left = self.node_type(key)
+        else:
+            parent.right = self.node_type(key)
+        if self.order_stats:
+            # every subtree on the path gained one node
+            for node in path:
+                node.count += 1
+
+        # returns the number of heights the retrace rewrote (rotations not
+        # included), tree_stats adds them to its height_updates
+        for idx in range(len(path) - 1, -1, -1):
+            node = path[idx]
+            l = node.left
+            r = node.right
+            hl = l.height if l is not None else 0
+            hr = r.height if r is not None else 0
+            h = 1 + (hl if hl > hr else hr)
+            if h == node.height:
+                # height unchanged, nothing above can change
+                return len(path) - 1 - idx
+            node.height = h
+
+            balance = hl - hr
+            if balance > 1 or balance < -1:
+                # one rotation restores the height before the insert
+                self.replace_child(path, idx, self.rebalance(node, balance))
+                return len(path) - idx
+        return len(path)
 
     def insert(self, node, key):
             
         if not node:
             #print(f"Inserting {key} node")
-            return Node(key)
+            return self.node_type(key)
         elif key < node.key:
             #print(f"{key} < {node.key}, going left from node {node.key}")
             node.left = self.insert(node.left,key)
@@ -35,6 +461,8 @@ class AVLTree:
             return node
         
         node.height = 1 + max(self.get_height(node.left), self.get_height(node.right))
+        if self.order_stats:
+            self.update_count(node)
 
         balance = self.check_balance(node)
 
@@ -62,7 +490,92 @@ class AVLTree:
     
 
     def delete_node(self, key):
-        self.root = self.delete(self.root, key)
+        if self.persistent:
+            if self.search_node(key) is not None:
+                self.root = self.p_delete(self.root, key)
+            return
+
+        node = self.root
+        path = []
+        while node is not None and node.key != key:
+            path.append(node)
+            node = node.left if key < node.key else node.right
+        if node is None:
+            return
+
+        if node.left is not None and node.right is not None:
+            #PREDECESSOR
+            path.append(node)
+            pred = node.left
+            while pred.right is not None:
+                path.append(pred)
+                pred = pred.right
+            node.key = pred.key
+            node = pred
+
+        # node has at most one child now
+        child = node.left if node.left is not None else node.right
+        self.replace_child(path, len(path), child, node)
+        if self.order_stats:
+            for node in path:
+                node.count -= 1
+
+        # returns the number of heights the retrace rewrote, like insert_node
+        rebalanced = 0
+        for idx in range(len(path) - 1, -1, -1):
+            node = path[idx]
+            old_height = node.height
+            l = node.left
+            r = node.right
+            hl = l.height if l is not None else 0
+            hr = r.height if r is not None else 0
+
+            balance = hl - hr
+            if balance > 1 or balance < -1:
+                node = self.rebalance(node, balance)
+                self.replace_child(path, idx, node)
+                h = node.height
+                rebalanced += 1
+            else:
+                h = 1 + (hl if hl > hr else hr)
+                node.height = h
+
+            if h == old_height:
+                return len(path) - idx - rebalanced
+        return len(path) - rebalanced
+
+    def replace_child(self, path, idx, new, old=None):
+        # hang `new` where path[idx] (or `old`) was attached
+        if old is None:
+            old = path[idx]
+        if idx == 0:
+            self.root = new
+            return
+        parent = path[idx - 1]
+        if parent.left is old:
+            parent.left = new
+        else:
+            parent.right = new
+
+    def rebalance(self, node, balance):
+        if balance > 1:
+            l = node.left
+            ll = l.left.height if l.left is not None else 0
+            lr = l.right.height if l.right is not None else 0
+            # Left Right
+            if ll < lr:
+                node.left = self.l_rotate(l)
+            # Left Left
+            return self.r_rotate(node)
+
+        r = node.right
+        rl = r.left.height if r.left is not None else 0
+        rr = r.right.height if r.right is not None else 0
+        # Right Left
+        if rr < rl:
+            node.right = self.r_rotate(r)
+        # Right Right
+        return self.l_rotate(node)
 
     def delete(self, node, key):
         if not node:
@@ -96,6 +609,8 @@ class AVLTree:
 
         #  Update height
         node.height = 1 + max(self.get_height(node.left), self.get_height(node.right))
+        if self.order_stats:
+            self.update_count(node)
 
         #  Balance
         balance = self.check_balance(node)
@@ -133,9 +648,26 @@ class AVLTree:
         return current
 
     def search_node(self, key):
-        return self.search(self.root, key)
+        node = self.root
+        while node is not None:
+            k = node.key
+            if key == k:
+                return node
+            node = node.left if key < k else node.right
+        return None
     
 
+    def path_length(self, key):
+        # nodes a search for key visits
+        n = 0
+        node = self.root
+        while node is not None:
+            n += 1
+            if key == node.key:
+                break
+            node = node.left if key < node.key else node.right
+        return n
+
     def search(self, node, key):
         if node is None or node.key == key:
             return node
@@ -144,6 +676,138 @@ class AVLTree:
         return self.search(node.right, key)
     
     
+    # PERSISTENT MODE
+    # Writers copy every node on the modified path (and the nodes a rotation
+    # relinks) instead of changing them, so old roots stay valid and a
+    # snapshot is just the current root
+
+    def snapshot(self):
+        if not self.persistent:
+            raise RuntimeError("Tree was created without persistent")
+        return AVLSnapshot(self.root, self.order_stats)
+
+    def copy_node(self, node):
+        new = self.node_type(node.key)
+        new.left = node.left
+        new.right = node.right
+        new.height = node.height
+        if self.order_stats:
+            new.count = node.count
+        return new
+
+    def p_insert(self, node, key):
+        if node is None:
+            return self.node_type(key)
+        node = self.copy_node(node)
+        if key < node.key:
+            node.left = self.p_insert(node.left, key)
+        else:
+            node.right = self.p_insert(node.right, key)
+        return self.p_rebalance(node)
+
+    def p_delete(self, node, key):
+        # key must be present
+        if key == node.key:
+            if node.left is None:
+                return node.right
+            if node.right is None:
+                return node.left
+            node = self.copy_node(node)
+            #PREDECESSOR
+            temp = self.get_max_value_node(node.left)
+            node.key = temp.key
+            node.left = self.p_delete(node.left, temp.key)
+        else:
+            node = self.copy_node(node)
+            if key < node.key:
+                node.left = self.p_delete(node.left, key)
+            else:
+                node.right = self.p_delete(node.right, key)
+        return self.p_rebalance(node)
+
+    def p_rebalance(self, node):
+        # node is already a private copy, children may still be shared
+        node.height = 1 + max(self.get_height(node.left), self.get_height(node.right))
+        if self.order_stats:
+            self.update_count(node)
+        balance = self.check_balance(node)
+
+        if balance > 1:
+            node.left = self.copy_node(node.left)
+            # Left Right
+            if self.check_balance(node.left) < 0:
+                node.left.right = self.copy_node(node.left.right)
+                node.left = self.l_rotate(node.left)
+            return self.r_rotate(node)
+
+        if balance < -1:
+            node.right = self.copy_node(node.right)
+            # Right Left
+            if self.check_balance(node.right) > 0:
+                node.right.left = self.copy_node(node.right.left)
+                node.right = self.r_rotate(node.right)
+            return self.l_rotate(node)
+
+        return node
+
+    # MEMORY
+
+    def memory_footprint(self):
+        # every node is its own allocation, so there is no slack; the key
+        # objects are the payload (shared small ints are counted too).
+        # Persistent trees: only nodes reachable from the current root
+        size = 0
+        payload = 0
+        stack = [self.root] if self.root is not None else []
+        while stack:
+            node = stack.pop()
+            size += 1
+            payload += sys.getsizeof(node.key)
+            for child in (node.left, node.right):
+                if child is not None:
+                    stack.append(child)
+        live = size * self.node_size() + payload
+        return tree_columns.footprint(size, live, live, payload)
+
+    # TRAVERSAL
+    # Generators with an explicit stack: only the pending part of one
+    # root-to-leaf path is held, range() seeks to lo in O(log n)
+
+    def __iter__(self):
+        return self.range()
+
+    def __reversed__(self):
+        stack = []
+        node = self.root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.right
+            node = stack.pop()
+            yield node.key
+            node = node.left
+
+    def range(self, lo=None, hi=None):
+        # keys with lo <= key < hi in order, None means unbounded
+        stack = []
+        node = self.root
+        while node is not None:
+            if lo is None or node.key >= lo:
+                stack.append(node)
+                node = node.left
+            else:
+                node = node.right
+        while stack:
+            node = stack.pop()
+            if hi is not None and node.key >= hi:
+                return
+            yield node.key
+            node = node.right
+            while node is not None:
+                stack.append(node)
+                node = node.left
+
+
     def r_rotate(self,x):
         y = x.left
         z = y.right
@@ -154,6 +818,9 @@ class AVLTree:
 
         x.height = 1 + max(self.get_height(x.left), self.get_height(x.right))
         y.height = 1 + max(self.get_height(y.left), self.get_height(y.right))
+        if self.order_stats:
+            self.update_count(x)
+            self.update_count(y)
 
         return y
     
@@ -167,6 +834,9 @@ class AVLTree:
 
          x.height = 1 + max(self.get_height(x.left), self.get_height(x.right))
          y.height = 1 + max(self.get_height(y.left), self.get_height(y.right))
+         if self.order_stats:
+             self.update_count(x)
+             self.update_count(y)
 
          return y
 
@@ -175,6 +845,55 @@ class AVLTree:
             return 0
         return node.height
 
+    # ORDER STATISTICS (needs order_stats=True)
+
+    def get_count(self, node):
+        if not node:
+            return 0
+        return node.count
+
+    def update_count(self, node):
+        node.count = 1 + self.get_count(node.left) + self.get_count(node.right)
+
+    def rank(self, key):
+        # number of keys < key
+        self.require_order_stats()
+        node = self.root
+        r = 0
+        while node is not None:
+            if key <= node.key:
+                node = node.left
+            else:
+                r += self.get_count(node.left) + 1
+                node = node.right
+        return r
+
+    def select(self, k):
+        # k-th smallest key, 0-based
+        self.require_order_stats()
+        if k < 0 or k >= self.get_count(self.root):
+            raise IndexError("select index out of range")
+        node = self.root
+        while True:
+            lc = self.get_count(node.left)
+            if k < lc:
+                node = node.left
+            elif k == lc:
+                return node.key
+            else:
+                k -= lc + 1
+                node = node.right
+
+    def count_range(self, lo, hi):
+        # number of keys with lo <= key < hi
+        if hi <= lo:
+            return 0
+        return self.rank(hi) - self.rank(lo)
+
+    def require_order_stats(self):
+        if not self.order_stats:
+            raise RuntimeError("Tree was created without order_stats")
+
     def check_balance(self, node):
         if not node:
             return 0
@@ -214,3 +933,23 @@ class AVLTree:
     
 
     
+
+
+class AVLSnapshot:
+    # Read-only view of a persistent AVLTree, shares nodes with the tree
+    __slots__ = ('root', 'order_stats')
+
+    def __init__(self, root, order_stats=False):
+        self.root = root
+        self.order_stats = order_stats
+
+    search_node = AVLTree.search_node
+    __iter__ = AVLTree.__iter__
+    __reversed__ = AVLTree.__reversed__
+    range = AVLTree.range
+
+    get_count = AVLTree.get_count
+    rank = AVLTree.rank
+    select = AVLTree.select
+    count_range = AVLTree.count_range
+    require_order_stats = AVLTree.require_order_stats
@@ -0,0 +1,373 @@
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import sys
+import time
+import numpy as np
+
+from avl_reference import AVLTree
+from avl_array import AVLTreeArray as PoolAVLTree
+from avl_binary import AVLTreeArray
+import dataset_cache
+import tree_cache
+import tree_pages
+
+# One entry point for all three trees:
+#   python benchmark.py run --n 50000 --impl pool heap --repeat 5 --out results.json
+#   python benchmark.py compare results.json baseline.json --threshold 0.10
+#   python benchmark.py plot results.json
+#   python benchmark.py memory --n 100000 --out memory.json
+#   python benchmark.py finger --n 100000
+# run times every batch of every operation `repeat` times (after `warmup`
+# discarded runs) and stores the median and quartiles per batch as JSON;
+# compare fails (exit code 1) when an operation got slower than the
+# baseline by more than the threshold; plot only reads stored results.
+# run --cache SIZE puts an LRU search cache (tree_cache.py) in front of
+# every tree and prints its hit rate after each run.
+# memory inserts the dataset batch by batch and records each tree's own
+# memory_footprint() after every batch, then plots bytes per key against N;
+# heap-paged is the heap with paged columns (tree_pages.py).
+# finger times search_node against finger_search on sorted, nearly sorted
+# and random query streams over the array trees.
+
+IMPLEMENTATIONS = {
+    "reference": lambda: AVLTree(),
+    "reference-slots": lambda: AVLTree(compact=True),
+    "pool": lambda: PoolAVLTree(),
+    "heap": lambda: AVLTreeArray(),
+    "heap-paged": lambda: AVLTreeArray(page_size=tree_pages.PAGE_SIZE),
+}
+
+OPERATIONS = ("insert", "search", "delete")
+
+PLOT_DIR = "plots_combined"
+
+
+# RUN
+
+def run_once(factory, data, delete_order, batch_size, ops, rng, cache_size=0):
+    # -> {op: [seconds per batch]}
+    times = {op: [] for op in ops}
+    with contextlib.redirect_stdout(io.StringIO()):
+        tree = factory()
+    cache = tree_cache.cache(tree, cache_size) if cache_size else None
+
+    for start in range(0, len(data), batch_size):
+        batch = data[start:start + batch_size].tolist()
+        t0 = time.perf_counter()
+        for key in batch:
+            tree.insert_node(key)
+        if "insert" in ops:
+            times["insert"].append(time.perf_counter() - t0)
+
+        if "search" in ops:
+            current_size = start + len(batch)
+            queries = data[rng.integers(0, current_size, len(batch))].tolist()
+            t0 = time.perf_counter()
+            for key in queries:
+                tree.search_node(key)
+            times["search"].append(time.perf_counter() - t0)
+
+    if "delete" in ops:
+        for start in range(0, len(delete_order), batch_size):
+            batch = delete_order[start:start + batch_size].tolist()
+            t0 = time.perf_counter()
+            for key in batch:
+                tree.delete_node(key)
+            times["delete"].append(time.perf_counter() - t0)
+    if cache is not None:
+        print(f"  {cache.report()}")
+    return times
+
+
+def run_benchmark(impls, n, batch_size, ops, repeat, warmup, seed, cache_size=0):
+    data = dataset_cache.load(n)
+    rng = np.random.default_rng(seed)
+    delete_order = rng.permutation(data)
+
+    results = {}
+    for name in impls:
+        factory = IMPLEMENTATIONS[name]
+        runs = []
+        for i in range(warmup + repeat):
+            gc.collect()
+            label = "warmup" if i < warmup else f"run {i - warmup + 1}/{repeat}"
+            print(f"[{name}] {label}")
+            times = run_once(factory, data, delete_order, batch_size, ops,
+                             np.random.default_rng(seed + 1), cache_size)
+            if i >= warmup:
+                runs.append(times)
+        results[name] = summarize(runs, n, batch_size)
+    return results
+
+
+def summarize(runs, n, batch_size):
+    out = {}
+    for op in runs[0]:
+        t = np.array([run[op] for run in runs])
+        if op == "delete":
+            x = list(range(n, 0, -batch_size))
+        else:
+            x = [min(n, s + batch_size) for s in range(0, n, batch_size)]
+        q1, median, q3 = np.percentile(t, [25, 50, 75], axis=0)
+        out[op] = {
+            "x": x,
+            "median": median.tolist(),
+            "q1": q1.tolist(),
+            "q3": q3.tolist(),
+            "min": t.min(axis=0).tolist(),
+            "max": t.max(axis=0).tolist(),
+        }
+    return out
+
+
+def save_results(path, results, args):
+    doc = {
+        "meta": {
+            "n": args.n,
+            "batch_size": args.batch_size,
+            "ops": list(args.ops),
+            "repeat": args.repeat,
+            "warmup": args.warmup,
+            "seed": args.seed,
+            "cache": args.cache,
+            "python": sys.version.split()[0],
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
+        },
+        "results": results,
+    }
+    with open(path, "w") as f:
+        json.dump(doc, f, indent=1)
+    print(f"Saved: {path}")
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+# MEMORY
+
+def run_memory(impls, n, batch_size):
+    # -> {implementation: {x, total_bytes, live_bytes, slack_bytes}}
+    data = dataset_cache.load(n)
+    results = {}
+    for name in impls:
+        print(f"[{name}] memory")
+        with contextlib.redirect_stdout(io.StringIO()):
+            tree = IMPLEMENTATIONS[name]()
+        res = {key: [] for key in ("x", "total_bytes", "live_bytes", "slack_bytes")}
+        for start in range(0, n, batch_size):
+            for key in data[start:start + batch_size].tolist():
+                tree.insert_node(key)
+            footprint = tree.memory_footprint()
+            res["x"].append(footprint["size"])
+            for key in ("total_bytes", "live_bytes", "slack_bytes"):
+                res[key].append(footprint[key])
+        results[name] = res
+    return results
+
+
+def plot_memory(doc, plot_dir=PLOT_DIR, prefix="bench"):
+    import matplotlib.pyplot as plt
+
+    os.makedirs(plot_dir, exist_ok=True)
+    plt.figure(figsize=(10, 6))
+    for name, res in doc["results"].items():
+        x = np.array(res["x"])
+        line, = plt.plot(x, np.array(res["total_bytes"]) / x, label=f"{name} (allocated)",
+                         marker='.', linestyle='-', linewidth=1.5)
+        plt.plot(x, np.array(res["live_bytes"]) / x, label=f"{name} (live nodes)",
+                 color=line.get_color(), linestyle='--', linewidth=1)
+    plt.title("Memory per key (memory_footprint)")
+    plt.xlabel("N (Number of Elements)")
+    plt.ylabel("Bytes per key")
+    plt.yscale("log")
+    plt.legend()
+    plt.grid(True, linestyle='--', alpha=0.6)
+    path = os.path.join(plot_dir, f"{prefix}_memory.png")
+    plt.savefig(path)
+    plt.close()
+    print(f"Saved: {path}")
+
+
+# FINGER SEARCH
+
+FINGER_IMPLEMENTATIONS = ("pool", "heap")
+
+
+def finger_streams(data, seed):
+    # sorted keys, sorted with each key swapped within a window of 16, random
+    rng = np.random.default_rng(seed)
+    ordered = np.sort(data)
+    jitter = ordered[np.argsort(np.arange(len(ordered)) + rng.integers(0, 16, len(ordered)), kind='stable')]
+    return {"sorted": ordered, "nearly sorted": jitter, "random": rng.permutation(data)}
+
+
+def run_finger(impls, n, repeat, seed):
+    data = dataset_cache.load(n)
+    streams = finger_streams(data, seed)
+    print(f"{'implementation':<16}{'stream':<15}{'search_node':>13}{'finger':>11}{'speedup':>9}")
+    for name in impls:
+        with contextlib.redirect_stdout(io.StringIO()):
+            tree = IMPLEMENTATIONS[name]()
+        for key in data.tolist():
+            tree.insert_node(key)
+        for stream, queries in streams.items():
+            queries = queries.tolist()
+            best = {}
+            for method in ("search_node", "finger_search"):
+                search = getattr(tree, method)
+                for _ in range(repeat):
+                    t0 = time.perf_counter()
+                    for key in queries:
+                        search(key)
+                    t = time.perf_counter() - t0
+                    best[method] = min(best.get(method, t), t)
+            print(f"{name:<16}{stream:<15}{best['search_node']:>12.4f}s{best['finger_search']:>10.4f}s"
+                  f"{best['search_node'] / best['finger_search']:>8.2f}x")
+
+
+# COMPARE
+
+def compare(current, baseline, threshold):
+    # total median time per (implementation, operation), -> list of regressions
+    regressions = []
+    print(f"{'implementation':<18}{'op':<8}{'baseline':>11}{'current':>11}{'change':>9}")
+    for name, ops in current["results"].items():
+        for op, res in ops.items():
+            base = baseline["results"].get(name, {}).get(op)
+            if base is None or base["x"] != res["x"]:
+                print(f"{name:<18}{op:<8}{'-':>11}{sum(res['median']):>10.4f}s{'n/a':>9}")
+                continue
+            old = sum(base["median"])
+            new = sum(res["median"])
+            change = new / old - 1
+            flag = ""
+            if change > threshold:
+                regressions.append((name, op, change))
+                flag = "  REGRESSION"
+            print(f"{name:<18}{op:<8}{old:>10.4f}s{new:>10.4f}s{change:>+8.1%}{flag}")
+    return regressions
+
+
+# PLOT
+
+def plot_results(doc, plot_dir=PLOT_DIR, prefix="bench"):
+    import matplotlib.pyplot as plt
+
+    os.makedirs(plot_dir, exist_ok=True)
+    ops = sorted({op for res in doc["results"].values() for op in res}, key=OPERATIONS.index)
+    for op in ops:
+        plt.figure(figsize=(10, 6))
+        for name, res in doc["results"].items():
+            if op not in res:
+                continue
+            r = res[op]
+            line, = plt.plot(r["x"], r["median"], label=name, marker='.', linestyle='-', linewidth=1.5)
+            plt.fill_between(r["x"], r["q1"], r["q3"], color=line.get_color(), alpha=0.2)
+        meta = doc["meta"]
+        plt.title(f"{op.capitalize()} time per batch of {meta['batch_size']} "
+                  f"(median of {meta['repeat']}, band = quartiles)")
+        plt.xlabel("N (Number of Elements)")
+        plt.ylabel("Time (s)")
+        plt.legend()
+        plt.grid(True, linestyle='--', alpha=0.6)
+        path = os.path.join(plot_dir, f"{prefix}_{op}.png")
+        plt.savefig(path)
+        plt.close()
+        print(f"Saved: {path}")
+
+
+# CLI
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AVL tree benchmarks")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="run the benchmark and store the results")
+    run.add_argument("--impl", nargs="+", choices=sorted(IMPLEMENTATIONS), default=["reference", "pool", "heap"])
+    run.add_argument("--n", type=int, default=50000, help="dataset size")
+    run.add_argument("--batch-size", type=int, default=1000)
+    run.add_argument("--ops", nargs="+", choices=OPERATIONS, default=list(OPERATIONS))
+    run.add_argument("--repeat", type=int, default=3)
+    run.add_argument("--warmup", type=int, default=1)
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--out", default="results.json")
+    run.add_argument("--baseline", help="compare against this results file afterwards")
+    run.add_argument("--threshold", type=float, default=0.10)
+    run.add_argument("--plot", action="store_true")
+    run.add_argument("--cache", type=int, default=0, help="LRU search cache size, 0 = off")
+
+    cmp = sub.add_parser("compare", help="compare stored results with a baseline")
+    cmp.add_argument("results")
+    cmp.add_argument("baseline")
+    cmp.add_argument("--threshold", type=float, default=0.10)
+
+    plot = sub.add_parser("plot", help="plot stored results")
+    plot.add_argument("results")
+    plot.add_argument("--plot-dir", default=PLOT_DIR)
+
+    mem = sub.add_parser("memory", help="record bytes per key while the trees grow")
+    mem.add_argument("--impl", nargs="+", choices=sorted(IMPLEMENTATIONS), default=sorted(IMPLEMENTATIONS))
+    mem.add_argument("--n", type=int, default=50000, help="dataset size")
+    mem.add_argument("--batch-size", type=int, default=1000)
+    mem.add_argument("--out", default="memory.json")
+    mem.add_argument("--plot-dir", default=PLOT_DIR)
+
+    finger = sub.add_parser("finger", help="search_node vs finger_search on sorted query streams")
+    finger.add_argument("--impl", nargs="+", choices=FINGER_IMPLEMENTATIONS, default=list(FINGER_IMPLEMENTATIONS))
+    finger.add_argument("--n", type=int, default=50000, help="dataset size")
+    finger.add_argument("--repeat", type=int, default=3)
+    finger.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "run":
+        results = run_benchmark(args.impl, args.n, args.batch_size, args.ops,
+                                args.repeat, args.warmup, args.seed, args.cache)
+        save_results(args.out, results, args)
+        doc = load_results(args.out)
+        if args.plot:
+            plot_results(doc)
+        if args.baseline:
+            return 1 if compare(doc, load_results(args.baseline), args.threshold) else 0
+        return 0
+
+    if args.command == "memory":
+        doc = {
+            "meta": {"n": args.n, "batch_size": args.batch_size, "python": sys.version.split()[0],
+                     "date": time.strftime("%Y-%m-%d %H:%M:%S")},
+            "results": run_memory(args.impl, args.n, args.batch_size),
+        }
+        with open(args.out, "w") as f:
+            json.dump(doc, f, indent=1)
+        print(f"Saved: {args.out}")
+        for name, res in doc["results"].items():
+            print(f"{name:<18}{res['total_bytes'][-1] / res['x'][-1]:>8.1f} B/key allocated"
+                  f"{res['live_bytes'][-1] / res['x'][-1]:>8.1f} B/key live")
+        plot_memory(doc, args.plot_dir)
+        return 0
+
+    if args.command == "finger":
+        run_finger(args.impl, args.n, args.repeat, args.seed)
+        return 0
+
+    if args.command == "compare":
+        regressions = compare(load_results(args.results), load_results(args.baseline), args.threshold)
+        for name, op, change in regressions:
+            print(f"{name} {op} is {change:.1%} slower than the baseline")
+        return 1 if regressions else 0
+
+    plot_results(load_results(args.results), args.plot_dir)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+import sys
+import threading
+import time
+import numpy as np
+
+from avl_reference import AVLTree
+from avl_array import AVLTreeArray as PoolAVLTree
+from avl_binary import AVLTreeArray
+from concurrent_tree import ConcurrentTree
+
+N = 50000
+READS_PER_THREAD = 20000
+THREADS = [1, 2, 4, 8]
+
+
+def read_throughput(tree, queries, n_threads):
+    # every thread runs the same query list, returns reads per second
+    start = threading.Barrier(n_threads + 1)
+
+    def worker():
+        start.wait()
+        for q in queries:
+            tree.contains(q)
+
+    threads = [threading.Thread(target=worker) for _ in range(n_threads)]
+    for t in threads:
+        t.start()
+    start.wait()
+    t0 = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    return n_threads * len(queries) / elapsed
+
+
+if __name__ == "__main__":
+    gil = getattr(sys, "_is_gil_enabled", lambda: True)()
+    print(f"Python {sys.version.split()[0]}, GIL {'enabled' if gil else 'disabled'}")
+
+    data = np.random.default_rng(0).permutation(N * 10)[:N]
+    queries = data[np.random.default_rng(1).integers(0, N, READS_PER_THREAD)].tolist()
+
+    trees = {
+        "Reference (RW lock)": lambda: AVLTree.from_iterable(data),
+        "Reference (snapshots)": lambda: AVLTree.from_iterable(data, persistent=True),
+        "Pool array (RW lock)": lambda: PoolAVLTree.from_iterable(data),
+        "Heap array (RW lock)": lambda: AVLTreeArray.from_iterable(data),
+    }
+
+    print(f"\nN={N}, {READS_PER_THREAD} reads per thread")
+    print(f"{'tree':<24}" + "".join(f"{t:>12}" for t in THREADS))
+    for name, factory in trees.items():
+        tree = ConcurrentTree(factory())
+        row = [read_throughput(tree, queries, n) for n in THREADS]
+        print(f"{name:<24}" + "".join(f"{r / 1000:>11.0f}k" for r in row))
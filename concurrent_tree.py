@@ -0,0 +1,169 @@
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+
+
+class RWLock:
+    # many readers or one writer, waiting writers block new readers
+    def __init__(self):
+        self.cond = threading.Condition(threading.Lock())
+        self.readers = 0
+        self.writer = False
+        self.waiting_writers = 0
+
+    @contextmanager
+    def read(self):
+        with self.cond:
+            while self.writer or self.waiting_writers:
+                self.cond.wait()
+            self.readers += 1
+        try:
+            yield
+        finally:
+            with self.cond:
+                self.readers -= 1
+                if self.readers == 0:
+                    self.cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self.cond:
+            self.waiting_writers += 1
+            while self.writer or self.readers:
+                self.cond.wait()
+            self.waiting_writers -= 1
+            self.writer = True
+        try:
+            yield
+        finally:
+            with self.cond:
+                self.writer = False
+                self.cond.notify_all()
+
+
+class ConcurrentTree:
+    # Thread-safe front for AVLTree, avl_array.AVLTreeArray or
+    # avl_binary.AVLTreeArray.
+    #
+    # Writes are queued and whichever writer gets the lock applies the whole
+    # queue, consecutive inserts/deletes go in as one insert_many/delete_many.
+    # Every queued op carries a Future: an op that fails raises in the thread
+    # that submitted it, the other ops of the queue are still applied.
+    # A persistent AVLTree is read through its latest snapshot with no lock.
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.lock = RWLock()
+        self.pending = []
+        self.pending_lock = threading.Lock()
+        self.version = 0
+        self.use_snapshots = getattr(tree, 'persistent', False)
+        # (version, snapshot), replaced as one reference
+        self.published = (0, tree.snapshot()) if self.use_snapshots else None
+
+    # READS
+
+    def contains(self, key):
+        return self.search_versioned(key)[0]
+
+    def search_versioned(self, key):
+        # (found, version the answer belongs to)
+        if self.use_snapshots:
+            version, snap = self.published
+            return snap.search_node(key) is not None, version
+        with self.lock.read():
+            return self.found(self.tree.search_node(key)), self.version
+
+    def search_node(self, key):
+        # raw result of the wrapped tree; indices of the array trees are
+        # only meaningful while version does not change
+        if self.use_snapshots:
+            return self.published[1].search_node(key)
+        with self.lock.read():
+            return self.tree.search_node(key)
+
+    def range(self, lo=None, hi=None):
+        # keys with lo <= key < hi, materialized under the read lock
+        if self.use_snapshots:
+            return list(self.published[1].range(lo, hi))
+        with self.lock.read():
+            return list(self.tree.range(lo, hi))
+
+    def is_current(self, version):
+        return version == self.version
+
+    def found(self, result):
+        # node or None for AVLTree, index or -1 for the array trees
+        return result is not None and not (isinstance(result, int) and result == -1)
+
+    # WRITES
+
+    def insert_node(self, key):
+        self.submit('insert', key)
+
+    def delete_node(self, key):
+        self.submit('delete', key)
+
+    def insert_many(self, keys):
+        self.submit('insert_many', keys)
+
+    def delete_many(self, keys):
+        self.submit('delete_many', keys)
+
+    def submit(self, op, arg):
+        done = Future()
+        with self.pending_lock:
+            self.pending.append((op, arg, done))
+        # once we hold the lock our op has been applied, by us or by
+        # the writer that drained the queue before us
+        with self.lock.write():
+            with self.pending_lock:
+                ops = self.pending
+                self.pending = []
+            if ops:
+                try:
+                    self.apply(ops)
+                finally:
+                    # failed ops may have changed the tree part way too
+                    self.version += 1
+                    if self.use_snapshots:
+                        self.published = (self.version, self.tree.snapshot())
+        # raises the exception of our own op
+        done.result()
+
+    def apply(self, ops):
+        i = 0
+        while i < len(ops):
+            op, arg, done = ops[i]
+            if op in ('insert_many', 'delete_many'):
+                self.call(done, getattr(self.tree, op), arg)
+                i += 1
+                continue
+            # collect the run of single-key ops of the same kind
+            j = i
+            while j < len(ops) and ops[j][0] == op:
+                j += 1
+            run = ops[i:j]
+            if len(run) == 1:
+                self.call(done, getattr(self.tree, op + '_node'), arg)
+            else:
+                try:
+                    getattr(self.tree, op + '_many')([key for _, key, _ in run])
+                except Exception:
+                    # find the failing keys one by one, keys the batch
+                    # already applied are skipped as duplicates / missing
+                    for _, key, key_done in run:
+                        self.call(key_done, getattr(self.tree, op + '_node'), key)
+                else:
+                    for _, _, key_done in run:
+                        key_done.set_result(None)
+            i = j
+
+    def call(self, done, method, arg):
+        # apply one op, its outcome goes to the submitter's Future
+        try:
+            method(arg)
+        except Exception as e:
+            done.set_exception(e)
+        else:
+            done.set_result(None)
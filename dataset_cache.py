@@ -0,0 +1,62 @@
+import os
+import numpy as np
+
+# Datasets shared by experiment.py, profileTest.py and benchmark.py.
+# datasets/data_N.txt (one unique integer per line) is parsed once into
+# datasets/data_N.npy next to it, every later load memory-maps that file.
+# Missing datasets are generated straight into the .npy cache.
+# Delete orders, batches and search samples are NumPy slices / arrays,
+# built in time linear in the dataset size.
+
+DATA_DIR = "datasets"
+
+
+def load(n, data_dir=DATA_DIR, seed=0):
+    # -> read-only int64 array of n unique keys (memory-mapped)
+    os.makedirs(data_dir, exist_ok=True)
+    txt = os.path.join(data_dir, f"data_{n}.txt")
+    npy = os.path.join(data_dir, f"data_{n}.npy")
+
+    if os.path.exists(txt):
+        if not os.path.exists(npy) or os.path.getmtime(npy) < os.path.getmtime(txt):
+            np.save(npy, parse_text(txt))
+    elif not os.path.exists(npy):
+        np.save(npy, generate(n, seed))
+    return np.load(npy, mmap_mode='r')
+
+
+def parse_text(path):
+    # whitespace separated integers, much faster than np.loadtxt
+    with open(path, 'rb') as f:
+        return np.array(f.read().split(), dtype=np.int64)
+
+
+def generate(n, seed=0):
+    # n unique integers from [1, 10 n)
+    rng = np.random.default_rng(seed)
+    return rng.choice(n * 10 - 1, n, replace=False) + 1
+
+
+def shuffled(data, seed=None):
+    # shuffled copy, e.g. a delete order
+    return np.random.default_rng(seed).permutation(data)
+
+
+def batches(data, batch_size):
+    # consecutive slices (views, no copies)
+    return [data[i:i + batch_size] for i in range(0, len(data), batch_size)]
+
+
+def search_samples(data, batch_size, seed=None):
+    # after each insert batch: up to batch_size distinct keys drawn from
+    # the keys inserted so far. Generator.choice without replacement only
+    # permutes the population when it is under 10000 or under 50x the
+    # sample, otherwise it uses Floyd's algorithm, so a batch costs
+    # O(batch_size) either way (np.random.choice would permute all keys)
+    rng = np.random.default_rng(seed)
+    samples = []
+    for end in range(batch_size, len(data) + batch_size, batch_size):
+        current = min(end, len(data))
+        idx = rng.choice(current, size=min(current, batch_size), replace=False)
+        samples.append(data[idx])
+    return samples
@@ -1,47 +1,37 @@
 import time
-import tracemalloc
 import numpy as np
 import os
-import math
 import matplotlib.pyplot as plt
 import gc
-import random
+import sys
 
 
 from avl_reference import AVLTree
 from avl_binary import AVLTreeArray
+from sharded_tree import ShardedTree
+import workloads
+import dataset_cache
 
 
 MAX_N = 50000        
 BATCH_SIZE = 1000    
+SHARD_WORKERS = [1, 2, 4]
+SHARD_BATCH_SIZE = 10000
 PLOT_DIR = "plots_combined"
-DATA_DIR = "datasets"
+# --workload NAME replaces the uniform dataset with a stream from workloads.py
+WORKLOAD = sys.argv[sys.argv.index("--workload") + 1] if "--workload" in sys.argv else None
 
 
-def get_dataset(n):
-    
-    if not os.path.exists(DATA_DIR):
-        os.makedirs(DATA_DIR)
-    
-    path = os.path.join(DATA_DIR, f"data_{n}.txt")
-    
-    if not os.path.exists(path):
-        # Generate unique random numbers
-        data = random.sample(range(1, n * 10), n)
-        with open(path, 'w') as f:
-            for num in data:
-                f.write(f"{num}\n")
-        return np.array(data)
-    
-    return np.loadtxt(path, dtype=int)
-
-
-def run_batched_benchmark(tree_factory, data, delete_order, batch_size):
+def run_batched_benchmark(tree_factory, data, delete_order, batch_size, workload=None):
+    if workload is not None:
+        return run_workload_benchmark(tree_factory, workload, batch_size)
    
     results = {
         "x": [], 
         "insert_time": [],
         "search_time": [],
+        # the same queries as one vectorized search_many call, if the tree has it
+        "search_many_time": [],
         "mem_static": [],    
         "mem_total": [],     
         "mem_growth": [],    
@@ -56,15 +46,13 @@ def run_batched_benchmark(tree_factory, data, delete_order, batch_size):
     
     current_size = 0
     
-    # Setup memory tracking
     gc.collect()
     gc.enable()         
-    tracemalloc.start()
     
     #  Init Tree
     tree = tree_factory()
-    current_after_init, _ = tracemalloc.get_traced_memory()
-    static_mb = current_after_init / (1024 * 1024)
+    # memory is the tree's own exact footprint, see memory_footprint()
+    static_mb = tree.memory_footprint()["total_bytes"] / (1024 * 1024)
     print(f"  -> Init done. Static Mem: {static_mb:.4f} MB")
 
     #  Growth Phase (Insert + Search)
@@ -78,8 +66,7 @@ def run_batched_benchmark(tree_factory, data, delete_order, batch_size):
         current_size += len(batch)
         
         # Measure Memory
-        current_mem, _ = tracemalloc.get_traced_memory()
-        current_mb = current_mem / (1024 * 1024)
+        current_mb = tree.memory_footprint()["total_bytes"] / (1024 * 1024)
         growth_mb = current_mb - static_mb 
         
         # Measure Search
@@ -88,6 +75,11 @@ def run_batched_benchmark(tree_factory, data, delete_order, batch_size):
         for val in search_sample:
             tree.search_node(val)
         t_search = time.perf_counter() - t0
+
+        if hasattr(tree, "search_many"):
+            t0 = time.perf_counter()
+            tree.search_many(search_sample)
+            results["search_many_time"].append(time.perf_counter() - t0)
         
         # Record stats
         results["x"].append(current_size)
@@ -117,12 +109,110 @@ def run_batched_benchmark(tree_factory, data, delete_order, batch_size):
         delete_current_size -= len(batch)
 
     # Cleanup
-    tracemalloc.stop()
     gc.collect()
     return results
 
 
-def plot_comparison_on_one_chart(res_arr, res_ref, x_key, y_key, title, ylabel, filename, use_log=False):
+def run_workload_benchmark(tree_factory, workload, batch_size):
+    # Same result keys as run_batched_benchmark, one row per ~batch_size
+    # operations: x counts operations, size is the tree size after the row,
+    # each *_time sums the operations of that kind inside the row
+    results = {key: [] for key in ("x", "size", "insert_time", "search_time", "delete_time",
+                                   "search_many_time", "mem_static", "mem_total", "mem_growth", "delete_x")}
+    times = dict.fromkeys(workloads.OPS, 0.0)
+    search_many_time = 0.0
+    ops_done = 0
+    size = 0
+    next_row = batch_size
+
+    gc.collect()
+    tree = tree_factory()
+    static_mb = tree.memory_footprint()["total_bytes"] / (1024 * 1024)
+    print(f"  -> Init done. Static Mem: {static_mb:.4f} MB")
+
+    for op, keys in workload:
+        if op == "search" and hasattr(tree, "search_many"):
+            t0 = time.perf_counter()
+            tree.search_many(keys)
+            search_many_time += time.perf_counter() - t0
+        method = getattr(tree, workloads.OPS[op])
+        keys = keys.tolist()
+        t0 = time.perf_counter()
+        for val in keys:
+            method(val)
+        times[op] += time.perf_counter() - t0
+        ops_done += len(keys)
+        if op == "insert":
+            size += len(keys)
+        elif op == "delete":
+            size -= len(keys)
+
+        if ops_done >= next_row:
+            current_mb = tree.memory_footprint()["total_bytes"] / (1024 * 1024)
+            results["x"].append(ops_done)
+            results["delete_x"].append(ops_done)
+            results["size"].append(size)
+            for name in workloads.OPS:
+                results[f"{name}_time"].append(times[name])
+            if hasattr(tree, "search_many"):
+                results["search_many_time"].append(search_many_time)
+                search_many_time = 0.0
+            results["mem_static"].append(static_mb)
+            results["mem_total"].append(current_mb)
+            results["mem_growth"].append(current_mb - static_mb)
+            times = dict.fromkeys(workloads.OPS, 0.0)
+            next_row = ops_done + batch_size
+
+    gc.collect()
+    return results
+
+
+def run_sharded_benchmark(data, delete_order, batch_size, workers):
+    # whole batches through ShardedTree, returns keys per second for each phase
+    insert_batches = [data[i:i + batch_size] for i in range(0, len(data), batch_size)]
+    delete_batches = [delete_order[i:i + batch_size] for i in range(0, len(delete_order), batch_size)]
+    timings = {"insert": 0.0, "search": 0.0, "delete": 0.0}
+
+    with ShardedTree(workers=workers) as tree:
+        current_size = 0
+        for batch in insert_batches:
+            t0 = time.perf_counter()
+            tree.insert_many(batch)
+            timings["insert"] += time.perf_counter() - t0
+            current_size += len(batch)
+
+            search_sample = data[np.random.randint(0, current_size, size=len(batch))]
+            t0 = time.perf_counter()
+            tree.search_many(search_sample)
+            timings["search"] += time.perf_counter() - t0
+
+        for batch in delete_batches:
+            t0 = time.perf_counter()
+            tree.delete_many(batch)
+            timings["delete"] += time.perf_counter() - t0
+
+    return {op: len(data) / t for op, t in timings.items()}
+
+
+def plot_sharded_scaling(results, filename):
+    plt.figure(figsize=(10, 6))
+    for op, color in (("insert", "red"), ("search", "blue"), ("delete", "green")):
+        plt.plot(SHARD_WORKERS, [results[w][op] for w in SHARD_WORKERS], label=op, color=color,
+                 marker='o', linestyle='-', linewidth=1.5, alpha=0.9)
+    plt.title("Sharded Tree Batch Throughput")
+    plt.xlabel("Worker processes")
+    plt.ylabel("Keys per second")
+    plt.xticks(SHARD_WORKERS)
+    plt.legend()
+    plt.grid(True, linestyle='--', alpha=0.6)
+
+    path = os.path.join(PLOT_DIR, filename)
+    plt.savefig(path)
+    plt.close()
+    print(f"Saved: {path}")
+
+
+def plot_comparison_on_one_chart(res_arr, res_ref, x_key, y_key, title, ylabel, filename, use_log=False, extra=()):
     
     plt.figure(figsize=(10, 6))
 
@@ -134,8 +224,13 @@ def plot_comparison_on_one_chart(res_arr, res_ref, x_key, y_key, title, ylabel,
     plt.plot(res_ref[x_key], res_ref[y_key], label='Reference AVL', color='blue', 
              marker='.', linestyle='-', linewidth=1.5, alpha=0.9)
 
+    # Optional extra series: (label, color, results)
+    for label, color, res in extra:
+        plt.plot(res[x_key], res[y_key], label=label, color=color,
+                 marker='.', linestyle='-', linewidth=1.5, alpha=0.9)
+
     plt.title(title)
-    plt.xlabel("N (Number of Elements)")
+    plt.xlabel("Operations" if WORKLOAD else "N (Number of Elements)")
     plt.ylabel(ylabel)
     plt.legend() 
     plt.grid(True, linestyle='--', alpha=0.6)
@@ -153,22 +248,26 @@ if __name__ == "__main__":
     os.makedirs(PLOT_DIR, exist_ok=True)
     
     print(f"Generating dataset N={MAX_N}...")
-    data = get_dataset(MAX_N)
+    data = dataset_cache.load(MAX_N)
     
     # Prepare delete order ONCE to ensure consistency
-    delete_order = np.copy(data)
-    np.random.shuffle(delete_order)
-    
-    # Array AVL
-    # Calc capacity based on log2(N) + buffer
-    exponent = int(math.log2(MAX_N)) + 4
-    capacity = 2 ** exponent
-    print(f"\n[Array] Running Batches (Capacity: {capacity})")
+    delete_order = dataset_cache.shuffled(data)
+
+    def stream():
+        # a fresh, identical operation stream for every tree
+        if WORKLOAD is None:
+            return None
+        print(f"  -> Workload: {WORKLOAD}")
+        return workloads.make(WORKLOAD, MAX_N, BATCH_SIZE)
+    
+    # Array AVL (storage grows with the tree)
+    print(f"\n[Array] Running Batches")
     res_arr = run_batched_benchmark(
-        lambda: AVLTreeArray(capacity=capacity), 
+        lambda: AVLTreeArray(), 
         data, 
         delete_order, 
-        BATCH_SIZE
+        BATCH_SIZE,
+        stream()
     )
     
     # Reference AVL
@@ -177,18 +276,34 @@ if __name__ == "__main__":
         lambda: AVLTree(), 
         data, 
         delete_order, 
-        BATCH_SIZE
+        BATCH_SIZE,
+        stream()
     )
     
+    # Reference AVL with __slots__ nodes
+    print(f"\n[Reference compact] Running Batches")
+    res_ref_compact = run_batched_benchmark(
+        lambda: AVLTree(compact=True), 
+        data, 
+        delete_order, 
+        BATCH_SIZE,
+        stream()
+    )
+    print(f"Node size: dict {AVLTree().node_size()} B, slots {AVLTree(compact=True).node_size()} B")
+    compact_series = [("Reference AVL (slots)", "green", res_ref_compact)]
+    
     print("\nGenerating Plots...")
     
     #  Insert Time
     plot_comparison_on_one_chart(res_arr, res_ref, "x", "insert_time", 
                                  "Insert Time Comparison", "Time (s)", "compare_insert.png")
     
-    #  Search Time
+    #  Search Time (+ the same queries through search_many)
+    batch_series = [("Array AVL (search_many)", "orange",
+                     {"x": res_arr["x"], "search_time": res_arr["search_many_time"]})]
     plot_comparison_on_one_chart(res_arr, res_ref, "x", "search_time", 
-                                 "Search Time Comparison", "Time (s)", "compare_search.png")
+                                 "Search Time Comparison", "Time (s)", "compare_search.png",
+                                 extra=batch_series)
     
     #  Delete Time
     plot_comparison_on_one_chart(res_arr, res_ref, "delete_x", "delete_time", 
@@ -197,11 +312,20 @@ if __name__ == "__main__":
     #  Total Memory
     plot_comparison_on_one_chart(res_arr, res_ref, "x", "mem_total", 
                                  "Total Memory Usage Comparison", "Memory (MB)", 
-                                 "compare_memory_total.png", use_log=True)
+                                 "compare_memory_total.png", use_log=True, extra=compact_series)
     
     # 5. Memory Growth
     plot_comparison_on_one_chart(res_arr, res_ref, "x", "mem_growth", 
                                  "Dynamic Memory Growth Comparison", "Memory Increase (MB)", 
-                                 "compare_memory_growth.png", use_log=False)
+                                 "compare_memory_growth.png", use_log=False, extra=compact_series)
+
+    # Sharded tree, one process per shard
+    print(f"\n[Sharded] Batch throughput, {os.cpu_count()} CPUs")
+    res_sharded = {}
+    for workers in SHARD_WORKERS:
+        res_sharded[workers] = run_sharded_benchmark(data, delete_order, SHARD_BATCH_SIZE, workers)
+        print(f"  -> {workers} workers: " + ", ".join(
+            f"{op} {rate / 1000:.0f}k/s" for op, rate in res_sharded[workers].items()))
+    plot_sharded_scaling(res_sharded, "sharded_scaling.png")
 
     print(f"\nDone. Plots saved in '{PLOT_DIR}'.")
\ No newline at end of file
@@ -1,64 +1,34 @@
 import cProfile
 import pstats
 import io
-import numpy as np
-import os
-import math
-import random
+import sys
 
 from avl_reference import AVLTree
 from avl_binary import AVLTreeArray
+import tree_stats
+import workloads
+import dataset_cache
 
 MAX_N = 100000        
 BATCH_SIZE = 1000    
-DATA_DIR = "datasets"
 
 # Profiling Checkpoints
 CHECKPOINTS = [1000, 10000, 50000, 90000] 
 
-def get_dataset(n):
-    
-    if not os.path.exists(DATA_DIR):
-        os.makedirs(DATA_DIR)
-    
-    path = os.path.join(DATA_DIR, f"data_{n}.txt")
-    
-    if not os.path.exists(path):
-        # Generate unique random numbers
-        data = random.sample(range(1, n * 10), n)
-        with open(path, 'w') as f:
-            for num in data:
-                f.write(f"{num}\n")
-        return np.array(data)
-    
-    return np.loadtxt(path, dtype=int)
-
+# --stats: count structural work (comparisons, rotations, height updates,
+# node moves) at the checkpoints instead of running cProfile
+STRUCTURAL = "--stats" in sys.argv
+# --workload NAME profiles a whole stream from workloads.py instead
+WORKLOAD = sys.argv[sys.argv.index("--workload") + 1] if "--workload" in sys.argv else None
 
 def prepare_test_vectors(data, batch_size):
 
     print("Preparing test vector")
-    total_items = len(data)
-    
-    #  Insert Batches 
-    insert_batches = [data[i:i + batch_size] for i in range(0, total_items, batch_size)]
-    
-    #  Search Queries 
-    search_queries = []
-    current_data_pool = []
-
-    
-    for batch in insert_batches:
-        current_data_pool.extend(batch)
-        # Pick a random sample from the pool of currently inserted items
-        sample_size = min(len(current_data_pool), batch_size)
-        sample = np.random.choice(current_data_pool, size=sample_size, replace=False)
-        search_queries.append(sample)
-        
+    insert_batches = dataset_cache.batches(data, batch_size)
+    # Pick a random sample from the items inserted so far after each batch
+    search_queries = dataset_cache.search_samples(data, batch_size)
     # Delete Batches (Randomized order of all items)
-    delete_order = np.copy(data)
-    np.random.shuffle(delete_order)
-    delete_batches = [delete_order[i:i + batch_size] for i in range(0, total_items, batch_size)]
-    
+    delete_batches = dataset_cache.batches(dataset_cache.shuffled(data), batch_size)
     return insert_batches, search_queries, delete_batches
 
 
@@ -80,10 +50,31 @@ def run_profile_stats(name, func, *args):
     print(s.getvalue())
 
 
-def run_profiled_benchmark(name, tree_factory, test_vectors):
+def run_structural_stats(name, tree, func):
+
+    print(f"   >>> [STATS] {name}")
+    with tree_stats.instrument(tree) as stats:
+        func()
+    print(stats.report())
+    print()
+
+
+def run_checkpoint(name, tree, func):
+    if STRUCTURAL:
+        run_structural_stats(name, tree, func)
+    else:
+        run_profile_stats(name, func)
+
+
+def run_profiled_benchmark(name, tree_factory, test_vectors, workload=None):
 
     
     print(f"START PROFILING: {name}")
+
+    if workload is not None:
+        tree = tree_factory()
+        run_checkpoint("WORKLOAD", tree, lambda: workloads.run_ops(tree, workload))
+        return
     
     
     insert_batches, search_queries, delete_batches = test_vectors
@@ -103,13 +94,13 @@ def run_profiled_benchmark(name, tree_factory, test_vectors):
             #Profile INSERT
             def _op_insert():
                 for val in batch: tree.insert_node(val)
-            run_profile_stats("INSERT Batch", _op_insert)
+            run_checkpoint("INSERT Batch", tree, _op_insert)
             
             #Profile SEARCH
             queries = search_queries[i]
             def _op_search():
                 for val in queries: tree.search_node(val)
-            run_profile_stats("SEARCH Batch", _op_search)
+            run_checkpoint("SEARCH Batch", tree, _op_search)
             
         else:
             # Normal execution without profiling
@@ -131,7 +122,7 @@ def run_profiled_benchmark(name, tree_factory, test_vectors):
             #Profile DELETE
             def _op_delete():
                 for val in batch: tree.delete_node(val)
-            run_profile_stats("DELETE Batch", _op_delete)
+            run_checkpoint("DELETE Batch", tree, _op_delete)
             
         else:
             # Normal execution without profiling
@@ -143,17 +134,16 @@ def run_profiled_benchmark(name, tree_factory, test_vectors):
 
 if __name__ == "__main__":
     print(f"Generating Data N={MAX_N}")
-    data = get_dataset(MAX_N)
+    data = dataset_cache.load(MAX_N)
     
     # Prepare vectors
     vectors = prepare_test_vectors(data, BATCH_SIZE)
     
+    def stream():
+        return workloads.make(WORKLOAD, MAX_N, BATCH_SIZE) if WORKLOAD else None
+
     # Profile Array AVL
-    exponent = int(math.log2(MAX_N)) + 5
-    capacity = 2 ** exponent
-    print(f"\n[INIT] Array Capacity: {capacity}")
-    
-    run_profiled_benchmark("Array AVL", lambda: AVLTreeArray(capacity), vectors)
+    run_profiled_benchmark("Array AVL", lambda: AVLTreeArray(), vectors, stream())
     
     # Profile Reference AVL
-    run_profiled_benchmark("Reference AVL", lambda: AVLTree(), vectors)
\ No newline at end of file
+    run_profiled_benchmark("Reference AVL", lambda: AVLTree(), vectors, stream())
\ No newline at end of file
@@ -0,0 +1,190 @@
+import multiprocessing as mp
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+
+from avl_array import AVLTreeArray
+
+# Key-range sharding over worker processes.
+# Shard i owns the keys in [bounds[i-1], bounds[i]) and keeps them in its own
+# avl_array.AVLTreeArray. A batch is sorted once, written to shared memory,
+# and every shard gets the (start, stop) of its contiguous run, so all shards
+# work on one batch at the same time without copying keys through pipes.
+
+
+class SharedBuffer:
+    # growable shared-memory block viewed as a 1-d array
+    def __init__(self, dtype):
+        self.dtype = np.dtype(dtype)
+        self.shm = None
+
+    def view(self, n):
+        size = max(n, 1) * self.dtype.itemsize
+        if self.shm is None or self.shm.size < size:
+            self.close()
+            self.shm = shared_memory.SharedMemory(create=True, size=max(size, 1 << 16))
+        return np.ndarray(n, dtype=self.dtype, buffer=self.shm.buf)
+
+    def close(self):
+        if self.shm is not None:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = None
+
+
+def attach(cache, name, dtype):
+    shm = cache.get(name)
+    if shm is None:
+        for old in cache.values():
+            old.close()
+        cache.clear()
+        shm = cache[name] = shared_memory.SharedMemory(name=name)
+    return np.ndarray(shm.size // np.dtype(dtype).itemsize, dtype=dtype, buffer=shm.buf)
+
+
+def shard_worker(conn):
+    tree = AVLTreeArray(key_dtype=np.int64)
+    keys_cache = {}
+    out_cache = {}
+    while True:
+        msg = conn.recv()
+        op = msg[0]
+        if op == 'stop':
+            break
+
+        if op in ('insert_many', 'delete_many', 'search_many'):
+            _, name, start, stop, out_name = msg
+            keys = attach(keys_cache, name, np.int64)[start:stop]
+            if op == 'search_many':
+                out = attach(out_cache, out_name, np.bool_)
+                out[start:stop] = tree.search_many(keys) != -1
+            elif stop > start:
+                getattr(tree, op)(keys)
+            conn.send(tree.size)
+
+        elif op == 'keys':
+            conn.send(np.fromiter(tree, dtype=np.int64, count=tree.size))
+
+        elif op == 'load':
+            tree = AVLTreeArray.from_sorted(msg[1], key_dtype=np.int64)
+            conn.send(tree.size)
+
+    for shm in list(keys_cache.values()) + list(out_cache.values()):
+        shm.close()
+    conn.close()
+
+
+class ShardedTree:
+    # skew_factor: rebalance once the largest shard holds more than
+    # skew_factor times the average (and at least min_rebalance keys)
+
+    def __init__(self, workers=4, bounds=None, skew_factor=2.0, min_rebalance=10000):
+        self.workers = workers
+        self.skew_factor = skew_factor
+        self.min_rebalance = min_rebalance
+        # None until the first batch picks boundaries from its quantiles
+        self.bounds = None if bounds is None else np.asarray(bounds, dtype=np.int64)
+        self.sizes = [0] * workers
+
+        self.keys_buf = SharedBuffer(np.int64)
+        self.out_buf = SharedBuffer(np.bool_)
+
+        # workers must share our resource tracker, otherwise each one
+        # unlinks the segments it attached to when it exits
+        resource_tracker.ensure_running()
+        ctx = mp.get_context()
+        self.conns = []
+        self.procs = []
+        for _ in range(workers):
+            parent, child = ctx.Pipe()
+            p = ctx.Process(target=shard_worker, args=(child,), daemon=True)
+            p.start()
+            child.close()
+            self.conns.append(parent)
+            self.procs.append(p)
+
+    def __len__(self):
+        return sum(self.sizes)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        for conn in self.conns:
+            conn.send(('stop',))
+        for p in self.procs:
+            p.join()
+        self.keys_buf.close()
+        self.out_buf.close()
+        self.conns = []
+        self.procs = []
+
+    # BATCH OPERATIONS
+
+    def insert_many(self, keys):
+        keys = np.unique(np.asarray(keys, dtype=np.int64))
+        if self.bounds is None:
+            self.bounds = self.quantile_bounds(keys)
+        self.scatter('insert_many', keys)
+        self.maybe_rebalance()
+
+    def delete_many(self, keys):
+        keys = np.unique(np.asarray(keys, dtype=np.int64))
+        if self.bounds is None:
+            return
+        self.scatter('delete_many', keys)
+        self.maybe_rebalance()
+
+    def search_many(self, keys):
+        # -> bool array, found flag for every query in the given order
+        keys = np.asarray(keys, dtype=np.int64)
+        if self.bounds is None:
+            return np.zeros(len(keys), dtype=np.bool_)
+        order = np.argsort(keys, kind='stable')
+        self.scatter('search_many', keys[order])
+        found = np.empty(len(keys), dtype=np.bool_)
+        found[order] = self.out_buf.view(len(keys))
+        return found
+
+    def scatter(self, op, sorted_keys):
+        n = len(sorted_keys)
+        shared = self.keys_buf.view(n)
+        shared[:] = sorted_keys
+        if op == 'search_many':
+            self.out_buf.view(n)
+        out_name = self.out_buf.shm.name if self.out_buf.shm is not None else None
+
+        cuts = np.concatenate(([0], np.searchsorted(sorted_keys, self.bounds), [n]))
+        for i, conn in enumerate(self.conns):
+            conn.send((op, self.keys_buf.shm.name, int(cuts[i]), int(cuts[i + 1]), out_name))
+        for i, conn in enumerate(self.conns):
+            self.sizes[i] = conn.recv()
+
+    # SHARD BOUNDARIES
+
+    def quantile_bounds(self, sorted_keys):
+        if not len(sorted_keys):
+            return np.zeros(self.workers - 1, dtype=np.int64)
+        q = np.arange(1, self.workers) * len(sorted_keys) // self.workers
+        return sorted_keys[q]
+
+    def maybe_rebalance(self):
+        total = sum(self.sizes)
+        if total < self.min_rebalance:
+            return
+        if max(self.sizes) > self.skew_factor * total / self.workers:
+            self.rebalance()
+
+    def rebalance(self):
+        # pull every shard's keys, cut them at new quantiles and reload
+        for conn in self.conns:
+            conn.send(('keys',))
+        keys = np.concatenate([conn.recv() for conn in self.conns])
+        self.bounds = self.quantile_bounds(keys)
+        cuts = np.concatenate(([0], np.searchsorted(keys, self.bounds), [len(keys)]))
+        for i, conn in enumerate(self.conns):
+            conn.send(('load', keys[cuts[i]:cuts[i + 1]]))
+        for i, conn in enumerate(self.conns):
+            self.sizes[i] = conn.recv()
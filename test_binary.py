@@ -5,7 +5,7 @@ import random
 
 if __name__ == "__main__":
 
-    tree = AVLTreeArray(capacity=10000)
+    tree = AVLTreeArray()
     
     print(" AVL TREE (ARRAY) ")
     
@@ -0,0 +1,594 @@
+import json
+import random
+import sys
+import threading
+from concurrent.futures import Future
+import numpy as np
+import pytest
+
+from avl_reference import AVLTree
+from avl_array import AVLTreeArray as PoolAVLTree
+from avl_binary import AVLTreeArray
+from concurrent_tree import ConcurrentTree
+from sharded_tree import ShardedTree
+import benchmark
+import dataset_cache
+import workloads
+import tree_cache
+import tree_checks
+import tree_stats
+
+# Oracle tests for the modules built on top of the trees, one section per
+# feature; structural checks through tree_checks.check as in test_trees.py.
+
+ALL_TREES = {
+    'reference': AVLTree,
+    'pool': PoolAVLTree,
+    'heap': AVLTreeArray,
+    'heap-paged': lambda: AVLTreeArray(page_size=16),
+}
+
+
+# CONCURRENT TREE
+
+@pytest.mark.parametrize('make', [PoolAVLTree, AVLTreeArray, lambda: AVLTree(persistent=True)])
+def test_concurrent_writers(make):
+    tree = ConcurrentTree(make())
+
+    def writer(t):
+        for key in range(t * 500, t * 500 + 500):
+            tree.insert_node(key)
+        tree.delete_many(range(t * 500, t * 500 + 250))
+
+    threads = [threading.Thread(target=writer, args=(t,)) for t in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    expected = [k for t in range(4) for k in range(t * 500 + 250, t * 500 + 500)]
+    assert tree.range() == expected
+    tree_checks.check(tree.tree)
+    found, version = tree.search_versioned(expected[0])
+    assert found and tree.is_current(version)
+
+
+@pytest.mark.parametrize('make, bad', [(PoolAVLTree, 2 ** 70), (AVLTreeArray, 2 ** 70), (AVLTree, 'x')])
+def test_concurrent_failing_write_is_isolated(make, bad):
+    tree = ConcurrentTree(make())
+    # ops queued by other threads, drained by the next writer
+    queued = [Future() for _ in range(4)]
+    tree.pending = [('insert', 5, queued[0]), ('insert_many', [bad], queued[1]),
+                    ('insert', 7, queued[2]), ('insert', bad, queued[3])]
+    tree.insert_node(8)
+    assert queued[1].exception() is not None and queued[3].exception() is not None
+    assert queued[0].exception() is None and queued[2].exception() is None
+    assert tree.range() == [5, 7, 8]
+    assert tree.version == 1
+    with pytest.raises(Exception):
+        tree.insert_many([bad])
+    assert tree.version == 2
+
+
+# SAVE / LOAD
+
+SAVED = {
+    'pool': lambda: PoolAVLTree(order_stats=True),
+    'heap': lambda: AVLTreeArray(order_stats=True),
+    'heap-paged': lambda: AVLTreeArray(order_stats=True, page_size=8),
+}
+
+
+def random_writes(tree, seed, n=800):
+    rng = random.Random(seed)
+    for _ in range(n):
+        key = rng.randrange(1000)
+        if rng.random() < 0.7:
+            tree.insert_node(key)
+        else:
+            tree.delete_node(key)
+    return tree
+
+
+@pytest.mark.parametrize('kind', SAVED)
+@pytest.mark.parametrize('mmap', [True, False])
+def test_save_load(tmp_path, kind, mmap):
+    tree = random_writes(SAVED[kind](), 8)
+    path = tmp_path / 'tree.bin'
+    tree.save(path)
+    loaded = type(tree).load(path, mmap=mmap)
+    assert list(loaded) == list(tree)
+    assert loaded.select(10) == tree.select(10)
+    assert tree_checks.check(loaded) == tree_checks.check(tree)
+    if not mmap:
+        loaded.insert_node(5000)
+        tree_checks.check(loaded)
+
+
+@pytest.mark.parametrize('kind', SAVED)
+def test_mapped_trees_are_read_only(tmp_path, kind):
+    tree = random_writes(SAVED[kind](), 10)
+    tree.save(tmp_path / 'tree.bin')
+    loaded = type(tree).load(tmp_path / 'tree.bin')
+    assert loaded.read_only
+    writers = [lambda: loaded.insert_node(5000), lambda: loaded.delete_node(list(tree)[0]),
+               lambda: loaded.insert_many([5000, 5001]), lambda: loaded.delete_many(list(tree)),
+               lambda: loaded.shrink() if hasattr(loaded, 'shrink') else loaded.compact()]
+    for write in writers:
+        with pytest.raises(RuntimeError, match='read-only'):
+            write()
+    assert tree_checks.check(loaded) == tree_checks.check(tree)
+    assert list(loaded) == list(tree)
+    assert not type(tree).load(tmp_path / 'tree.bin', mmap=False).read_only
+
+
+def test_failed_insert_leaves_the_pool_unchanged():
+    tree = PoolAVLTree.from_iterable(range(10))
+    tree.delete_node(3)
+    for key in (2 ** 40, -2 ** 40):
+        with pytest.raises(OverflowError):
+            tree.insert_node(key)
+    assert tree_checks.check(tree) == 9
+    tree.insert_node(3)
+    assert list(tree) == list(range(10))
+
+
+# SPLIT / JOIN / SET ALGEBRA
+
+JOIN_TREES = {
+    'reference': lambda keys: AVLTree.from_iterable(keys),
+    'reference-compact': lambda keys: AVLTree.from_iterable(keys, compact=True, order_stats=True),
+    'pool': lambda keys: PoolAVLTree.from_iterable(keys, order_stats=True),
+}
+
+
+def random_keys(seed, n, universe=2000):
+    return set(random.Random(seed).sample(range(universe), n))
+
+
+@pytest.mark.parametrize('kind', JOIN_TREES)
+@pytest.mark.parametrize('pivot', [-1, 0, 777, 1000, 5000])
+def test_split_and_join(kind, pivot):
+    keys = random_keys(1, 600) | {1000}
+    tree = JOIN_TREES[kind](keys)
+    left, hit, right = tree.split(pivot)
+    assert hit == (pivot in keys)
+    assert list(left) == sorted(k for k in keys if k < pivot)
+    assert list(right) == sorted(k for k in keys if k > pivot)
+    tree_checks.check(left)
+    tree_checks.check(right)
+    assert left.order_stats == tree.order_stats
+    if isinstance(tree, AVLTree):
+        assert left.compact == tree.compact and left.node_type is tree.node_type
+
+    joined = type(tree).join(left, pivot if hit else None, right)
+    assert tree_checks.check(joined) == len(keys)
+    assert list(joined) == sorted(keys)
+
+
+@pytest.mark.parametrize('kind', JOIN_TREES)
+@pytest.mark.parametrize('op', ['union', 'intersection', 'difference'])
+@pytest.mark.parametrize('sizes', [(500, 500), (800, 20), (20, 800), (0, 300), (300, 0)])
+def test_set_operations(kind, op, sizes):
+    a_keys = random_keys(2, sizes[0])
+    b_keys = random_keys(3, sizes[1])
+    a = JOIN_TREES[kind](a_keys)
+    b = JOIN_TREES[kind](b_keys)
+    getattr(a, op)(b)
+    expected = {'union': a_keys | b_keys, 'intersection': a_keys & b_keys,
+                'difference': a_keys - b_keys}[op]
+    assert tree_checks.check(a) == len(expected)
+    assert list(a) == sorted(expected)
+    # other is left untouched
+    assert tree_checks.check(b) == len(b_keys)
+    assert list(b) == sorted(b_keys)
+
+
+@pytest.mark.parametrize('kind', JOIN_TREES)
+def test_parallel_set_operation(kind):
+    a_keys = random_keys(4, 900)
+    b_keys = random_keys(5, 900)
+    a = JOIN_TREES[kind](a_keys)
+    a.union(JOIN_TREES[kind](b_keys), workers=2)
+    assert tree_checks.check(a) == len(a_keys | b_keys)
+    assert list(a) == sorted(a_keys | b_keys)
+    if a.order_stats:
+        assert a.select(100) == sorted(a_keys | b_keys)[100]
+
+
+# SHARDED TREE
+
+def test_sharded_tree():
+    rng = np.random.default_rng(14)
+    oracle = set()
+    # skewed batches force a rebalance
+    with ShardedTree(workers=2, skew_factor=1.5, min_rebalance=500) as tree:
+        for step in range(6):
+            batch = rng.integers(1000 * step, 1000 * step + 1000, 800)
+            tree.insert_many(batch)
+            oracle.update(batch.tolist())
+            gone = rng.integers(0, 3000, 300)
+            tree.delete_many(gone)
+            oracle.difference_update(gone.tolist())
+        assert len(tree) == len(oracle)
+        queries = rng.integers(-10, 7000, 2000)
+        assert tree.search_many(queries).tolist() == [q in oracle for q in queries.tolist()]
+
+
+# TYPED KEYS AND VALUES
+
+@pytest.mark.parametrize('cls', [PoolAVLTree, AVLTreeArray])
+@pytest.mark.parametrize('key_dtype', [np.int64, np.uint64, np.float64])
+@pytest.mark.parametrize('value_dtype', [np.int64, object])
+def test_typed_maps(cls, key_dtype, value_dtype):
+    tree = cls(key_dtype=key_dtype, value_dtype=value_dtype)
+    rng = random.Random(6)
+    oracle = {}
+    for _ in range(1500):
+        # keys past the int32 / float32 range
+        key = rng.randrange(500) * 2 ** 40 if key_dtype != np.float64 else rng.randrange(500) + 0.5
+        op = rng.random()
+        if op < 0.5:
+            tree.put(key, rng.randrange(10 ** 9))
+            oracle[key] = tree.get(key)
+        elif op < 0.8:
+            assert tree.pop(key, None) == oracle.pop(key, None)
+        else:
+            assert tree.get(key) == oracle.get(key)
+    tree_checks.check(tree)
+    assert dict(tree.items()) == oracle
+
+
+@pytest.mark.parametrize('cls', [PoolAVLTree, AVLTreeArray])
+def test_bytes_keys(cls):
+    words = [w.encode() for w in ('pear', 'apple', 'fig', 'kiwi', 'banana', 'cherry')]
+    tree = cls(key_dtype='S8', value_dtype=np.int64)
+    for i, w in enumerate(words):
+        tree.put(w, i)
+    assert list(tree) == sorted(words)
+    assert tree.get(b'fig') == 2
+    tree.delete_node(b'kiwi')
+    assert b'kiwi' not in list(tree)
+    tree_checks.check(tree)
+
+
+@pytest.mark.parametrize('cls', [PoolAVLTree, AVLTreeArray])
+def test_from_sorted_with_values(cls):
+    keys = np.arange(0, 3000, 3)
+    tree = cls.from_sorted(keys, key_dtype=np.int64, value_dtype=np.int64, values=keys * 2)
+    tree_checks.check(tree)
+    assert dict(tree.items()) == {int(k): int(2 * k) for k in keys}
+
+
+def test_values_follow_compaction_and_set_operations():
+    a = PoolAVLTree(order_stats=True, value_dtype=np.int64)
+    b = PoolAVLTree(value_dtype=np.int64)
+    for k in range(0, 300, 2):
+        a.put(k, k)
+    for k in range(0, 300, 3):
+        b.put(k, -k)
+    for k in range(0, 300, 4):
+        a.pop(k)
+    a.compact('bfs', True)
+    a.union(b)
+    expected = {k: -k for k in range(0, 300, 3)}
+    expected.update({k: k for k in range(0, 300, 2) if k % 4})
+    tree_checks.check(a)
+    assert dict(a.items()) == expected
+
+
+@pytest.mark.parametrize('cls', [PoolAVLTree, AVLTreeArray])
+def test_batches_check_the_key_range(cls):
+    # int32 keys by default; NumPy would wrap 2**40 around to 0
+    for bad in ([2 ** 40, 5], np.array([2 ** 40, 1]), [2 ** 70], [-2 ** 31 - 1]):
+        with pytest.raises(OverflowError):
+            cls.from_iterable(bad)
+        tree = cls.from_iterable([1, 2, 3])
+        with pytest.raises(OverflowError):
+            tree.insert_many(bad)
+        with pytest.raises(OverflowError):
+            tree.insert_node(bad[0])
+        assert list(tree) == [1, 2, 3]
+    with pytest.raises(OverflowError):
+        cls.from_sorted(np.array([1, 2 ** 33]))
+    with pytest.raises(OverflowError):
+        cls(key_dtype=np.uint64).insert_many([-1, 1])
+    with pytest.raises(ValueError):
+        cls(key_dtype='S4').insert_many([b'abcdef'])
+    # keys out of range cannot be in the tree, deleting them is a no-op
+    tree = cls.from_iterable(range(10))
+    tree.delete_many([2 ** 32 + 5, 2 ** 70, -2 ** 40, 7])
+    assert list(tree) == [0, 1, 2, 3, 4, 5, 6, 8, 9]
+    tree_checks.check(tree)
+
+
+@pytest.mark.parametrize('kind', SAVED)
+def test_save_load_values(tmp_path, kind):
+    tree = type(SAVED[kind]())(key_dtype=np.int64, value_dtype=np.float64)
+    for key in random.Random(9).sample(range(10 ** 6), 500):
+        tree.put(key, key / 4)
+    tree.save(tmp_path / 'tree.bin')
+    loaded = type(tree).load(tmp_path / 'tree.bin')
+    assert loaded.key_dtype == np.int64
+    assert dict(loaded.items()) == dict(tree.items())
+
+
+# OPERATION COUNTERS
+
+@pytest.mark.parametrize('kind', ALL_TREES)
+def test_stats_stop_counting_after_close(kind):
+    tree = ALL_TREES[kind]()
+    with tree_stats.instrument(tree) as stats:
+        for key in range(200):
+            tree.insert_node(key)
+        tree.delete_node(100)
+    assert stats.comparisons > 0 and stats.height_updates > 0
+    assert stats.single_rotations > 0
+    before = (stats.comparisons, stats.height_updates, stats.single_rotations)
+    for key in range(200, 400):
+        tree.insert_node(key)
+    assert (stats.comparisons, stats.height_updates, stats.single_rotations) == before
+    assert not tree.__dict__.keys() & {'insert_node', 'r_rotate', 'rotate_right', 'update_height'}
+    tree_checks.check(tree)
+
+
+def test_stats_split_trees_do_not_count():
+    tree = AVLTree.from_iterable(range(300), compact=True)
+    stats = tree_stats.instrument(tree)
+    tree.insert_node(1000)
+    left, _, right = tree.split(150)
+    stats.close()
+    before = stats.height_updates
+    for key in range(2000, 2100):
+        left.insert_node(key)
+        right.insert_node(key + 1000)
+    assert stats.height_updates == before
+    assert left.compact and type(left.root).__name__ == 'SlotNode'
+    assert not any(name in t.__dict__ for t in (tree, left, right) for name in tree_stats.HEIGHT_WRITERS)
+
+
+# BENCHMARK RUNNER
+
+def test_benchmark_run_and_compare(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    argv = ['run', '--n', '300', '--batch-size', '100', '--repeat', '1', '--warmup', '0',
+            '--impl', 'reference', 'heap', '--out', 'results.json']
+    assert benchmark.main(argv) == 0
+    with open('results.json') as f:
+        doc = json.load(f)
+    assert set(doc['results']) == {'reference', 'heap'}
+    assert doc['results']['heap']['insert']['x'] == [100, 200, 300]
+    assert doc['results']['heap']['delete']['x'] == [300, 200, 100]
+    assert benchmark.main(['compare', 'results.json', 'results.json']) == 0
+    # a baseline twice as fast is a regression
+    for ops in doc['results'].values():
+        for res in ops.values():
+            res['median'] = [t / 2 for t in res['median']]
+    with open('baseline.json', 'w') as f:
+        json.dump(doc, f)
+    assert benchmark.main(['compare', 'results.json', 'baseline.json']) == 1
+
+
+# WORKLOADS
+
+@pytest.mark.parametrize('name', sorted(workloads.WORKLOADS))
+def test_workloads_are_valid_and_seeded(name):
+    # inserts add new keys, lookups and deletes only touch live ones
+    live = set()
+    for op, keys in workloads.make(name, 2000, 128, seed=3):
+        assert keys.dtype == np.int64
+        keys = keys.tolist()
+        if op == 'insert':
+            assert not live & set(keys) and len(set(keys)) == len(keys)
+            live.update(keys)
+        elif op == 'search':
+            assert set(keys) <= live
+        else:
+            assert set(keys) <= live and len(set(keys)) == len(keys)
+            live.difference_update(keys)
+    if name != 'mixed':
+        assert not live
+    first = [k.tolist() for _, k in workloads.make(name, 2000, 128, seed=3)]
+    again = [k.tolist() for _, k in workloads.make(name, 2000, 128, seed=3)]
+    assert first == again
+
+
+def test_run_ops():
+    tree = AVLTreeArray(key_dtype=np.int64)
+    stream = list(workloads.make('mixed', 1000, 100))
+    workloads.run_ops(tree, stream)
+    live = set()
+    for op, keys in stream:
+        if op == 'insert':
+            live.update(keys.tolist())
+        elif op == 'delete':
+            live.difference_update(keys.tolist())
+    assert list(tree) == sorted(live)
+
+
+# DATASETS
+
+def test_dataset_cache(tmp_path):
+    keys = np.array([5, 17, 3, 99, 42])
+    (tmp_path / 'data_5.txt').write_text('\n'.join(map(str, keys)) + '\n')
+    data = dataset_cache.load(5, tmp_path)
+    assert data.tolist() == keys.tolist() and isinstance(data, np.memmap)
+    assert (tmp_path / 'data_5.npy').exists()
+    # missing sizes are generated straight into the cache
+    data = dataset_cache.load(1000, tmp_path)
+    assert len(np.unique(data)) == 1000 and data.min() >= 1 and data.max() < 10000
+    assert dataset_cache.load(1000, tmp_path).tolist() == data.tolist()
+
+
+def test_search_samples():
+    data = dataset_cache.generate(1050, seed=1)
+    samples = dataset_cache.search_samples(data, 100, seed=2)
+    assert len(samples) == 11
+    for i, sample in enumerate(samples):
+        inserted = set(data[:min(100 * (i + 1), len(data))].tolist())
+        assert len(sample) == 100 and len(set(sample.tolist())) == 100
+        assert set(sample.tolist()) <= inserted
+
+
+# MEMORY FOOTPRINT
+
+@pytest.mark.parametrize('kind', ALL_TREES)
+def test_memory_footprint(kind):
+    tree = ALL_TREES[kind]()
+    assert tree.memory_footprint()['size'] == 0
+    tree.insert_many(random.Random(15).sample(range(10 ** 6), 3000))
+    tree.delete_many(list(tree)[::3])
+    info = tree.memory_footprint()
+    assert info['size'] == len(list(tree)) == 2000
+    assert info['total_bytes'] == info['live_bytes'] + info['slack_bytes']
+    assert 0 < info['payload_bytes'] <= info['live_bytes'] and info['slack_bytes'] >= 0
+    assert info['bytes_per_key'] == info['total_bytes'] / 2000
+    if kind == 'reference':
+        assert info['live_bytes'] == sum(tree.node_size() + sys.getsizeof(k) for k in tree)
+    else:
+        assert info['payload_bytes'] == 2000 * tree.key_dtype.itemsize
+    if kind == 'pool':
+        tree.compact(shrink=True)
+        assert tree.memory_footprint()['slack_bytes'] == 0
+
+
+# SEARCH CACHE
+
+@pytest.mark.parametrize('kind', ALL_TREES)
+def test_cache_stays_correct_under_writes(kind):
+    tree = ALL_TREES[kind]()
+    uncached = ALL_TREES[kind]()
+    cache = tree_cache.cache(tree, 64)
+    rng = random.Random(9)
+    for step in range(3000):
+        key = rng.randrange(300)
+        op = rng.random()
+        if op < 0.3:
+            tree.insert_node(key)
+            uncached.insert_node(key)
+        elif op < 0.45:
+            tree.delete_node(key)
+            uncached.delete_node(key)
+        elif op < 0.47:
+            batch = rng.sample(range(300), 40)
+            tree.insert_many(batch)
+            uncached.insert_many(batch)
+        else:
+            result = tree.search_node(key)
+            if uncached.search_node(key) not in (None, -1):
+                assert key_at(tree, result) == key
+            else:
+                assert result in (None, -1)
+    assert cache.hits > 0
+    cache.close()
+    assert 'search_node' not in tree.__dict__
+
+
+@pytest.mark.parametrize('kind', JOIN_TREES)
+def test_cache_follows_join_split_and_set_operations(kind):
+    left = JOIN_TREES[kind](range(0, 10))
+    right = JOIN_TREES[kind](range(20, 30))
+    caches = [tree_cache.cache(left), tree_cache.cache(right)]
+    # cached misses on both sides
+    assert left.search_node(10) in (None, -1) and left.search_node(25) in (None, -1)
+    assert right.search_node(10) in (None, -1)
+    tree = type(left).join(left, 10, right)
+    assert key_at(tree, tree.search_node(10)) == 10
+    assert key_at(tree, tree.search_node(25)) == 25
+    assert tree.search_node(15) in (None, -1)
+    tree.union(JOIN_TREES[kind]([15]))
+    assert key_at(tree, tree.search_node(15)) == 15
+    lo, _, hi = tree.split(20)
+    for half in (lo, hi):
+        assert [key_at(half, half.search_node(k)) for k in half] == list(half)
+    # only the methods are shadowed, the compact flag stays a flag
+    if isinstance(tree, AVLTree):
+        assert tree.compact is lo.compact is (kind == 'reference-compact')
+        assert lo.node_type is tree.node_type
+    for cache in caches:
+        cache.close()
+
+
+@pytest.mark.parametrize('kind', ALL_TREES)
+def test_cache_follows_batches(kind):
+    tree = ALL_TREES[kind]()
+    cache = tree_cache.cache(tree)
+    assert tree.search_node(5) in (None, -1)
+    tree.insert_many(range(1000))
+    assert key_at(tree, tree.search_node(5)) == 5
+    tree.delete_many(range(900))
+    assert tree.search_node(5) in (None, -1)
+    if isinstance(tree, PoolAVLTree):
+        tree.compact()
+    assert key_at(tree, tree.search_node(950)) == 950
+    cache.close()
+
+
+def key_at(tree, result):
+    if isinstance(tree, AVLTree):
+        return result.key
+    return tree.keys[result] if isinstance(tree, PoolAVLTree) else tree.tree[result]
+
+
+# FINGER SEARCH
+
+@pytest.mark.parametrize('kind', ['pool', 'heap', 'heap-paged'])
+def test_finger_search_matches_search_node(kind):
+    tree = ALL_TREES[kind]()
+    keys = sorted(random_keys(16, 800, 5000))
+    tree.insert_many(keys)
+    rng = random.Random(17)
+    # sorted, nearly sorted and random queries, with writes in between
+    queries = list(range(0, 5000, 3)) + [k + rng.randrange(-20, 20) for k in keys] \
+        + rng.sample(range(5000), 500)
+    for i, q in enumerate(queries):
+        if i % 97 == 0:
+            tree.insert_node(q + 1)
+            tree.delete_node(q - 1)
+        assert tree.finger_search(q) == tree.search_node(q)
+
+
+# FROZEN SNAPSHOTS
+
+@pytest.mark.parametrize('kind', ALL_TREES)
+@pytest.mark.parametrize('n', [0, 1, 500])
+def test_freeze(kind, n):
+    tree = ALL_TREES[kind]()
+    keys = random_keys(12, n, 5000)
+    tree.insert_many(keys)
+    frozen = tree.freeze()
+    ordered = sorted(keys)
+    assert list(frozen) == ordered and len(frozen) == n
+    queries = np.arange(-5, 5005)
+    pos = frozen.search_many(queries)
+    for q, p in zip(queries.tolist(), pos.tolist()):
+        assert p == (ordered.index(q) if q in keys else -1)
+    assert frozen.contains_many(queries).sum() == n
+    # later writes do not reach the snapshot
+    tree.insert_node(6000)
+    assert 6000 not in frozen
+
+
+def test_freeze_values():
+    tree = AVLTreeArray(key_dtype=np.int64, value_dtype=np.float64)
+    for key in range(0, 100, 5):
+        tree.put(key, key / 2)
+    got = tree.freeze().get_many(np.arange(100), default=-1.0)
+    assert got.tolist() == [k / 2 if k % 5 == 0 else -1.0 for k in range(100)]
+
+
+# BATCH SEARCH
+
+@pytest.mark.parametrize('kind', ['pool', 'heap', 'heap-paged'])
+def test_search_many_matches_search_node(kind):
+    tree = ALL_TREES[kind]()
+    keys = random_keys(10, 700, 5000)
+    tree.insert_many(keys)
+    tree.delete_many(list(keys)[:100])
+    keys = set(list(keys)[100:])
+    queries = np.array(random.Random(11).sample(range(-10, 5010), 2000), dtype=np.int64)
+    result = tree.search_many(queries)
+    for q, i in zip(queries.tolist(), result.tolist()):
+        assert (i != -1) == (q in keys)
+        if i != -1:
+            assert tree.search_node(q) == i
+    assert len(tree.search_many(np.array([], dtype=np.int64))) == 0
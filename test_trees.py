@@ -0,0 +1,356 @@
+import random
+import numpy as np
+import pytest
+
+from avl_reference import AVLTree
+from avl_array import AVLTreeArray as PoolAVLTree
+from avl_binary import AVLTreeArray
+import tree_checks
+import tree_pages
+
+# Randomized oracle tests: single-key and batch operations against a
+# Python set, with tree_checks.check on the tree's storage along the way.
+# Run with python -m pytest (test_binary.py / test_reference.py are the
+# interactive menus).
+
+TREES = {
+    'reference': lambda: AVLTree(),
+    'reference-compact': lambda: AVLTree(compact=True),
+    'persistent': lambda: AVLTree(persistent=True, order_stats=True),
+    'pool': lambda: PoolAVLTree(),
+    'heap': lambda: AVLTreeArray(),
+    'heap-paged': lambda: AVLTreeArray(page_size=8),
+}
+
+KEYS = 400
+
+
+def found(result):
+    # node or None for AVLTree, index or -1 for the array trees
+    return result is not None and not (isinstance(result, (int, np.integer)) and result == -1)
+
+
+def check_against(tree, oracle):
+    assert tree_checks.check(tree) == len(oracle)
+    assert list(tree) == sorted(oracle)
+
+
+@pytest.mark.parametrize('kind', TREES)
+@pytest.mark.parametrize('seed', [0, 1])
+def test_random_operations(kind, seed):
+    rng = random.Random(seed)
+    tree = TREES[kind]()
+    oracle = set()
+    for step in range(1500):
+        key = rng.randrange(KEYS)
+        if rng.random() < 0.6:
+            tree.insert_node(key)
+            oracle.add(key)
+        else:
+            tree.delete_node(key)
+            oracle.discard(key)
+        if step % 100 == 99:
+            check_against(tree, oracle)
+
+    check_against(tree, oracle)
+    for key in range(KEYS):
+        assert found(tree.search_node(key)) == (key in oracle)
+
+
+@pytest.mark.parametrize('kind', TREES)
+@pytest.mark.parametrize('order', ['increasing', 'decreasing'])
+def test_monotone_inserts(kind, order):
+    # every insert rotates at the right spine / left spine
+    tree = TREES[kind]()
+    keys = list(range(300)) if order == 'increasing' else list(range(300, 0, -1))
+    for i, key in enumerate(keys):
+        tree.insert_node(key)
+        if i % 25 == 0:
+            tree_checks.check(tree)
+    check_against(tree, set(keys))
+    for key in keys[::2]:
+        tree.delete_node(key)
+    check_against(tree, set(keys[1::2]))
+
+
+# SLOT REUSE (avl_array)
+
+def test_pool_reuses_deleted_slots():
+    tree = PoolAVLTree()
+    for key in range(500):
+        tree.insert_node(key)
+    used = tree.free_idx
+    for key in range(0, 500, 2):
+        tree.delete_node(key)
+    for key in range(1000, 1250):
+        tree.insert_node(key)
+    assert tree.free_idx == used
+    check_against(tree, set(range(1, 500, 2)) | set(range(1000, 1250)))
+
+
+@pytest.mark.parametrize('order', ['inorder', 'bfs'])
+@pytest.mark.parametrize('shrink', [False, True])
+def test_pool_compact(order, shrink):
+    tree = PoolAVLTree()
+    rng = random.Random(11)
+    oracle = set()
+    for _ in range(1500):
+        key = rng.randrange(600)
+        if rng.random() < 0.6:
+            tree.insert_node(key)
+            oracle.add(key)
+        else:
+            tree.delete_node(key)
+            oracle.discard(key)
+    tree.compact(order, shrink)
+    assert tree.free_head == -1
+    assert tree.free_idx == len(oracle)
+    check_against(tree, oracle)
+    tree.insert_node(10 ** 6)
+    tree_checks.check(tree)
+
+
+# GROWTH / SHRINK
+
+@pytest.mark.parametrize('kind', ['pool', 'heap', 'heap-paged'])
+def test_storage_grows_on_demand(kind):
+    tree = TREES[kind]()
+    keys = random.Random(4).sample(range(10 ** 6), 3000)
+    for key in keys:
+        tree.insert_node(key)
+    check_against(tree, set(keys))
+
+
+def test_heap_shrink():
+    tree = AVLTreeArray()
+    for key in range(1000):
+        tree.insert_node(key)
+    for key in range(100, 1000):
+        tree.delete_node(key)
+    tree.shrink()
+    assert tree.capacity == 127
+    check_against(tree, set(range(100)))
+
+
+# BULK LOAD
+
+@pytest.mark.parametrize('kind', TREES)
+def test_bulk_load(kind):
+    keys = random.Random(3).sample(range(10 ** 6), 1000)
+    tree = type(TREES[kind]()).from_iterable(keys + keys[:100])
+    check_against(tree, set(keys))
+    tree = type(TREES[kind]()).from_sorted(sorted(keys))
+    check_against(tree, set(keys))
+    assert type(tree).from_sorted([]).search_node(5) in (None, -1)
+
+
+# BATCHES
+
+@pytest.mark.parametrize('kind', TREES)
+@pytest.mark.parametrize('seed', [0, 1])
+def test_random_batches(kind, seed):
+    # small batches go key by key, large ones rebuild or join
+    rng = random.Random(seed)
+    tree = TREES[kind]()
+    oracle = set()
+    for step in range(300):
+        batch = rng.sample(range(KEYS), rng.choice((3, 40, 150)))
+        if rng.random() < 0.55:
+            tree.insert_many(batch)
+            oracle.update(batch)
+        else:
+            tree.delete_many(batch)
+            oracle.difference_update(batch)
+        if step % 20 == 19:
+            check_against(tree, oracle)
+    check_against(tree, oracle)
+    # unsorted batches with duplicates and absent keys
+    tree.insert_many([7, 3, 7, 3])
+    tree.delete_many([KEYS + 1, 7, 7])
+    check_against(tree, (oracle | {3}) - {7})
+
+
+# NODE TYPES (avl_reference)
+
+def test_compact_nodes():
+    tree = TREES['reference-compact']()
+    for key in range(100):
+        tree.insert_node(key)
+    assert all(not hasattr(node, '__dict__') for node in iter_nodes(tree.root))
+    check_against(tree, set(range(100)))
+    assert tree.empty_like().node_type is tree.node_type
+
+
+def iter_nodes(node):
+    stack = [node] if node is not None else []
+    while stack:
+        node = stack.pop()
+        yield node
+        stack.extend(c for c in (node.left, node.right) if c is not None)
+
+
+# ORDER STATISTICS
+
+ORDERED = {
+    'reference': lambda: AVLTree(order_stats=True),
+    'reference-compact': lambda: AVLTree(compact=True, order_stats=True),
+    'pool': lambda: PoolAVLTree(order_stats=True),
+    'heap': lambda: AVLTreeArray(order_stats=True),
+}
+
+
+@pytest.mark.parametrize('kind', ORDERED)
+def test_order_statistics(kind):
+    rng = random.Random(2)
+    tree = ORDERED[kind]()
+    oracle = set()
+    for step in range(1500):
+        key = rng.randrange(KEYS)
+        op = rng.random()
+        if op < 0.5:
+            tree.insert_node(key)
+            oracle.add(key)
+        elif op < 0.8:
+            tree.delete_node(key)
+            oracle.discard(key)
+        elif op < 0.9:
+            batch = rng.sample(range(KEYS), rng.choice((3, 150)))
+            tree.insert_many(batch)
+            oracle.update(batch)
+        else:
+            batch = rng.sample(range(KEYS), rng.choice((3, 150)))
+            tree.delete_many(batch)
+            oracle.difference_update(batch)
+        if step % 100 == 99:
+            check_against(tree, oracle)
+    keys = sorted(oracle)
+    for k in range(0, len(keys), 7):
+        assert tree.select(k) == keys[k]
+        assert tree.rank(keys[k]) == k
+    assert tree.count_range(100, 300) == sum(1 for k in keys if 100 <= k < 300)
+
+
+def test_counts_only_with_order_stats():
+    assert not hasattr(AVLTree.from_iterable(range(10), compact=True).root, 'count')
+    assert AVLTree.from_iterable(range(10), order_stats=True).root.count == 10
+
+
+# ITERATION / RANGE SCANS
+
+@pytest.mark.parametrize('kind', TREES)
+def test_range_scans(kind):
+    keys = sorted(random.Random(6).sample(range(5000), 800))
+    tree = type(TREES[kind]()).from_iterable(keys)
+    assert list(reversed(tree)) == keys[::-1]
+    for lo, hi in [(None, None), (None, 100), (2500, None), (1000, 1000), (-5, 7000), (1234, 3456)]:
+        expected = [k for k in keys if (lo is None or k >= lo) and (hi is None or k < hi)]
+        assert list(tree.range(lo, hi)) == expected
+        if hasattr(tree, 'iter_chunks'):
+            chunks = list(tree.iter_chunks(64, lo, hi))
+            assert all(len(c) <= 64 for c in chunks)
+            assert [int(k) for c in chunks for k in c] == expected
+    # scans are lazy, a partial scan is fine
+    scan = tree.range(100)
+    assert next(scan) == next(k for k in keys if k >= 100)
+
+
+# PERSISTENCE (AVLTree persistent=True)
+
+def test_snapshots_are_isolated():
+    rng = random.Random(13)
+    tree = AVLTree(persistent=True, order_stats=True)
+    oracle = set()
+    snapshots = []
+    for step in range(1200):
+        key = rng.randrange(300)
+        if rng.random() < 0.6:
+            tree.insert_node(key)
+            oracle.add(key)
+        else:
+            tree.delete_node(key)
+            oracle.discard(key)
+        if step % 150 == 0:
+            snapshots.append((tree.snapshot(), sorted(oracle)))
+    check_against(tree, oracle)
+    for snap, keys in snapshots:
+        assert list(snap) == keys
+        assert tree_checks.check_nodes(snap.root, True) == len(keys)
+        if keys:
+            assert snap.select(len(keys) // 2) == keys[len(keys) // 2]
+
+
+def test_persistent_writers_copy_the_path():
+    tree = AVLTree.from_iterable(range(100), persistent=True)
+    before = tree.snapshot()
+    nodes = {id(node) for node in iter_nodes(before.root)}
+    tree.insert_node(1000)
+    tree.delete_node(50)
+    assert list(before) == list(range(100))
+    # untouched subtrees are shared, the written path is new
+    after = {id(node) for node in iter_nodes(tree.root)}
+    assert nodes & after and after - nodes
+
+
+# PAGED STORAGE (avl_binary page_size)
+
+def test_heap_rotations_keep_dense_and_paged_identical():
+    rng = random.Random(5)
+    dense = AVLTreeArray(order_stats=True)
+    paged = AVLTreeArray(order_stats=True, page_size=4)
+    for _ in range(2000):
+        key = rng.randrange(1000)
+        if rng.random() < 0.6:
+            dense.insert_node(key)
+            paged.insert_node(key)
+        else:
+            dense.delete_node(key)
+            paged.delete_node(key)
+    tree_checks.check(paged)
+    assert paged.capacity == dense.capacity
+    assert np.array_equal(np.asarray(paged.height), dense.height)
+    live = dense.height != 0
+    assert np.array_equal(np.asarray(paged.tree)[live], dense.tree[live])
+    assert np.array_equal(np.asarray(paged.count)[live], dense.count[live])
+
+
+def test_paged_pages_follow_the_live_slots():
+    tree = AVLTreeArray(page_size=16, value_dtype=object)
+    keys = list(range(2000))
+    random.Random(7).shuffle(keys)
+    for key in keys:
+        tree.put(key, str(key))
+    full = tree.store.pages
+    tree_checks.check(tree)
+    for key in keys[:1900]:
+        tree.delete_node(key)
+    tree_checks.check(tree)
+    assert tree.store.pages < full
+    assert all(tree.get(key) == str(key) for key in keys[1900:])
+    for key in keys[1900:]:
+        tree.delete_node(key)
+    assert tree.store.pages == 0
+    assert tree.memory_footprint()['size'] == 0
+
+
+def test_paged_writes_in_any_order():
+    store = tree_pages.PagedStore(100, 8)
+    height = store.column(np.int16, owner=True)
+    keys = store.column(np.int64)
+    values = store.column(object, None)
+    # keys / values before the heights, on absent pages
+    keys[np.array([3, 40])] = [7, 9]
+    values[40:42] = np.array(['a', 'b'], dtype=object)
+    assert (keys[3], keys[40], values[40], values[41]) == (7, 9, 'a', 'b')
+    height[np.array([3, 40, 41])] = 1
+    tree_checks.check_store(store)
+    # an emptied slot reads as fill in every column
+    height[40] = 0
+    assert (keys[40], values[40], values[41]) == (0, None, 'b')
+    tree_checks.check_store(store)
+    height[41:42] = 0
+    height[3:4] = 0
+    assert store.pages == 0
+    # writing fill values allocates nothing
+    keys[0:8] = 0
+    values[np.array([1, 2])] = None
+    assert store.pages == 0
@@ -0,0 +1,179 @@
+from collections import OrderedDict
+
+# Bounded LRU cache in front of search_node for AVLTree,
+# avl_array.AVLTreeArray and avl_binary.AVLTreeArray.
+# cache(tree, size) shadows search_node, insert_node and delete_node of
+# that one tree object (like tree_stats), close() removes them again.
+# Found and missing keys are both cached with whatever search_node
+# returned (node, index, None or -1).
+#
+# Invalidation:
+# (each after the write, searches made inside it may have cached k)
+#   insert_node(k)  drops k (a cached miss becomes wrong)
+#   delete_node(k)  drops k; AVLTree also drops the predecessor that was
+#                   copied into k's node, its old node left the tree
+#   any other write (batches, set operations, split / join, compact,
+#   avl_binary rebuild / shrink) bumps the tree's bulk_writes counter,
+#   a lookup that sees it changed clears everything first
+#   persistent AVLTree: every write clears (the written path is copied)
+# In the array trees nodes move between slots (avl_binary rotations
+# relocate whole subtrees, compact renumbers the pool), so a cached index
+# is only returned while its slot is live and still holds the key; a
+# moved key counts as stale and is looked up and remapped again.
+
+MISSING = object()
+
+
+def cache(tree, size=1024):
+    return SearchCache(tree, size)
+
+
+class SearchCache:
+    def __init__(self, tree, size=1024):
+        self.tree = tree
+        self.size = size
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.bulk_writes = tree.bulk_writes
+        # (attribute, previous instance value or None if it came from the class)
+        self.patched = []
+        self.install()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # INSTALL / REMOVE
+
+    def install(self):
+        tree = self.tree
+        if hasattr(tree, 'update_height'):
+            # avl_binary
+            self.valid = self.valid_slot(lambda: tree.tree)
+        elif hasattr(tree, 'free_head'):
+            # avl_array
+            self.valid = self.valid_slot(lambda: tree.keys)
+        else:
+            # AVLTree, nodes never move
+            self.valid = None
+
+        search = tree.search_node
+        self.patch('search_node', self.wrap_search(search))
+        persistent = getattr(tree, 'persistent', False)
+        for name in ('insert_node', 'delete_node'):
+            method = getattr(tree, name)
+            if persistent:
+                self.patch(name, self.wrap_clear(method))
+            elif name == 'delete_node' and self.valid is None:
+                self.patch(name, self.wrap_node_delete(method, search))
+            else:
+                self.patch(name, self.wrap_write(method))
+
+    def patch(self, name, value):
+        self.patched.append((name, self.tree.__dict__.get(name)))
+        setattr(self.tree, name, value)
+
+    def close(self):
+        for name, old in reversed(self.patched):
+            if old is None:
+                delattr(self.tree, name)
+            else:
+                setattr(self.tree, name, old)
+        self.patched = []
+        self.data.clear()
+
+    def valid_slot(self, keys):
+        # keys() -> the tree's current key column (columns are replaced on growth)
+        tree = self.tree
+
+        def valid(key, i):
+            if i == -1:
+                return True
+            height = tree.height
+            return i < len(height) and height[i] != 0 and keys()[i] == key
+        return valid
+
+    # WRAPPERS
+
+    def wrap_search(self, search):
+        tree = self.tree
+        data = self.data
+
+        def search_node(key):
+            if tree.bulk_writes != self.bulk_writes:
+                self.bulk_writes = tree.bulk_writes
+                self.clear()
+            result = data.get(key, MISSING)
+            if result is not MISSING:
+                if self.valid is None or self.valid(key, result):
+                    self.hits += 1
+                    data.move_to_end(key)
+                    return result
+                self.stale += 1
+            else:
+                self.misses += 1
+            result = search(key)
+            data[key] = result
+            data.move_to_end(key)
+            if len(data) > self.size:
+                data.popitem(last=False)
+                self.evictions += 1
+            return result
+        return search_node
+
+    def wrap_write(self, method):
+        def write(key, *args):
+            try:
+                return method(key, *args)
+            finally:
+                self.drop(key)
+        return write
+
+    def wrap_node_delete(self, method, search):
+        def delete_node(key):
+            node = search(key)
+            try:
+                method(key)
+            finally:
+                self.drop(key)
+            if node is not None and node.key != key:
+                # two children: the predecessor's key moved into this node
+                self.drop(node.key)
+        return delete_node
+
+    def wrap_clear(self, method):
+        def write(*args, **kwargs):
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.clear()
+        return write
+
+    def drop(self, key):
+        if self.data.pop(key, MISSING) is not MISSING:
+            self.invalidations += 1
+
+    def clear(self):
+        self.invalidations += len(self.data)
+        self.data.clear()
+
+    # REPORT
+
+    @property
+    def lookups(self):
+        return self.hits + self.misses + self.stale
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def report(self):
+        return (f"cache {len(self.data)}/{self.size} keys, {self.lookups} lookups, "
+                f"hit rate {self.hit_rate:.1%} ({self.hits} hits, {self.misses} misses, "
+                f"{self.stale} stale), {self.evictions} evictions, {self.invalidations} invalidations")
@@ -0,0 +1,107 @@
+import numpy as np
+import tree_pages
+
+# Structural invariant checks for the three trees, used by the tests.
+# check(tree) walks the tree's own storage and asserts search-tree order,
+# stored heights, AVL balance and (with order_stats) subtree counts, plus
+# the layout rules of each implementation; it returns the number of keys.
+
+
+def check(tree):
+    if hasattr(tree, 'update_height'):
+        return check_heap(tree)
+    if hasattr(tree, 'free_head'):
+        return check_pool(tree)
+    return check_nodes(tree.root, tree.order_stats)
+
+
+def check_nodes(root, order_stats=False):
+    # AVLTree / AVLSnapshot, root node -> size
+    def walk(node, lo, hi):
+        if node is None:
+            return 0, 0
+        assert lo is None or node.key > lo, "order"
+        assert hi is None or node.key < hi, "order"
+        hl, nl = walk(node.left, lo, node.key)
+        hr, nr = walk(node.right, node.key, hi)
+        assert node.height == 1 + max(hl, hr), "height"
+        assert abs(hl - hr) <= 1, "balance"
+        if order_stats:
+            assert node.count == 1 + nl + nr, "count"
+        return node.height, 1 + nl + nr
+    return walk(root, None, None)[1]
+
+
+def check_pool(tree):
+    # avl_array: every slot below free_idx is either reachable or free
+    reached = []
+
+    def walk(i, lo, hi):
+        if i == -1:
+            return 0, 0
+        reached.append(i)
+        key = tree.keys[i]
+        assert lo is None or key > lo, "order"
+        assert hi is None or key < hi, "order"
+        hl, nl = walk(tree.left[i], lo, key)
+        hr, nr = walk(tree.right[i], key, hi)
+        assert tree.height[i] == 1 + max(hl, hr), "height"
+        assert abs(hl - hr) <= 1, "balance"
+        if tree.order_stats:
+            assert tree.count[i] == 1 + nl + nr, "count"
+        return tree.height[i], 1 + nl + nr
+
+    size = walk(tree.root, None, None)[1]
+    free = []
+    i = tree.free_head
+    while i != -1:
+        free.append(i)
+        i = tree.left[i]
+    assert size == tree.size, "size"
+    assert not set(reached) & set(free), "free slot in use"
+    assert sorted(reached + free) == list(range(tree.free_idx)), "lost slot"
+    return size
+
+
+def check_heap(tree):
+    # avl_binary: children of slot i at 2i + 1 / 2i + 2, empty slots have
+    # height 0 and every live slot hangs under a live parent
+    def height(i):
+        return int(tree.height[i]) if i < tree.capacity else 0
+
+    def walk(i, lo, hi):
+        if height(i) == 0:
+            return 0, 0
+        key = tree.tree[i]
+        assert lo is None or key > lo, "order"
+        assert hi is None or key < hi, "order"
+        hl, nl = walk(2 * i + 1, lo, key)
+        hr, nr = walk(2 * i + 2, key, hi)
+        assert height(i) == 1 + max(hl, hr), "height"
+        assert abs(hl - hr) <= 1, "balance"
+        if tree.order_stats:
+            assert tree.count[i] == 1 + nl + nr, "count"
+        return height(i), 1 + nl + nr
+
+    size = walk(tree.root, None, None)[1]
+    assert len(tree_pages.flatnonzero(tree.height)) == size, "unreachable slot"
+    assert tree.size == size, "size"
+    if tree.store is not None:
+        check_store(tree.store)
+    return size
+
+
+def check_store(store):
+    # paged columns: live counts match, no page without a live slot and
+    # empty slots read as fill in every column
+    owner = store.owner
+    pages = np.flatnonzero(store.table >= 0)
+    for p in pages.tolist():
+        row = store.table[p]
+        live = owner.pool[row] != 0
+        assert store.live[row] == np.count_nonzero(live), "live count"
+        assert store.live[row] > 0, "empty page kept"
+        for col in store.columns:
+            if not col.owner:
+                assert not col.not_fill(col.pool[row][~live]).any(), "stale item"
+    assert len(pages) == store.pages, "page count"
@@ -0,0 +1,196 @@
+from array import array
+import sys
+import numpy as np
+
+# Typed key / value columns for the array-backed trees.
+# Keys are numeric (int32, int64, uint64, float64, ...) or fixed-width
+# bytes ('S<width>'), always stored unboxed. Values are the same numeric
+# types or object (plain Python references).
+
+
+def key_dtype(dtype):
+    dtype = np.dtype(dtype)
+    if dtype.kind not in 'iufS' or dtype.itemsize == 0:
+        raise TypeError(f"Unsupported key dtype {dtype}")
+    return dtype
+
+
+def value_dtype(dtype):
+    if dtype is None:
+        return None
+    dtype = np.dtype(dtype)
+    if dtype.kind not in 'iufSO' or dtype.itemsize == 0:
+        raise TypeError(f"Unsupported value dtype {dtype}")
+    return dtype
+
+
+# widest type of each key kind, batches are read into it before the checked cast
+WIDE = {'i': np.int64, 'u': np.uint64, 'f': np.float64, 'S': np.bytes_}
+
+
+def key_array(keys, dtype, drop=False):
+    # batch of keys -> array of the key dtype. NumPy would wrap out-of-range
+    # integers around (and cut long byte strings), so such keys raise like
+    # a single insert_node does, or with drop=True are left out (a delete
+    # cannot find them anyway)
+    if not isinstance(keys, np.ndarray):
+        keys = keys if isinstance(keys, (list, tuple)) else list(keys)
+        try:
+            keys = np.array(keys, dtype=WIDE[dtype.kind]) if dtype.kind == 'S' else \
+                np.fromiter(keys, dtype=WIDE[dtype.kind], count=len(keys))
+        except OverflowError:
+            keys = np.array(keys, dtype=object)
+    if keys.dtype == dtype or not len(keys):
+        return keys.astype(dtype, copy=False)
+    if dtype.kind in 'iu' and keys.dtype.kind in 'iufO':
+        info = np.iinfo(dtype)
+        bad = (keys < info.min) | (keys > info.max)
+    elif dtype.kind == 'S' and keys.dtype.kind == 'S' and keys.dtype.itemsize > dtype.itemsize:
+        bad = np.char.str_len(keys) > dtype.itemsize
+    else:
+        return keys.astype(dtype)
+    if bad.any():
+        if not drop:
+            key = keys[np.argmax(bad)]
+            key = key.item() if isinstance(key, np.generic) else key
+            if dtype.kind == 'S':
+                raise ValueError(f"Key {key!r} is longer than {dtype.itemsize} bytes")
+            raise OverflowError(f"Key {key} is out of range for {dtype}")
+        keys = keys[~bad]
+    return keys.astype(dtype)
+
+
+def scalar_type(dtype):
+    # Python type a stored item comes back as
+    if dtype.kind == 'S':
+        return bytes
+    if dtype.kind == 'f':
+        return float
+    if dtype.kind == 'O':
+        return object
+    return int
+
+
+def default_value(dtype):
+    return None if dtype.kind == 'O' else scalar_type(dtype)()
+
+
+class FixedBytes:
+    # Byte strings of at most `width` bytes packed into one buffer, shorter
+    # ones NUL padded like numpy's 'S' dtype, so trailing NULs are not kept.
+    # Padded order equals plain bytes order, comparisons need no decoding.
+
+    def __init__(self, width, n=0, buf=None):
+        self.width = width
+        self.itemsize = width
+        self.buf = bytearray(width * n) if buf is None else buf
+
+    def __len__(self):
+        return len(self.buf) // self.width
+
+    def __getitem__(self, i):
+        w = self.width
+        return bytes(self.buf[i * w:(i + 1) * w]).rstrip(b'\0')
+
+    def __setitem__(self, i, key):
+        w = self.width
+        if len(key) > w:
+            raise ValueError(f"Key {key!r} is longer than {w} bytes")
+        self.buf[i * w:(i + 1) * w] = bytes(key).ljust(w, b'\0')
+
+    def extend(self, other):
+        self.buf.extend(other.buf)
+
+    def __array__(self, dtype=None, copy=None):
+        return np.frombuffer(self.buf, dtype=f'S{self.width}')
+
+
+# pool columns (avl_array): array.array, FixedBytes or list for objects
+
+def new_column(dtype, n):
+    if dtype.kind == 'S':
+        return FixedBytes(dtype.itemsize, n)
+    if dtype.kind == 'O':
+        return [None] * n
+    # repeating one item allocates exactly n items (array(bytes) over-allocates)
+    return array(dtype.char, [0]) * n
+
+
+def column_from_numpy(values, dtype):
+    if dtype.kind == 'O':
+        return list(values)
+    data = np.ascontiguousarray(values, dtype=dtype).tobytes()
+    if dtype.kind == 'S':
+        return FixedBytes(dtype.itemsize, buf=bytearray(data))
+    col = new_column(dtype, len(data) // dtype.itemsize)
+    memoryview(col).cast('B')[:] = data
+    return col
+
+
+def column_to_numpy(col, dtype):
+    if dtype.kind == 'O':
+        return np.fromiter(col, dtype=object, count=len(col))
+    return np.asarray(col, dtype=dtype)
+
+
+def column_from_buffer(buf, dtype):
+    # buf: memoryview over mapped bytes (read-only, no copy) or bytes
+    if dtype.kind == 'S':
+        return FixedBytes(dtype.itemsize, buf=buf if isinstance(buf, memoryview) else bytearray(buf))
+    if isinstance(buf, memoryview):
+        return buf.cast(dtype.char)
+    col = array(dtype.char)
+    col.frombytes(buf)
+    return col
+
+
+# memory_footprint helpers
+
+def column_bytes(col):
+    # bytes allocated for a column's items (over-allocation included,
+    # container headers not); mapped columns count their mapped length
+    if col is None:
+        return 0
+    if isinstance(col, np.ndarray):
+        return col.nbytes
+    if isinstance(col, FixedBytes):
+        return column_bytes(col.buf)
+    if isinstance(col, array):
+        return sys.getsizeof(col) - sys.getsizeof(array(col.typecode))
+    if isinstance(col, (bytearray, list)):
+        return sys.getsizeof(col) - sys.getsizeof(type(col)())
+    if isinstance(col, memoryview):
+        return col.nbytes
+    # paged columns (tree_pages.py) count their allocated pages
+    return getattr(col, 'nbytes', len(col) * col.itemsize)
+
+
+def item_bytes(dtype):
+    # bytes per stored key / value, object columns hold one pointer
+    return 0 if dtype is None else dtype.itemsize
+
+
+def object_bytes(col, dtype):
+    # sizes of the objects referenced by an object column (None is shared)
+    if dtype is None or dtype.kind != 'O':
+        return 0
+    if hasattr(col, 'stored'):
+        # paged column: absent pages hold no objects
+        col = col.stored()
+    return sum(sys.getsizeof(v) for v in col if v is not None)
+
+
+def footprint(size, total, live, payload):
+    # total   bytes allocated by the tree
+    # live    bytes held by live nodes, the rest is slack (unused capacity,
+    #         free slots, heap holes)
+    # payload bytes of the keys and values themselves
+    return {
+        'size': size,
+        'total_bytes': total,
+        'live_bytes': live,
+        'slack_bytes': total - live,
+        'payload_bytes': payload,
+        'overhead_per_node': (live - payload) / size if size else 0.0,
+        'bytes_per_key': total / size if size else 0.0,
+    }
@@ -0,0 +1,73 @@
+import mmap
+import struct
+import numpy as np
+
+# Binary tree file:
+#   header   magic, format version, tree kind, number of meta fields and columns
+#   meta     (name, int64 value) per field
+#   columns  (name, numpy dtype string, length, byte offset) per column
+#   data     raw column buffers, each starting on an ALIGN boundary
+
+MAGIC = b'AVLT'
+FORMAT_VERSION = 1
+ALIGN = 64
+
+HEADER = struct.Struct('<4sI8sII')
+META = struct.Struct('<16sq')
+COLUMN = struct.Struct('<16s8sQQ')
+
+
+def align(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+def save_columns(path, kind, meta, columns):
+    # meta: name -> int, columns: name -> 1-d buffer (ndarray or array.array)
+    columns = {name: np.asarray(col) for name, col in columns.items()}
+
+    offset = align(HEADER.size + META.size * len(meta) + COLUMN.size * len(columns))
+    layout = []
+    for name, col in columns.items():
+        layout.append((name, col, offset))
+        offset = align(offset + col.nbytes)
+
+    with open(path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, kind, len(meta), len(columns)))
+        for name, value in meta.items():
+            f.write(META.pack(name.encode(), int(value)))
+        for name, col, off in layout:
+            f.write(COLUMN.pack(name.encode(), col.dtype.str.encode(), len(col), off))
+        for name, col, off in layout:
+            f.seek(off)
+            f.write(np.ascontiguousarray(col).data)
+        f.truncate(offset)
+
+
+def read_header(path, kind):
+    # -> (meta dict, {name: (dtype, length, offset)})
+    with open(path, 'rb') as f:
+        magic, version, file_kind, n_meta, n_columns = HEADER.unpack(f.read(HEADER.size))
+        file_kind = file_kind.rstrip(b'\0')
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a tree file")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Unsupported tree file version {version}")
+        if file_kind != kind:
+            raise ValueError(f"{path} holds a {file_kind.decode()} tree, not {kind.decode()}")
+
+        meta = {}
+        for _ in range(n_meta):
+            name, value = META.unpack(f.read(META.size))
+            meta[name.rstrip(b'\0').decode()] = value
+
+        columns = {}
+        for _ in range(n_columns):
+            name, dtype, length, offset = COLUMN.unpack(f.read(COLUMN.size))
+            columns[name.rstrip(b'\0').decode()] = (np.dtype(dtype.rstrip(b'\0').decode()), length, offset)
+    return meta, columns
+
+
+def map_file(path):
+    # read-only mapping of the whole file
+    with open(path, 'rb') as f:
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
@@ -0,0 +1,109 @@
+import numpy as np
+import tree_columns
+
+# Immutable read-only snapshot of a tree, made by tree.freeze().
+# The keys sit in one contiguous NumPy array in Eytzinger (BFS) order:
+# slot 1 is the root, the children of slot k are 2k and 2k + 1, slot 0 is
+# unused. There are no holes, no links and no heights, a key costs only its
+# own bytes (plus 8 for its sorted position).
+#
+# search_many runs all queries down the levels together: one gather, one
+# compare and one shift-add per level, no per-key Python work. A query
+# that walks off the last level keeps turning right, so at the end the
+# trailing ones of its path (plus the left turn before them) are stripped
+# and what remains is the slot of the first key >= the query.
+# Results are positions in sorted order (0 .. n-1), -1 if missing.
+
+
+def eytzinger_slots(n):
+    # -> slot of the r-th smallest key for r in range(n), O(n)
+    if n == 0:
+        return np.zeros(0, dtype=np.int64)
+    h = n.bit_length()
+    k = np.arange(1, n + 1, dtype=np.int64)
+    depth = np.frexp(k)[1] - 1
+    # in-order position of slot k in the complete tree of height h
+    full = (2 * (k - (1 << depth)) + 1) << (h - 1 - depth)
+    slots = np.zeros(1 << h, dtype=np.int64)
+    slots[full] = k
+    return slots[slots != 0]
+
+
+class FrozenTree:
+    def __init__(self, keys, values=None):
+        # keys: strictly increasing NumPy array, values in the same order
+        keys = np.asarray(keys)
+        n = len(keys)
+        self.size = n
+        self.key_dtype = keys.dtype
+        self.depth = n.bit_length()
+        slots = eytzinger_slots(n)
+        self.layout = np.empty(n + 1, dtype=keys.dtype)
+        self.layout[slots] = keys
+        if n:
+            self.layout[0] = keys[0]
+        # slot -> sorted position
+        self.rank = np.full(n + 1, -1, dtype=np.int64)
+        self.rank[slots] = np.arange(n)
+        self.values = None if values is None else np.asarray(values)
+        for col in (self.layout, self.rank, self.values):
+            if col is not None:
+                col.flags.writeable = False
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, key):
+        return self.search_node(key) != -1
+
+    def __iter__(self):
+        return iter(self.sorted_keys().tolist())
+
+    def sorted_keys(self):
+        keys = np.empty(self.size, dtype=self.key_dtype)
+        keys[self.rank[1:]] = self.layout[1:]
+        return keys
+
+    # SEARCH
+
+    def lower_bound_slots(self, queries):
+        # -> slot of the first key >= each query, 0 if there is none
+        n = self.size
+        layout = self.layout
+        k = np.ones(len(queries), dtype=np.int64)
+        for _ in range(self.depth):
+            right = (k > n) | (layout[np.minimum(k, n)] < queries)
+            k = 2 * k + right
+        # strip the trailing ones and the left turn before them
+        lowest_zero = ~k & (k + 1)
+        return k >> np.frexp(lowest_zero)[1]
+
+    def search_many(self, queries):
+        queries = np.asarray(queries)
+        if self.size == 0:
+            return np.full(len(queries), -1, dtype=np.int64)
+        j = self.lower_bound_slots(queries)
+        found = (j != 0) & (self.layout[j] == queries)
+        return np.where(found, self.rank[j], -1)
+
+    def contains_many(self, queries):
+        return self.search_many(queries) != -1
+
+    def search_node(self, key):
+        return int(self.search_many(np.asarray([key]))[0])
+
+    def get_many(self, queries, default=None):
+        # values of the queries, default where missing (needs values)
+        if self.values is None:
+            raise RuntimeError("Tree was frozen without values")
+        pos = self.search_many(queries)
+        return np.where(pos == -1, default, self.values[np.maximum(pos, 0)])
+
+    # MEMORY
+
+    def memory_footprint(self):
+        payload = self.size * (self.key_dtype.itemsize + (0 if self.values is None else self.values.itemsize))
+        objects = 0 if self.values is None else tree_columns.object_bytes(self.values, self.values.dtype)
+        live = payload + self.size * self.rank.itemsize + objects
+        total = sum(tree_columns.column_bytes(c) for c in (self.layout, self.rank, self.values)) + objects
+        return tree_columns.footprint(self.size, total, live, payload + objects)
@@ -0,0 +1,375 @@
+import numpy as np
+
+# Paged sparse columns for avl_binary.AVLTreeArray(page_size=...).
+# The slot range [0, length) is cut into pages of page_size slots (a power
+# of two). A page table maps page -> row of a 2-d pool per column; a page
+# gets a row when a slot in it is first written and gives it back once
+# none of its slots is live any more. Absent pages read as the column's
+# fill value, so a heap full of holes and unused levels only pays for the
+# pages that hold nodes (plus 16 bytes of page table per page).
+#
+# Liveness is tracked by the owner column (the heights): a slot is live
+# while its owner value is nonzero. Every column of a store shares the
+# page table, rows are freed for all of them together.
+#
+# Columns index like 1-d NumPy arrays with an int, a slice (dense copy)
+# or an integer array (gather / scatter). Any write of a value other than
+# the fill value allocates its page, in every column and in any order.
+# A slot whose owner value drops to zero is reset to the fill value in
+# all columns, so empty slots never carry stale items into other pages.
+
+PAGE_SIZE = 1024
+
+
+class PagedStore:
+    def __init__(self, length, page_size=PAGE_SIZE):
+        if page_size < 1 or page_size & (page_size - 1):
+            raise ValueError("page_size must be a power of two")
+        self.page_size = page_size
+        self.shift = page_size.bit_length() - 1
+        self.mask = page_size - 1
+        self.length = 0
+        # page -> row, -1 when absent; row_of mirrors it for scalar access
+        self.table = np.zeros(0, dtype=np.int64)
+        self.row_of = []
+        # row -> page, live slots per row
+        self.page_of = np.zeros(0, dtype=np.int64)
+        self.live = np.zeros(0, dtype=np.int64)
+        self.rows = 0
+        self.free = []
+        self.columns = []
+        self.resize(length)
+
+    def column(self, dtype, fill=0, owner=False):
+        col = PagedColumn(self, dtype, fill, owner)
+        self.columns.append(col)
+        return col
+
+    @property
+    def pages(self):
+        # pages holding a row
+        return self.rows - len(self.free)
+
+    def resize(self, length):
+        n = (length + self.mask) >> self.shift
+        old = len(self.table)
+        if n < old:
+            for p in np.flatnonzero(self.table[n:] >= 0).tolist():
+                self.release(n + p)
+            self.table = self.table[:n].copy()
+            del self.row_of[n:]
+        elif n > old:
+            self.table = np.concatenate((self.table, np.full(n - old, -1, dtype=np.int64)))
+            self.row_of.extend([-1] * (n - old))
+        # the cut-off tail of the last page must read as empty if it comes back
+        if length < self.length and length & self.mask:
+            row = self.row_of[length >> self.shift]
+            if row >= 0:
+                for col in self.columns:
+                    col.pool[row, length & self.mask:] = col.fill
+                self.live[row] = np.count_nonzero(self.owner.pool[row])
+                if not self.live[row]:
+                    self.release(length >> self.shift)
+        self.length = length
+        self.trim()
+
+    @property
+    def owner(self):
+        return next(col for col in self.columns if col.owner)
+
+    # PAGES
+
+    def allocate(self, pages):
+        # give each page (without a row) a row filled with the fill values
+        for p in pages:
+            if self.free:
+                row = self.free.pop()
+            else:
+                row = self.rows
+                self.rows += 1
+                if row >= len(self.live):
+                    self.reserve(max(2 * len(self.live), 4))
+            self.table[p] = row
+            self.row_of[p] = row
+            self.page_of[row] = p
+            self.live[row] = 0
+            for col in self.columns:
+                col.pool[row] = col.fill
+
+    def reserve(self, rows):
+        # pools grow by doubling, like a NumPy-backed list
+        extra = rows - len(self.live)
+        self.live = np.concatenate((self.live, np.zeros(extra, dtype=np.int64)))
+        self.page_of = np.concatenate((self.page_of, np.full(extra, -1, dtype=np.int64)))
+        for col in self.columns:
+            pool = np.empty((rows, self.page_size), dtype=col.dtype)
+            pool[:len(col.pool)] = col.pool
+            col.pool = pool
+
+    def release(self, page):
+        row = self.row_of[page]
+        self.table[page] = -1
+        self.row_of[page] = -1
+        self.page_of[row] = -1
+        self.free.append(row)
+
+    def clear(self, rows, offsets):
+        # slots that stopped being live read as fill again
+        for col in self.columns:
+            if not col.owner:
+                col.pool[rows, offsets] = col.fill
+
+    def release_empty(self, rows):
+        empty = rows[self.live[rows] == 0]
+        if not len(empty):
+            return
+        for row in np.unique(empty).tolist():
+            if self.page_of[row] >= 0:
+                self.release(int(self.page_of[row]))
+        self.trim()
+
+    def trim(self):
+        # pools at most a quarter used are packed and halved, so memory
+        # follows the pages in use after mass deletes (renumbers the rows)
+        if len(self.live) <= 4 or 4 * self.pages > len(self.live):
+            return
+        used = np.flatnonzero(self.page_of >= 0)
+        n, rows = len(used), max(2 * len(used), 4)
+        pages = self.page_of[used]
+        for col in self.columns:
+            pool = np.empty((rows, self.page_size), dtype=col.dtype)
+            pool[:n] = col.pool[used]
+            col.pool = pool
+        live = np.zeros(rows, dtype=np.int64)
+        live[:n] = self.live[used]
+        self.live = live
+        self.page_of = np.full(rows, -1, dtype=np.int64)
+        self.page_of[:n] = pages
+        self.table[pages] = np.arange(n)
+        for row, p in enumerate(pages.tolist()):
+            self.row_of[p] = row
+        self.rows = n
+        self.free = []
+
+    def index(self, i):
+        # int / slice / index array -> int64 index array
+        if isinstance(i, slice):
+            start, stop, step = i.indices(self.length)
+            return np.arange(start, stop, step, dtype=np.int64)
+        i = np.asarray(i)
+        if i.dtype == bool:
+            return np.flatnonzero(i)
+        return i.astype(np.int64, copy=False)
+
+    def overhead_bytes(self):
+        return self.table.nbytes + self.page_of.nbytes + self.live.nbytes + 8 * len(self.row_of)
+
+
+class PagedColumn:
+    def __init__(self, store, dtype, fill=0, owner=False):
+        self.store = store
+        self.dtype = np.dtype(dtype)
+        self.fill = np.array(fill, dtype=self.dtype)[()]
+        self.owner = owner
+        self.pool = np.empty((len(store.live), store.page_size), dtype=self.dtype)
+        # scalar fast path (row_of is only ever changed in place)
+        self.row_of = store.row_of
+        self.shift = store.shift
+        self.mask = store.mask
+
+    def __len__(self):
+        return self.store.length
+
+    @property
+    def itemsize(self):
+        return self.dtype.itemsize
+
+    @property
+    def nbytes(self):
+        # allocated pool rows; the owner also carries the page table
+        own = self.store.overhead_bytes() if self.owner else 0
+        return self.pool.nbytes + own
+
+    def is_fill(self, value):
+        if self.dtype.kind == 'O':
+            return value is self.fill
+        return value == self.fill
+
+    def not_fill(self, values):
+        # elementwise, values is an array of this column's dtype
+        if self.dtype.kind == 'O':
+            return np.fromiter((v is not self.fill for v in values), dtype=bool, count=len(values))
+        return values != self.fill
+
+    # READ
+
+    def __getitem__(self, i):
+        try:
+            row = self.row_of[i >> self.shift]
+        except TypeError:
+            # slice or index array
+            span = self.span(i)
+            if span is None:
+                return self.gather(self.store.index(i))
+            page, a, b = span
+            row = self.row_of[page]
+            if row < 0:
+                return np.full(b - a, self.fill, dtype=self.dtype)
+            return self.pool[row, a:b].copy()
+        if row < 0:
+            return self.fill
+        return self.pool[row, i & self.mask]
+
+    def item(self, i):
+        v = self[i]
+        return v.item() if isinstance(v, np.generic) else v
+
+    def gather(self, idx):
+        s = self.store
+        rows = s.table[idx >> s.shift]
+        out = np.full(len(idx), self.fill, dtype=self.dtype)
+        present = rows >= 0
+        out[present] = self.pool[rows[present], idx[present] & s.mask]
+        return out
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __array__(self, dtype=None, copy=None):
+        # dense copy of the whole column
+        s = self.store
+        out = np.full(len(self) + s.mask, self.fill, dtype=self.dtype)
+        pages = np.flatnonzero(s.table >= 0)
+        dense = out[:len(s.table) << s.shift].reshape(-1, s.page_size)
+        dense[pages] = self.pool[s.table[pages]]
+        out = out[:len(self)]
+        return out if dtype is None else out.astype(dtype)
+
+    def stored(self):
+        # items of the allocated pages only
+        s = self.store
+        return self.pool[s.table[s.table >= 0]].ravel()
+
+    def flatnonzero(self):
+        # sorted indices of the nonzero items, absent pages are skipped
+        s = self.store
+        pages = np.flatnonzero(s.table >= 0)
+        rows, offsets = np.nonzero(self.pool[s.table[pages]])
+        idx = (pages[rows] << s.shift) + offsets
+        return idx[idx < len(self)]
+
+    # WRITE
+
+    def __setitem__(self, i, value):
+        try:
+            p = i >> self.shift
+            row = self.row_of[p]
+        except TypeError:
+            span = self.span(i)
+            if span is None:
+                self.scatter(self.store.index(i), value)
+            else:
+                self.write_span(*span, value)
+            return
+        s = self.store
+        if row < 0:
+            if self.is_fill(value):
+                return
+            s.allocate((p,))
+            row = self.row_of[p]
+        off = i & self.mask
+        if self.owner:
+            was, now = self.pool[row, off] != 0, value != 0
+            if was != now:
+                s.live[row] += 1 if now else -1
+                if not now:
+                    if not s.live[row]:
+                        s.release(p)
+                        s.trim()
+                        return
+                    s.clear(row, off)
+        self.pool[row, off] = value
+
+    def span(self, i):
+        # slice inside one page -> (page, start, stop) within the page
+        if not isinstance(i, slice) or i.step not in (None, 1):
+            return None
+        start, stop, _ = i.indices(len(self))
+        if stop <= start or start >> self.shift != (stop - 1) >> self.shift:
+            return None
+        return start >> self.shift, start & self.mask, ((stop - 1) & self.mask) + 1
+
+    def write_span(self, page, a, b, value):
+        s = self.store
+        row = self.row_of[page]
+        if not self.owner:
+            if row < 0:
+                values = np.broadcast_to(np.asarray(value, dtype=self.dtype), (b - a,))
+                if not self.not_fill(values).any():
+                    return
+                s.allocate((page,))
+                row = self.row_of[page]
+            self.pool[row, a:b] = value
+            return
+        if np.ndim(value) == 0 and value == 0:
+            # clearing, the common case (take_subtree)
+            if row < 0:
+                return
+            cleared = np.flatnonzero(self.pool[row, a:b])
+            was, now = len(cleared), 0
+        else:
+            values = np.asarray(value, dtype=self.dtype)
+            now = np.count_nonzero(values) if values.ndim else (b - a) * bool(values)
+            if row < 0:
+                if not now:
+                    return
+                s.allocate((page,))
+                row = self.row_of[page]
+            old = self.pool[row, a:b]
+            was = np.count_nonzero(old)
+            cleared = np.flatnonzero((old != 0) & (values == 0)) if was else ()
+        self.pool[row, a:b] = value
+        if was != now:
+            s.live[row] += now - was
+            if not s.live[row]:
+                s.release(page)
+                s.trim()
+                return
+        if len(cleared):
+            s.clear(row, a + cleared)
+
+    def scatter(self, idx, value):
+        s = self.store
+        values = np.asarray(value, dtype=self.dtype)
+        if values.ndim == 0:
+            values = np.full(idx.shape, values, dtype=self.dtype)
+        pages = idx >> s.shift
+        rows = s.table[pages]
+        missing = rows < 0
+        if missing.any():
+            new = missing & self.not_fill(values)
+            if new.any():
+                s.allocate(np.unique(pages[new]).tolist())
+                rows = s.table[pages]
+            # fill values on absent pages
+            keep = rows >= 0
+            idx, values, rows = idx[keep], values[keep], rows[keep]
+        offsets = idx & s.mask
+        if self.owner:
+            delta = (values != 0).astype(np.int64) - (self.pool[rows, offsets] != 0)
+            self.pool[rows, offsets] = values
+            changed = delta != 0
+            if changed.any():
+                np.add.at(s.live, rows[changed], delta[changed])
+                cleared = delta < 0
+                if cleared.any():
+                    s.clear(rows[cleared], offsets[cleared])
+                    s.release_empty(rows)
+        else:
+            self.pool[rows, offsets] = values
+
+
+def flatnonzero(col):
+    # np.flatnonzero for dense and paged columns
+    return col.flatnonzero() if isinstance(col, PagedColumn) else np.flatnonzero(col)
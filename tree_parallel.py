@@ -0,0 +1,73 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+# Process-pool driver for the join-based set operations of
+# avl_reference.AVLTree and avl_array.AVLTreeArray.
+# Both trees are cut at the same pivot keys, every pair of pieces is
+# combined in a worker and the results are joined back in key order.
+
+
+def run_set_op(a, b, op):
+    getattr(a, op)(b)
+    return a
+
+
+def cut(tree, pivots):
+    # pieces strictly between consecutive pivots, and whether each pivot was present
+    pieces = []
+    found = []
+    for p in pivots:
+        left, hit, tree = tree.split(p)
+        pieces.append(left)
+        found.append(hit)
+    pieces.append(tree)
+    return pieces, found
+
+
+def keep_pivot(op, in_a, in_b):
+    if op == 'union':
+        return in_a or in_b
+    if op == 'intersection':
+        return in_a and in_b
+    return in_a and not in_b
+
+
+def sorted_copy(tree, keys):
+    # mutable copy with the same node layout, order_stats and key / value
+    # types, keys = list(tree)
+    cls = type(tree)
+    if not hasattr(tree, 'key_dtype'):
+        return cls.from_sorted(keys, compact=tree.compact, order_stats=tree.order_stats)
+    values = [v for _, v in tree.items()] if tree.values is not None else None
+    return cls.from_sorted(keys, order_stats=tree.order_stats, key_dtype=tree.key_dtype,
+                           value_dtype=tree.value_dtype, values=values)
+
+
+def parallel_set_op(tree, other, op, workers):
+    # tree becomes `tree op other`, other is left untouched
+    cls = type(tree)
+    keys = list(other)
+    if len(keys) < 2 * workers:
+        return getattr(tree, op)(other)
+
+    pivots = [keys[len(keys) * i // workers] for i in range(1, workers)]
+    # join puts the pivots back without their payloads
+    has_values = getattr(tree, 'values', None) is not None
+    if has_values:
+        a_values = [tree.get(p) for p in pivots]
+        b_values = [other.get(p) for p in pivots]
+    a_parts, a_found = cut(tree, pivots)
+    b_parts, b_found = cut(sorted_copy(other, keys), pivots)
+
+    with ProcessPoolExecutor(workers) as pool:
+        parts = list(pool.map(run_set_op, a_parts, b_parts, repeat(op)))
+
+    result = parts[0]
+    for p, in_a, in_b, part in zip(pivots, a_found, b_found, parts[1:]):
+        result = cls.join(result, p if keep_pivot(op, in_a, in_b) else None, part)
+    if has_values:
+        for p, in_a, in_b, a_val, b_val in zip(pivots, a_found, b_found, a_values, b_values):
+            if keep_pivot(op, in_a, in_b):
+                result.put(p, a_val if in_a else b_val)
+    tree.take_over(result)
+    return tree
@@ -0,0 +1,260 @@
+from collections import Counter
+import numpy as np
+
+# Opt-in operation counters for AVLTree, avl_array.AVLTreeArray and
+# avl_binary.AVLTreeArray.
+# instrument(tree) shadows a few methods of that one tree object with
+# counting wrappers, close() removes them again. The classes themselves are
+# never changed, a tree that is not instrumented runs exactly the same code.
+#
+#   comparisons       key comparisons made by single-key operations, one
+#                     three-way comparison per node on the search path
+#   single_rotations  rotations not paired with the one before them
+#   double_rotations  child rotation directly followed by the opposite
+#                     rotation of its parent (LR / RL), counted once
+#   height_updates    heights recomputed by retracing, rotations and joins
+#                     (avl_binary: update_height calls; AVLTree and
+#                     avl_array: see HEIGHT_WRITERS)
+#   node_moves        avl_binary: nodes relocated by take_subtree/put_subtree
+#                     and keys copied up on delete
+#
+# Per operation type it also keeps the search path length (nodes visited
+# before the operation) and the number of rotations as distributions.
+
+COUNTERS = ('comparisons', 'single_rotations', 'double_rotations', 'height_updates', 'node_moves')
+
+OPERATIONS = ('insert_node', 'delete_node', 'search_node', 'get', 'put', 'pop', 'rank',
+              'insert_many', 'delete_many', 'union', 'intersection', 'difference', 'split')
+KEYED = {'insert_node', 'delete_node', 'search_node', 'get', 'put', 'pop', 'rank'}
+
+# rotation -> (child that becomes the new root, rotation of the opposite direction)
+ROTATIONS = {
+    'r_rotate': ('left', 'l_rotate'),
+    'l_rotate': ('right', 'r_rotate'),
+    'rotate_right': ('left', 'rotate_left'),
+    'rotate_left': ('right', 'rotate_right'),
+}
+
+# AVLTree and avl_array write heights inline; each of these methods is
+# wrapped to add the heights it writes itself (not those of its callees):
+#   insert / delete (recursive)  one, unless the key is missing / a duplicate
+#                                or the node is unlinked
+#   r_rotate / l_rotate          two
+#   join_nodes / join_*          the joined node and the one that stays on top
+#   p_rebalance                  one (persistent AVLTree)
+#   insert_node / delete_node    iterative AVLTree: the count they return
+HEIGHT_WRITERS = ('insert', 'delete', 'r_rotate', 'l_rotate', 'join_nodes', 'join_right',
+                  'join_left', 'p_rebalance', 'insert_node', 'delete_node')
+
+
+def instrument(tree):
+    return TreeStats(tree)
+
+
+class OpStats:
+    def __init__(self):
+        self.calls = 0
+        self.totals = dict.fromkeys(COUNTERS, 0)
+        self.path_lengths = Counter()
+        self.rotations = Counter()
+
+    def mean(self, name):
+        return self.totals[name] / self.calls if self.calls else 0.0
+
+
+class TreeStats:
+    def __init__(self, tree):
+        self.tree = tree
+        self.ops = {}
+        for name in COUNTERS:
+            setattr(self, name, 0)
+        self.depth = 0
+        self.last_rotation = None
+        # (attribute, previous instance value or None if it came from the class)
+        self.patched = []
+        self.install()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # INSTALL / REMOVE
+
+    def install(self):
+        tree = self.tree
+        # height counting first, so the operation wrappers see it
+        if hasattr(tree, 'update_height'):
+            # avl_binary
+            self.patch('update_height', self.wrap_count('height_updates', tree.update_height))
+            self.patch('move_item', self.wrap_count('node_moves', tree.move_item))
+            self.patch('take_subtree', self.wrap_take(tree.take_subtree))
+        else:
+            for name in HEIGHT_WRITERS:
+                if hasattr(tree, name):
+                    self.patch(name, self.wrap_heights(name, getattr(tree, name)))
+        for name in ROTATIONS:
+            if hasattr(tree, name):
+                self.patch(name, self.wrap_rotation(name, getattr(tree, name)))
+        for name in OPERATIONS:
+            if hasattr(tree, name):
+                self.patch(name, self.wrap_op(name, getattr(tree, name)))
+
+    def patch(self, name, value):
+        self.patched.append((name, self.tree.__dict__.get(name)))
+        setattr(self.tree, name, value)
+
+    def close(self):
+        for name, old in reversed(self.patched):
+            if old is None:
+                delattr(self.tree, name)
+            else:
+                setattr(self.tree, name, old)
+        self.patched = []
+
+    # WRAPPERS
+
+    def wrap_op(self, name, method):
+        keyed = name in KEYED
+
+        def op(*args, **kwargs):
+            if self.depth:
+                # called from inside another operation
+                return method(*args, **kwargs)
+            path = None
+            if keyed and args:
+                path = self.tree.path_length(args[0])
+            before = [getattr(self, c) for c in COUNTERS]
+            if path is not None:
+                self.comparisons += path
+            self.depth = 1
+            self.last_rotation = None
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.depth = 0
+                self.record(name, before, path)
+        return op
+
+    def wrap_rotation(self, name, method):
+        side, opposite = ROTATIONS[name]
+
+        def rotate(x):
+            pivot = self.child(x, side)
+            last = self.last_rotation
+            result = method(x)
+            if last is not None and last[0] == opposite and last[1] == pivot:
+                self.single_rotations -= 1
+                self.double_rotations += 1
+                self.last_rotation = None
+            else:
+                self.single_rotations += 1
+                self.last_rotation = (name, result)
+            return result
+        return rotate
+
+    def wrap_count(self, counter, method):
+        def counting(*args):
+            setattr(self, counter, getattr(self, counter) + 1)
+            return method(*args)
+        return counting
+
+    def wrap_heights(self, name, method):
+        height = self.tree.get_height
+        child = self.child
+
+        if name in ('r_rotate', 'l_rotate'):
+            def counting(x):
+                self.height_updates += 2
+                return method(x)
+        elif name == 'p_rebalance':
+            def counting(node):
+                self.height_updates += 1
+                return method(node)
+        elif name in ('insert_node', 'delete_node'):
+            def counting(*args):
+                written = method(*args)
+                self.height_updates += written or 0
+                return written
+        elif name in ('insert', 'delete'):
+            def counting(node, key):
+                if not self.missing(node):
+                    current = self.key(node)
+                    if name == 'insert':
+                        self.height_updates += key != current
+                    elif key != current or not (self.missing(child(node, 'left'))
+                                                or self.missing(child(node, 'right'))):
+                        self.height_updates += 1
+                return method(node, key)
+        elif name == 'join_nodes':
+            def counting(l, node, r):
+                self.height_updates += abs(height(l) - height(r)) <= 1
+                return method(l, node, r)
+        else:
+            # join_right walks down l, join_left down r
+            right = name == 'join_right'
+
+            def counting(l, node, r):
+                if right:
+                    top, base = l, height(child(l, 'right')) <= height(r) + 1
+                else:
+                    top, base = r, height(child(r, 'left')) <= height(l) + 1
+                result = method(l, node, r)
+                self.height_updates += base + (result == top)
+                return result
+        return counting
+
+    def wrap_take(self, method):
+        def take_subtree(i):
+            levels = method(i)
+            self.node_moves += sum(int(np.count_nonzero(heights)) for _, heights, _, _ in levels)
+            return levels
+        return take_subtree
+
+    def child(self, x, side):
+        tree = self.tree
+        if hasattr(tree, 'update_height'):
+            return getattr(tree, side)(x)
+        if isinstance(x, int):
+            return getattr(tree, side)[x]
+        return getattr(x, side)
+
+    def missing(self, x):
+        return x is None or x == -1
+
+    def key(self, x):
+        if isinstance(x, int):
+            return self.tree.keys[x]
+        return x.key
+
+    def record(self, name, before, path):
+        stats = self.ops.get(name)
+        if stats is None:
+            stats = self.ops[name] = OpStats()
+        stats.calls += 1
+        for counter, old in zip(COUNTERS, before):
+            stats.totals[counter] += getattr(self, counter) - old
+        if path is not None:
+            stats.path_lengths[path] += 1
+        rotations = (self.single_rotations - before[1]) + (self.double_rotations - before[2])
+        stats.rotations[rotations] += 1
+
+    # REPORT
+
+    def report(self):
+        lines = [f"{'operation':<14}{'calls':>8}{'cmp/op':>9}{'rot1/op':>10}{'rot2/op':>10}"
+                 f"{'h/op':>10}{'moves/op':>10}{'path avg':>10}{'path max':>10}"]
+        for name, stats in self.ops.items():
+            paths = stats.path_lengths
+            n_paths = sum(paths.values())
+            avg = sum(p * c for p, c in paths.items()) / n_paths if n_paths else 0.0
+            lines.append(f"{name:<14}{stats.calls:>8}{stats.mean('comparisons'):>9.2f}"
+                         f"{stats.mean('single_rotations'):>10.3f}{stats.mean('double_rotations'):>10.3f}"
+                         f"{stats.mean('height_updates'):>10.2f}{stats.mean('node_moves'):>10.2f}"
+                         f"{avg:>10.2f}{max(paths, default=0):>10}")
+        for name, stats in self.ops.items():
+            lines.append(f"{name} rotations per call: {dict(sorted(stats.rotations.items()))}")
+            if stats.path_lengths:
+                lines.append(f"{name} path lengths: {dict(sorted(stats.path_lengths.items()))}")
+        return "\n".join(lines)
@@ -0,0 +1,201 @@
+import numpy as np
+
+# Seeded operation streams for the benchmarks.
+# A workload is a generator of (op, keys) items, op is 'insert', 'search'
+# or 'delete' and keys a NumPy int64 array. Items are produced lazily one
+# batch at a time: the i-th inserted key is computed from i (scramble is a
+# bijection), so neither the key set nor the delete order is ever held in
+# memory. The same name, size and seed always give the same stream.
+#
+#   uniform     random unique keys, uniform lookups, shuffled deletes
+#   sequential  increasing keys (new IDs), the worst case for rotations
+#   reverse     decreasing keys
+#   zipf        random keys, Zipf-skewed lookups (oldest keys are hottest)
+#   hotkey      random keys, HOT_FRACTION of lookups hit HOT_KEYS of the keys
+#   sliding     increasing keys, the oldest fall out of a fixed window (TTL)
+#   mixed       preload, then READ_FRACTION lookups interleaved with
+#               inserts of new keys and deletes of the oldest ones
+
+ZIPF_EXPONENT = 1.1
+HOT_KEYS = 0.01
+HOT_FRACTION = 0.9
+WINDOW = 0.1
+READ_FRACTION = 0.95
+
+OPS = {"insert": "insert_node", "search": "search_node", "delete": "delete_node"}
+
+
+def make(name, n, batch_size, seed=0):
+    return WORKLOADS[name](n, batch_size, seed)
+
+
+def run_ops(tree, stream):
+    # apply a whole stream to a tree, one key at a time
+    for op, keys in stream:
+        method = getattr(tree, OPS[op])
+        for key in keys.tolist():
+            method(key)
+
+
+# KEYS
+
+def scramble(idx, bits, seed):
+    # bijection on [0, 2**bits): add, odd multiply and xor-shift are each
+    # invertible modulo 2**bits, so distinct indices stay distinct
+    mask = np.uint64((1 << bits) - 1)
+    rng = np.random.default_rng(seed)
+    add, mul1, mul2 = (int(v) | 1 for v in rng.integers(1, 1 << 62, 3))
+    shift = np.uint64(max(bits // 2, 1))
+    x = np.asarray(idx, dtype=np.uint64)
+    with np.errstate(over='ignore'):
+        x = (x + np.uint64(add)) & mask
+        x = (x * np.uint64(mul1)) & mask
+        x ^= x >> shift
+        x = (x * np.uint64(mul2)) & mask
+        x ^= x >> shift
+    return x.astype(np.int64)
+
+
+def random_keys(n, seed):
+    # i -> i-th key, unique keys in [1, 2**bits] with 2**bits >= 10 n
+    bits = max((10 * n).bit_length(), 1)
+    return lambda idx: scramble(idx, bits, seed) + 1
+
+
+def sequential_keys(idx):
+    return np.asarray(idx, dtype=np.int64) + 1
+
+
+def reverse_keys(n):
+    return lambda idx: n - np.asarray(idx, dtype=np.int64)
+
+
+def shuffled_indices(n, batch_size, seed):
+    # batches of a random permutation of range(n): scramble the next power
+    # of two and drop the values >= n
+    bits = max(n.bit_length(), 1)
+    pending = np.empty(0, dtype=np.int64)
+    for start in range(0, 1 << bits, batch_size):
+        idx = scramble(np.arange(start, min(start + batch_size, 1 << bits)), bits, seed)
+        pending = np.concatenate((pending, idx[idx < n]))
+        while len(pending) >= batch_size:
+            yield pending[:batch_size]
+            pending = pending[batch_size:]
+    if len(pending):
+        yield pending
+
+
+# LOOKUP DISTRIBUTIONS
+# (rng, count, size) -> indices of already inserted keys, count > 0
+
+def uniform_lookups(rng, count, size):
+    return rng.integers(0, count, size)
+
+
+def zipf_lookups(rng, count, size):
+    # rank r is drawn with probability ~ 1/r**ZIPF_EXPONENT, ranks past
+    # count are redrawn
+    out = np.empty(0, dtype=np.int64)
+    while len(out) < size:
+        r = rng.zipf(ZIPF_EXPONENT, 2 * (size - len(out)))
+        out = np.concatenate((out, r[r <= count] - 1))
+    return out[:size]
+
+
+def hotkey_lookups(rng, count, size):
+    hot = max(int(count * HOT_KEYS), 1)
+    idx = rng.integers(0, count, size)
+    is_hot = rng.random(size) < HOT_FRACTION
+    idx[is_hot] = rng.integers(0, hot, int(is_hot.sum()))
+    return idx
+
+
+# WORKLOADS
+
+def growth(key_at, n, batch_size, seed, lookups=uniform_lookups):
+    # insert a batch, look up a batch of inserted keys; then delete all
+    rng = np.random.default_rng(seed)
+    for start in range(0, n, batch_size):
+        idx = np.arange(start, min(start + batch_size, n))
+        yield "insert", key_at(idx)
+        yield "search", key_at(lookups(rng, start + len(idx), len(idx)))
+    for idx in shuffled_indices(n, batch_size, seed + 1):
+        yield "delete", key_at(idx)
+
+
+def uniform(n, batch_size, seed=0):
+    return growth(random_keys(n, seed), n, batch_size, seed)
+
+
+def sequential(n, batch_size, seed=0):
+    return growth(sequential_keys, n, batch_size, seed)
+
+
+def reverse(n, batch_size, seed=0):
+    return growth(reverse_keys(n), n, batch_size, seed)
+
+
+def zipf(n, batch_size, seed=0):
+    return growth(random_keys(n, seed), n, batch_size, seed, zipf_lookups)
+
+
+def hotkey(n, batch_size, seed=0):
+    return growth(random_keys(n, seed), n, batch_size, seed, hotkey_lookups)
+
+
+def sliding(n, batch_size, seed=0):
+    # n increasing keys go in, the tree never holds more than the window
+    rng = np.random.default_rng(seed)
+    window = max(int(n * WINDOW), batch_size)
+    for start in range(0, n, batch_size):
+        stop = min(start + batch_size, n)
+        yield "insert", sequential_keys(np.arange(start, stop))
+        oldest = max(stop - window, 0)
+        yield "search", sequential_keys(oldest + uniform_lookups(rng, stop - oldest, stop - start))
+        expired = max(stop - window, 0) - max(start - window, 0)
+        if expired:
+            yield "delete", sequential_keys(np.arange(oldest - expired, oldest))
+    remaining = n - max(n - window, 0)
+    for start in range(n - remaining, n, batch_size):
+        yield "delete", sequential_keys(np.arange(start, min(start + batch_size, n)))
+
+
+def mixed(n, batch_size, seed=0):
+    # preload n keys, then n operations: READ_FRACTION lookups, the rest
+    # split between inserting a new key and deleting the oldest live one
+    rng = np.random.default_rng(seed)
+    key_at = random_keys(2 * n, seed)
+    for start in range(0, n, batch_size):
+        yield "insert", key_at(np.arange(start, min(start + batch_size, n)))
+
+    next_new, oldest = n, 0
+    for start in range(0, n, batch_size):
+        size = min(batch_size, n - start)
+        is_read = rng.random(size) < READ_FRACTION
+        is_insert = ~is_read & (rng.random(size) < 0.5)
+        is_delete = ~is_read & ~is_insert
+        # live range [lo, hi) seen by each operation
+        hi = next_new + np.cumsum(is_insert)
+        lo = oldest + np.cumsum(is_delete)
+        idx = lo + (rng.random(size) * (hi - lo)).astype(np.int64)
+        idx[is_insert] = hi[is_insert] - 1
+        idx[is_delete] = lo[is_delete] - 1
+        next_new, oldest = int(hi[-1]), int(lo[-1])
+
+        codes = np.where(is_read, 1, np.where(is_insert, 0, 2))
+        keys = key_at(idx)
+        # consecutive operations of the same kind form one item
+        cuts = np.flatnonzero(np.diff(codes)) + 1
+        for c, k in zip(np.split(codes, cuts), np.split(keys, cuts)):
+            yield ("insert", "search", "delete")[c[0]], k
+
+
+WORKLOADS = {
+    "uniform": uniform,
+    "sequential": sequential,
+    "reverse": reverse,
+    "zipf": zipf,
+    "hotkey": hotkey,
+    "sliding": sliding,
+    "mixed": mixed,
+}